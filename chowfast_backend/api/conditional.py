@@ -0,0 +1,66 @@
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints.
+
+Validators come from the object's updated_at column, so they can be checked
+without loading or serializing the object:
+
+    @conditional_get(lambda request, customer_id: Customer.objects.filter(
+        customer_id=customer_id).values_list("customer_id", "updated_at").first())
+    def get(self, request, customer_id):
+        ...
+        return set_validators(Response(data), customer.customer_id, customer.updated_at)
+
+When the request carries If-None-Match / If-Modified-Since, the decorator
+runs the validator query (one indexed lookup of two columns) and answers
+304 before the view runs. Requests without them go straight to the view,
+which adds the headers from the object it already loaded.
+"""
+
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Bump when a serializer's output changes so clients drop cached bodies
+REPRESENTATION_VERSION = 1
+
+
+def make_etag(key, updated_at):
+    return f'W/"{REPRESENTATION_VERSION}-{key}-{int(updated_at.timestamp() * 1_000_000)}"'
+
+
+def set_validators(response, key, updated_at):
+    """Add ETag and Last-Modified for (key, updated_at) to a 200 response."""
+    response["ETag"] = make_etag(key, updated_at)
+    response["Last-Modified"] = http_date(updated_at.timestamp())
+    # Clients may keep the body but must revalidate before using it
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_get(validator):
+    """
+    validator(request, *args, **kwargs) returns (key, updated_at), or None
+    when the object does not exist (the view then answers as usual).
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            headers = request.headers
+            if "If-None-Match" in headers or "If-Modified-Since" in headers:
+                validators = validator(request, *args, **kwargs)
+                if validators:
+                    key, updated_at = validators
+                    response = get_conditional_response(
+                        request,
+                        etag=make_etag(key, updated_at),
+                        last_modified=int(updated_at.timestamp()),
+                    )
+                    if response is not None:
+                        return set_validators(response, key, updated_at)
+            return method(self, request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,106 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are read with a WHERE on the ordering columns instead of OFFSET, so
+page 10,000 costs the same as page 1 and no COUNT(*) is run. The ordering
+must end in a unique column (e.g. ("-created_at", "-id")) and have a
+matching composite index.
+
+The cursor is an opaque URL-safe token holding the ordering values of the
+last row served. Rows inserted or deleted while a client pages never cause
+skipped or repeated rows.
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+CURSOR_VERSION = 1
+
+
+class KeysetPagination(BasePagination):
+    ordering = ("-created_at", "-id")
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip("-"))
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        payload = json.dumps({"v": CURSOR_VERSION, "k": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor, model):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if payload["v"] != CURSOR_VERSION or len(payload["k"]) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, payload["k"])
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def after(self, values):
+        """Q matching rows that sort after `values` in self.ordering."""
+        condition = Q()
+        for i in reversed(range(len(self.ordering))):
+            field = self.ordering[i]
+            lookup = "lt" if field.startswith("-") else "gt"
+            name = field.lstrip("-")
+            step = Q(**{f"{name}__{lookup}": values[i]})
+            if condition:
+                step |= Q(**{name: values[i]}) & condition
+            condition = step
+        return condition
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_used = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor, queryset.model)))
+
+        # One extra row tells us whether there is a next page, without a COUNT
+        rows = list(queryset[: self.page_size_used + 1])
+        self.has_next = len(rows) > self.page_size_used
+        page = rows[: self.page_size_used]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        params = self.request.query_params.copy()
+        params[self.cursor_query_param] = self.next_cursor
+        return self.request.build_absolute_uri(f"{self.request.path}?{params.urlencode()}")
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "next_cursor": self.next_cursor,
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
@@ -0,0 +1,113 @@
+"""
+Per-endpoint SQL query budgets.
+
+A budget is the exact list of statements an endpoint is allowed to run,
+written as short "shapes" such as "SELECT users" or "INSERT customers".
+Tests capture the SQL of a request, compare its shapes with the budget and
+collect the outcome in a report so regressions (and endpoints that got
+cheaper and can have their budget tightened) are easy to spot.
+"""
+
+import importlib
+import json
+import os
+import re
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver
+
+_TABLE = r'"?([\w.]+)"?'
+_SHAPES = [
+    (re.compile(rf"^SELECT .*? FROM {_TABLE}", re.IGNORECASE | re.DOTALL), "SELECT"),
+    (re.compile(rf"^INSERT INTO {_TABLE}", re.IGNORECASE), "INSERT"),
+    (re.compile(rf"^UPDATE {_TABLE}", re.IGNORECASE), "UPDATE"),
+    (re.compile(rf"^DELETE FROM {_TABLE}", re.IGNORECASE), "DELETE"),
+]
+
+
+def query_shape(sql):
+    """Reduce a SQL statement to "<VERB> <table>" (or the bare statement keyword)."""
+    sql = sql.strip()
+    for pattern, verb in _SHAPES:
+        match = pattern.match(sql)
+        if match:
+            return f"{verb} {match.group(1)}"
+    if sql.upper().startswith("RELEASE SAVEPOINT"):
+        return "RELEASE SAVEPOINT"
+    return sql.split(" ", 1)[0].upper()
+
+
+def capture_queries(func, *args, **kwargs):
+    """Call func and return (result, [sql, ...]) for every statement it ran."""
+    with CaptureQueriesContext(connection) as ctx:
+        result = func(*args, **kwargs)
+    return result, [query["sql"] for query in ctx.captured_queries]
+
+
+def api_v1_url_names():
+    """Names of every route declared in an api.v1.<module>.urls module."""
+    package_dir = Path(__file__).resolve().parent / "v1"
+    names = set()
+    # The api.v1 areas are namespace packages, which pkgutil.iter_modules() skips
+    for module_dir in sorted(package_dir.iterdir()):
+        if not (module_dir / "urls.py").exists():
+            continue
+        urls = importlib.import_module(f"api.v1.{module_dir.name}.urls")
+        names.update(_pattern_names(urls.urlpatterns))
+    return names
+
+
+def _pattern_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _pattern_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name
+
+
+class QueryBudgetReport:
+    """Collects budget results for a test run and renders them."""
+
+    def __init__(self):
+        self.entries = []
+
+    def record(self, name, expected, actual_sql):
+        actual = [query_shape(sql) for sql in actual_sql]
+        if actual == expected:
+            status = "ok"
+        elif len(actual) < len(expected):
+            status = "improved"  # cheaper than budgeted: tighten the budget
+        else:
+            status = "regression"
+
+        entry = {
+            "endpoint": name,
+            "status": status,
+            "expected": expected,
+            "actual": actual,
+            "sql": actual_sql if status != "ok" else [],
+        }
+        self.entries.append(entry)
+        return entry
+
+    def render(self):
+        lines = [f"{'endpoint':<28}{'budget':>8}{'actual':>8}  status"]
+        for entry in sorted(self.entries, key=lambda e: e["endpoint"]):
+            lines.append(
+                f"{entry['endpoint']:<28}{len(entry['expected']):>8}{len(entry['actual']):>8}  {entry['status']}"
+            )
+            if entry["status"] != "ok":
+                lines.append(f"    expected: {entry['expected']}")
+                lines.append(f"    actual:   {entry['actual']}")
+        return "\n".join(lines)
+
+    def write(self, path=None):
+        """Write the report as JSON to `path` (or $QUERY_BUDGET_REPORT if set)."""
+        path = path or os.environ.get("QUERY_BUDGET_REPORT")
+        if not path:
+            return None
+        with open(path, "w") as fh:
+            json.dump(self.entries, fh, indent=2)
+        return path
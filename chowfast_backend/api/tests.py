@@ -0,0 +1,609 @@
+import sys
+from unittest.mock import patch
+
+from customers.models import Customer
+from customers.resolver import get_phone_resolver
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from menus import menu_cache
+from menus import search as menu_search
+from menus.models import MenuItem
+from orders.models import Order
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+from users.models import OTP, SessionToken, User
+from users.tokens import ClaimsRefreshToken
+from vendors import presence
+from vendors.models import Vendor
+
+from .query_budget import QueryBudgetReport, api_v1_url_names, capture_queries, query_shape
+from .throttling import SlidingWindowThrottle, get_rejection_counts
+
+# Exact statements each api.v1 endpoint may run for its happy path.
+# Tests run inside a transaction, so every transaction.atomic() block shows up
+# as SAVEPOINT/RELEASE SAVEPOINT (in production the outermost one is BEGIN/COMMIT).
+QUERY_BUDGETS = {
+    "create_customer": [
+        "SAVEPOINT",
+        "UPDATE core_id_sequence",  # customer_id reserved up front (cached block outside transactions)
+        "INSERT customers",
+        "RELEASE SAVEPOINT",
+    ],
+    "list_customers": [
+        "SELECT customers",  # keyset page, no COUNT(*)
+    ],
+    "export_customers": [
+        "SELECT customers",  # one cursor for the whole stream
+    ],
+    "import_customers": [
+        "SAVEPOINT",  # the whole upload, so an unreadable file imports nothing
+        # Per batch: one set-based duplicate check and one bulk INSERT
+        "SAVEPOINT",
+        "SELECT customers",
+        "UPDATE core_id_sequence",  # one customer_id range for the whole batch
+        "INSERT customers",
+        "RELEASE SAVEPOINT",
+        "RELEASE SAVEPOINT",
+    ],
+    "resolve_customer_phone": [
+        "SELECT customers",  # filter hit; unknown numbers run nothing (see test)
+    ],
+    "phone_resolver_stats": [],
+    "retrieve_customer": [
+        "SELECT customers",
+    ],
+    "update_customer": [
+        "SELECT customers",
+        "SAVEPOINT",
+        "UPDATE customers",
+        "RELEASE SAVEPOINT",
+    ],
+    "search": [
+        "SELECT orders_fts",  # ranked FTS5 match (pg_trgm on PostgreSQL)
+        "SELECT orders",  # the matched rows with customer and vendor
+    ],
+    "vendor-email-signup": [
+        "SAVEPOINT",
+        "SAVEPOINT",
+        "INSERT users",
+        "RELEASE SAVEPOINT",
+        "INSERT users_otp",
+        "DELETE users_sessiontoken",
+        "INSERT users_sessiontoken",
+        "INSERT email_outbox",
+        "RELEASE SAVEPOINT",
+    ],
+    "verify-otp": [
+        "SELECT users_sessiontoken",  # joined with users
+        "SELECT users_otp",
+        "SAVEPOINT",
+        "DELETE users_otp",
+        "UPDATE users_sessiontoken",
+        "UPDATE users",  # activation is a claim change: bumps auth_version in the same UPDATE
+        "SELECT users",  # the new auth_version, for the tokens issued
+        "RELEASE SAVEPOINT",
+    ],
+    "resend-otp": [
+        "SELECT users_sessiontoken",  # joined with users
+        "SAVEPOINT",
+        "DELETE users_sessiontoken",
+        "INSERT users_sessiontoken",
+        "INSERT users_otp",
+        "INSERT email_outbox",
+        "RELEASE SAVEPOINT",
+    ],
+    # The async views run the same serializer code as their sync counterparts
+    "vendor-email-signup-async": [
+        "SAVEPOINT",
+        "SAVEPOINT",
+        "INSERT users",
+        "RELEASE SAVEPOINT",
+        "INSERT users_otp",
+        "DELETE users_sessiontoken",
+        "INSERT users_sessiontoken",
+        "INSERT email_outbox",
+        "RELEASE SAVEPOINT",
+    ],
+    "verify-otp-async": [
+        "SELECT users_sessiontoken",
+        "SELECT users_otp",
+        "SAVEPOINT",
+        "DELETE users_otp",
+        "UPDATE users_sessiontoken",
+        "UPDATE users",
+        "SELECT users",
+        "RELEASE SAVEPOINT",
+    ],
+    "vendors-nearby": [
+        "SELECT vendors",  # range scans of the partial geocell index
+    ],
+    # Presence lives in the cache; token checks read the auth version (cold cache)
+    "vendor-presence": [],
+    "vendor-heartbeat": [
+        "SELECT users",
+    ],
+    "vendor-offline": [
+        "SELECT users",
+    ],
+    "menu-search": [
+        "SELECT menu_items_fts",  # ranked, filtered FTS5 match (pg_trgm on PostgreSQL)
+        "SELECT menu_items",  # the matched items with their vendors
+    ],
+    "vendor-menu": [
+        "SELECT vendors",  # only on a miss; hits are served from the cache
+        "SELECT menu_items",
+    ],
+    "vendor-menu-changes": [
+        "SELECT vendors",
+        "SELECT menu_items",  # keyset pages on (vendor, change_seq)
+        "SELECT menu_item_tombstones",
+    ],
+    "vendor-complete-profile": [
+        "SELECT users",  # CachedUserJWTAuthentication, cold cache
+        "SAVEPOINT",
+        "SAVEPOINT",
+        "UPDATE users",
+        "RELEASE SAVEPOINT",
+        "UPDATE core_id_sequence",  # vendor_id reserved up front
+        "INSERT vendors",
+        "INSERT email_outbox",
+        "RELEASE SAVEPOINT",
+    ],
+}
+
+
+class QueryBudgetTests(TestCase):
+    """Runs every api.v1 endpoint with a representative payload and checks its query budget."""
+
+    report = QueryBudgetReport()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        sys.stderr.write("\n" + cls.report.render() + "\n")
+        cls.report.write()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assertQueryBudget(self, name, method, url, data=None, expected_status=200, format="json"):
+        response, sql = capture_queries(
+            getattr(self.client, method), url, data, format=format
+        )
+        return self.checkQueryBudget(name, response, sql, expected_status)
+
+    def checkQueryBudget(self, name, response, sql, expected_status=200):
+        self.assertEqual(
+            response.status_code, expected_status, "" if response.streaming else response.content
+        )
+
+        entry = self.report.record(name, QUERY_BUDGETS[name], sql)
+        self.assertEqual(
+            entry["actual"],
+            entry["expected"],
+            f"{name}: query budget {entry['status']}\n" + "\n".join(sql),
+        )
+        return response
+
+    def create_pending_vendor(self, email="vendor@example.com"):
+        user = User.objects.create_user(email=email, password="s3cret-pass", user_type="vendor")
+        otp, raw_code = OTP.objects.create_otp(user, purpose="email_verification")
+        session_token = SessionToken.objects.create_token(user=user, purpose="email_verification")
+        return user, session_token, raw_code
+
+    def test_every_endpoint_has_a_budget(self):
+        self.assertEqual(api_v1_url_names() - set(QUERY_BUDGETS), set())
+
+    def test_create_customer(self):
+        self.assertQueryBudget(
+            "create_customer",
+            "post",
+            reverse("create_customer"),
+            {"phone_number": "+2348012345678", "location": "Yaba", "delivery_address": "12 Herbert Macaulay Way"},
+            expected_status=201,
+        )
+
+    def test_list_customers(self):
+        for i in range(3):
+            Customer.objects.create(phone_number=f"+23480123456{i}{i}")
+        self.client.force_authenticate(User(email="staff@example.com", is_staff=True))
+        first = self.assertQueryBudget(
+            "list_customers", "get", reverse("list_customers"), {"page_size": 2}
+        ).json()["data"]
+
+        # Following the cursor costs the same single SELECT
+        second = self.assertQueryBudget(
+            "list_customers",
+            "get",
+            reverse("list_customers"),
+            {"page_size": 2, "cursor": first["next_cursor"]},
+        ).json()["data"]
+
+        seen = [c["customer_id"] for c in first["results"] + second["results"]]
+        self.assertEqual(seen, list(Customer.objects.values_list("customer_id", flat=True)))
+        self.assertIsNone(second["next"])
+
+    def test_export_customers(self):
+        for i in range(3):
+            Customer.objects.create(phone_number=f"+23480123456{i}{i}")
+        self.client.force_authenticate(User(email="staff@example.com", is_staff=True))
+
+        def download():
+            response = self.client.get(reverse("export_customers"), {"file_format": "jsonl"})
+            response.body = b"".join(response.streaming_content)
+            return response
+
+        response, sql = capture_queries(download)
+        self.checkQueryBudget("export_customers", response, sql)
+        self.assertEqual(len(response.body.splitlines()), 3)
+
+    def test_import_customers(self):
+        Customer.objects.create(phone_number="+2348011111111")
+        upload = SimpleUploadedFile(
+            "customers.csv",
+            b"phone_number,location,delivery_address\n"
+            b"+2348011111111,Yaba,1 Old Street\n"
+            b"+2348022222222,Ikeja,2 Allen Avenue\n"
+            b"08033333333,Lekki,3 Admiralty Way\n"
+            b"+2348044444444,Surulere,4 Bode Thomas\n"
+            b"+2348044444444,Surulere,4 Bode Thomas\n",
+        )
+        self.client.force_authenticate(User(email="staff@example.com", is_staff=True))
+        data = self.assertQueryBudget(
+            "import_customers", "post", reverse("import_customers"), {"file": upload}, format="multipart"
+        ).json()["data"]
+
+        self.assertEqual(data["created"], 2)
+        self.assertEqual([error["row"] for error in data["errors"]], [2, 4, 6])
+        self.assertRegex(Customer.objects.get(phone_number="+2348022222222").customer_id, r"^CUST-\d{8}$")
+
+    def test_import_customers_unreadable_file(self):
+        upload = SimpleUploadedFile(
+            "customers.csv",
+            "phone_number,location\n+2348022222222,Yaba\n+2348033333333,Ik\u00e9ja\n".encode("latin-1"),
+        )
+        self.client.force_authenticate(User(email="staff@example.com", is_staff=True))
+        response = self.client.post(reverse("import_customers"), {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["row"], 3)
+        self.assertFalse(Customer.objects.exists())
+
+    def test_resolve_customer_phone(self):
+        customer = Customer.objects.create(phone_number="+2348012345678")
+        resolver = get_phone_resolver()
+        resolver.rebuild()
+        self.client.force_authenticate(User(email="staff@example.com", is_staff=True))
+        url = reverse("resolve_customer_phone")
+
+        data = self.assertQueryBudget("resolve_customer_phone", "get", url, {"phone_number": "2348012345678"}).json()
+        self.assertEqual(data["data"]["customer_id"], customer.customer_id)
+
+        # Unknown senders are answered by the bloom filter, and known ones by the LRU
+        for phone_number in ("+2348099999999", "+2348012345678"):
+            response, sql = capture_queries(self.client.get, url, {"phone_number": phone_number})
+            self.assertEqual(sql, [], phone_number)
+        self.assertEqual(response.status_code, 200)
+
+    def test_phone_resolver_stats(self):
+        self.client.force_authenticate(User(email="staff@example.com", is_staff=True))
+        data = self.assertQueryBudget("phone_resolver_stats", "get", reverse("phone_resolver_stats")).json()
+        self.assertIn("false_positive_rate", data["data"])
+
+    def test_retrieve_customer(self):
+        customer = Customer.objects.create(phone_number="+2348012345678")
+        self.assertQueryBudget(
+            "retrieve_customer", "get", reverse("retrieve_customer", args=[customer.customer_id])
+        )
+
+    def test_retrieve_customer_not_modified(self):
+        customer = Customer.objects.create(phone_number="+2348012345678")
+        url = reverse("retrieve_customer", args=[customer.customer_id])
+        etag = self.client.get(url)["ETag"]
+
+        # Revalidation is answered from updated_at alone, before the full SELECT
+        response, sql = capture_queries(self.client.get, url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual([query_shape(query) for query in sql], ["SELECT customers"])
+        self.assertNotIn("delivery_address", sql[0])
+
+        customer.location = "Surulere"
+        customer.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_update_customer(self):
+        customer = Customer.objects.create(phone_number="+2348012345678")
+        self.assertQueryBudget(
+            "update_customer",
+            "put",
+            reverse("update_customer", args=[customer.customer_id]),
+            {"location": "Surulere"},
+        )
+
+    def test_search(self):
+        user, session_token, raw_code = self.create_pending_vendor()
+        vendor = Vendor.objects.create(user=user, business_name="Mama Put")
+        customer = Customer.objects.create(phone_number="+2348012345678")
+        order = Order.objects.create(
+            customer=customer, vendor=vendor, total=1500, delivery_address="12 Herbert Macaulay Way, Yaba"
+        )
+        Order.objects.create(customer=customer, vendor=vendor, total=900, delivery_address="3 Allen Avenue, Ikeja")
+        self.client.force_authenticate(User(email="staff@example.com", is_staff=True))
+
+        data = self.assertQueryBudget("search", "get", reverse("search"), {"q": "herbert macaulay"}).json()["data"]
+        self.assertEqual([result["order_id"] for result in data], [str(order.id)])
+
+        # Identifiers are exact index lookups
+        data = self.client.get(reverse("search"), {"q": "+234 801 234 5678", "type": "customers"}).json()["data"]
+        self.assertEqual([result["customer_id"] for result in data], [customer.customer_id])
+
+    def test_vendor_email_signup(self):
+        self.assertQueryBudget(
+            "vendor-email-signup",
+            "post",
+            reverse("vendor-email-signup"),
+            {"email": "vendor@example.com", "password": "s3cret-pass"},
+            expected_status=201,
+        )
+
+    def test_verify_otp(self):
+        user, session_token, raw_code = self.create_pending_vendor()
+        self.assertQueryBudget(
+            "verify-otp",
+            "post",
+            reverse("verify-otp"),
+            {"session_token": str(session_token.token), "otp": raw_code},
+        )
+
+    def test_vendor_email_signup_async(self):
+        self.assertQueryBudget(
+            "vendor-email-signup-async",
+            "post",
+            reverse("vendor-email-signup-async"),
+            {"email": "vendor@example.com", "password": "s3cret-pass"},
+            expected_status=201,
+        )
+
+    def test_verify_otp_async(self):
+        user, session_token, raw_code = self.create_pending_vendor()
+        self.assertQueryBudget(
+            "verify-otp-async",
+            "post",
+            reverse("verify-otp-async"),
+            {"session_token": str(session_token.token), "otp": raw_code},
+        )
+
+    def test_resend_otp(self):
+        user, session_token, raw_code = self.create_pending_vendor()
+        self.assertQueryBudget(
+            "resend-otp",
+            "post",
+            reverse("resend-otp"),
+            {"session_token": str(session_token.token)},
+        )
+
+    def test_vendors_nearby(self):
+        # Yaba, Lagos; ~1 km, ~3 km and ~12 km away, plus a closed vendor next door
+        spots = [
+            ("Close", 6.5158, 3.3812, True, "3.0"),
+            ("Top rated", 6.5339, 3.3812, True, "5.0"),
+            ("Too far", 6.6000, 3.3000, True, "5.0"),
+            ("Closed", 6.5090, 3.3790, False, "5.0"),
+        ]
+        for i, (name, lat, lng, online, rating) in enumerate(spots):
+            user = User.objects.create_user(email=f"vendor{i}@example.com", password="!", user_type="vendor")
+            vendor = Vendor.objects.create(
+                user=user, business_name=name, latitude=lat, longitude=lng,
+                online=online, verified=True, rating=rating,
+            )
+            presence.heartbeat(vendor.vendor_id)
+
+        data = self.assertQueryBudget(
+            "vendors-nearby", "get", reverse("vendors-nearby"), {"lat": 6.5069, "lng": 3.3782, "radius_km": 5}
+        ).json()["data"]
+        self.assertEqual([vendor["business_name"] for vendor in data], ["Close", "Top rated"])
+
+    def test_vendor_presence(self):
+        presence.heartbeat("VEND_00000001")
+        data = self.assertQueryBudget(
+            "vendor-presence", "get", reverse("vendor-presence"), {"vendor_ids": "VEND_00000001,VEND_00000002"}
+        ).json()["data"]
+        self.assertEqual(data["online"], ["VEND_00000001"])
+
+    def test_vendor_heartbeat(self):
+        user, session_token, raw_code = self.create_pending_vendor()
+        access = ClaimsRefreshToken.for_user(user, vendor_id="VEND_00000001").access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertQueryBudget("vendor-heartbeat", "post", reverse("vendor-heartbeat"))
+        self.assertTrue(presence.is_online("VEND_00000001"))
+
+    def test_vendor_offline(self):
+        user, session_token, raw_code = self.create_pending_vendor()
+        access = ClaimsRefreshToken.for_user(user, vendor_id="VEND_00000001").access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        presence.heartbeat("VEND_00000001")
+        self.assertQueryBudget("vendor-offline", "post", reverse("vendor-offline"))
+        self.assertFalse(presence.is_online("VEND_00000001"))
+
+    def test_menu_search(self):
+        users = [
+            User.objects.create_user(email=f"vendor{i}@example.com", password="!", user_type="vendor")
+            for i in range(2)
+        ]
+        open_vendor = Vendor.objects.create(user=users[0], business_name="Mama Put", online=True)
+        closed_vendor = Vendor.objects.create(user=users[1], business_name="Iya Basira")
+        MenuItem.objects.create(vendor=closed_vendor, name="Jollof rice", category="Rice", price=2500)
+        MenuItem.objects.create(vendor=open_vendor, name="Party jollof rice", category="Rice", price=3000)
+        MenuItem.objects.create(vendor=open_vendor, name="Jollof spaghetti", category="Pasta", price=2000)
+        MenuItem.objects.create(vendor=open_vendor, name="Fried rice", category="Rice", price=9000)
+        # The vocabulary is loaded once per process, not per search: load it from this test's items
+        menu_search.rebuild_typo_index()
+
+        response = self.assertQueryBudget(
+            "menu-search", "get", reverse("menu-search"), {"q": "jollof rice", "category": "rice", "max_price": 5000}
+        )
+        self.assertIn("Accept", response["Vary"])
+        data = response.json()["data"]
+        # Both match; the online vendor's ranks first
+        self.assertEqual([item["name"] for item in data], ["Party jollof rice", "Jollof rice"])
+
+        # Misspelt words are corrected against the indexed vocabulary
+        data = self.client.get(reverse("menu-search"), {"q": "jollof spagetti"}).json()["data"]
+        self.assertEqual(data[0]["name"], "Jollof spaghetti")
+
+    def test_vendor_menu(self):
+        user, session_token, raw_code = self.create_pending_vendor()
+        vendor = Vendor.objects.create(user=user, business_name="Mama Put")
+        jollof = MenuItem.objects.create(vendor=vendor, name="Jollof rice", category="Rice", price=2500)
+        MenuItem.objects.create(vendor=vendor, name="Dodo", category="Sides", price=800)
+        url = reverse("vendor-menu", args=[vendor.vendor_id])
+
+        response = self.assertQueryBudget("vendor-menu", "get", url)
+        self.assertEqual([item["name"] for item in response.json()["data"]["items"]], ["Jollof rice", "Dodo"])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            jollof.price = 2700
+            jollof.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["data"]["items"][0]["price"], "2700.00")
+
+    def test_unknown_vendor_menu(self):
+        url = reverse("vendor-menu", args=["VEN-MISSING"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # The 404 is remembered briefly, and no menu version is started for it
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertIsNone(cache.get(menu_cache.version_key("VEN-MISSING")))
+
+        user, session_token, raw_code = self.create_pending_vendor()
+        with self.captureOnCommitCallbacks(execute=True):
+            Vendor.objects.create(user=user, business_name="Mama Put", vendor_id="VEN-MISSING")
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_vendor_menu_changes(self):
+        user, session_token, raw_code = self.create_pending_vendor()
+        vendor = Vendor.objects.create(user=user, business_name="Mama Put")
+        jollof, dodo, moi_moi = (
+            MenuItem.objects.create(vendor=vendor, name=name, price=1000) for name in ("Jollof", "Dodo", "Moi moi")
+        )
+        dodo_id = dodo.id
+        dodo.delete()
+        jollof.price = 1200
+        jollof.save()
+        url = reverse("vendor-menu-changes", args=[vendor.vendor_id])
+
+        response = self.assertQueryBudget("vendor-menu-changes", "get", url, {"since": 0, "limit": 2})
+        self.assertIn("Accept", response["Vary"])
+        data = response.json()["data"]
+        self.assertEqual(
+            [(change["seq"], change["op"]) for change in data["changes"]], [(3, "upsert"), (4, "delete")]
+        )
+        self.assertEqual(data["changes"][1]["id"], str(dodo_id))
+        self.assertTrue(data["has_more"])
+
+        data = self.client.get(url, {"since": data["next_since"], "limit": 2}).json()["data"]
+        self.assertEqual([change["item"]["price"] for change in data["changes"]], ["1200.00"])
+        self.assertEqual((data["next_since"], data["has_more"], data["menu_seq"]), (5, False, 5))
+
+    def test_vendor_complete_profile(self):
+        user, session_token, raw_code = self.create_pending_vendor()
+        access = ClaimsRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertQueryBudget(
+            "vendor-complete-profile",
+            "post",
+            reverse("vendor-complete-profile"),
+            {"phone_number": "+2348012345678", "business_name": "Mama Put"},
+        )
+
+
+class ThrottledView(APIView):
+    permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "signup"
+
+    def post(self, request):
+        return Response({"status": "success"})
+
+
+@override_settings(SLIDING_WINDOW_THROTTLE_RATES={"signup": {"ip": "2/m"}, "resend": {"ip": "2/m"}})
+class SlidingWindowThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # The cache expires entries by the same clock, so both move together
+        clock = patch("api.throttling.time.time")
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+        quiet = patch("api.throttling.logger")
+        quiet.start()
+        self.addCleanup(quiet.stop)
+
+    def post(self, at, scope="signup", **extra):
+        self.clock.return_value = at
+        view = ThrottledView.as_view(throttle_scope=scope)
+        return view(APIRequestFactory().post("/", {}, format="json", **extra))
+
+    def test_window_rolls_over(self):
+        self.assertEqual([self.post(600).status_code for _ in range(3)], [200, 200, 429])
+        # Half way into the next window the previous one still counts for half: 1 + 1
+        self.assertEqual(self.post(690).status_code, 200)
+        self.assertEqual(self.post(690).status_code, 429)
+        # Two windows later nothing is left of it
+        self.assertEqual(self.post(780).status_code, 200)
+
+    def test_retry_after_is_the_rest_of_the_window(self):
+        self.post(600)
+        self.post(600)
+        response = self.post(615)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "45")
+
+    def test_scopes_count_separately(self):
+        self.post(600)
+        self.post(600)
+        self.assertEqual(self.post(600).status_code, 429)
+        self.assertEqual(self.post(600, scope="resend").status_code, 200)
+        self.assertEqual(get_rejection_counts(), {"signup:ip": 1, "resend:ip": 0})
+
+    def test_rotating_forwarded_for_does_not_reset_the_limit(self):
+        def statuses(forwarded):
+            return [
+                self.post(600, HTTP_X_FORWARDED_FOR=forwarded.format(i), REMOTE_ADDR="10.0.0.1").status_code
+                for i in range(3)
+            ]
+
+        # No trusted proxies: the header is ignored
+        self.assertEqual(statuses("198.51.100.{}"), [200, 200, 429])
+        # One proxy: only the address it appended counts
+        cache.clear()
+        with override_settings(REST_FRAMEWORK={"NUM_PROXIES": 1}):
+            self.assertEqual(statuses("198.51.100.{}, 203.0.113.7"), [200, 200, 429])
+            self.assertEqual(self.post(600, HTTP_X_FORWARDED_FOR="203.0.113.8").status_code, 200)
+
+
+@override_settings(SLIDING_WINDOW_THROTTLE_RATES={"token_obtain": {"email": "2/h"}})
+class TokenThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sync_and_async_login_share_the_limit(self):
+        credentials = {"email": "vendor@example.com", "password": "wrong-pass"}
+        names = ("token_obtain_pair", "token_obtain_pair_async") * 2
+        with self.assertLogs("api.throttling", "WARNING"):
+            statuses = [
+                self.client.post(reverse(name), credentials, content_type="application/json").status_code
+                for name in names
+            ]
+        self.assertEqual(statuses, [401, 401, 429, 429])
@@ -0,0 +1,163 @@
+"""
+Sliding-window rate limiting for the unauthenticated OTP endpoints.
+
+A view opts in with:
+
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "vendor_signup"
+
+and settings.SLIDING_WINDOW_THROTTLE_RATES maps the scope to a rate per
+identifier, e.g. {"vendor_signup": {"ip": "20/h", "email": "5/h"}}.
+
+Each identifier keeps one counter per fixed window; the sliding count is the
+current window plus the previous one weighted by how much of it still
+overlaps. On Redis every counter of a request is read and bumped in one
+pipelined round trip. DRF checks throttles before the handler runs, so a
+rejected request never reaches password/OTP hashing or the database.
+
+The client IP is taken from X-Forwarded-For only as far as
+REST_FRAMEWORK["NUM_PROXIES"] allows; with NUM_PROXIES unset the header is
+ignored, since a client can put anything in it.
+"""
+
+import hashlib
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+_RATE = re.compile(r"^(\d+)/(\d*)([smhd])")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """'5/h' -> (5, 3600); '5/15m' -> (5, 900)."""
+    match = _RATE.match(rate)
+    if not match:
+        raise ValueError(f"Invalid throttle rate: {rate!r}")
+    num, multiplier, unit = match.groups()
+    return int(num), int(multiplier or 1) * _UNITS[unit]
+
+
+def rejection_counter_key(scope, identifier):
+    return f"throttle:rejected:{scope}:{identifier}"
+
+
+def get_rejection_counts():
+    """Rejected requests per "<scope>:<identifier>" since the counters were last cleared."""
+    keys = {
+        f"{scope}:{identifier}": rejection_counter_key(scope, identifier)
+        for scope, rates in settings.SLIDING_WINDOW_THROTTLE_RATES.items()
+        for identifier in rates
+    }
+    counts = caches[DEFAULT_CACHE_ALIAS].get_many(keys.values())
+    return {name: counts.get(key, 0) for name, key in keys.items()}
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Throttle by client IP, submitted email and/or session_token per view scope."""
+
+    @property
+    def cache(self):
+        return caches[DEFAULT_CACHE_ALIAS]
+
+    def get_ident(self, request):
+        # DRF would key on the whole client-supplied header when NUM_PROXIES is unset
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get("REMOTE_ADDR")
+        return super().get_ident(request)
+
+    def get_identifier_value(self, request, identifier):
+        if identifier == "ip":
+            return self.get_ident(request)
+        data = getattr(request, "data", None) or {}
+        value = data.get(identifier) if hasattr(data, "get") else None
+        return str(value).strip().lower() if value else None
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = getattr(view, "throttle_scope", None)
+        rates = settings.SLIDING_WINDOW_THROTTLE_RATES.get(scope)
+        if not rates:
+            return True
+
+        now = time.time()
+        checks = []
+        for identifier, rate in rates.items():
+            value = self.get_identifier_value(request, identifier)
+            if not value:
+                continue
+            limit, window = parse_rate(rate)
+            digest = hashlib.sha256(value.encode()).hexdigest()[:32]  # no raw emails in keys
+            window_index = int(now // window)
+            checks.append(
+                {
+                    "identifier": identifier,
+                    "limit": limit,
+                    "window": window,
+                    "current_key": f"throttle:{scope}:{identifier}:{digest}:{window_index}",
+                    "previous_key": f"throttle:{scope}:{identifier}:{digest}:{window_index - 1}",
+                    "overlap": 1 - (now % window) / window,
+                }
+            )
+
+        if not checks:
+            return True
+
+        for check, (current, previous) in zip(checks, self.count(checks)):
+            estimated = current + min(previous, check["limit"]) * check["overlap"]
+            if estimated > check["limit"]:
+                self.wait_seconds = check["window"] - (now % check["window"])
+                self.reject(scope, check["identifier"])
+                return False
+        return True
+
+    def count(self, checks):
+        """Bump each current-window counter and return (current, previous) pairs."""
+        if isinstance(self.cache, RedisCache):
+            return self._count_redis(checks)
+        return self._count_generic(checks)
+
+    def _count_redis(self, checks):
+        # One pipelined round trip for every counter of the request
+        cache = self.cache
+        client = cache._cache.get_client(write=True)
+        pipe = client.pipeline(transaction=False)
+        for check in checks:
+            current_key = cache.make_and_validate_key(check["current_key"])
+            pipe.incr(current_key)
+            pipe.expire(current_key, check["window"] * 2)
+            pipe.get(cache.make_and_validate_key(check["previous_key"]))
+        results = pipe.execute()
+        return [
+            (results[i * 3], int(results[i * 3 + 2] or 0))
+            for i in range(len(checks))
+        ]
+
+    def _count_generic(self, checks):
+        cache = self.cache
+        previous = cache.get_many([check["previous_key"] for check in checks])
+        counts = []
+        for check in checks:
+            if cache.add(check["current_key"], 1, timeout=check["window"] * 2):
+                current = 1
+            else:
+                current = cache.incr(check["current_key"])
+            counts.append((current, previous.get(check["previous_key"], 0)))
+        return counts
+
+    def reject(self, scope, identifier):
+        key = rejection_counter_key(scope, identifier)
+        if not self.cache.add(key, 1, timeout=None):
+            self.cache.incr(key)
+        logger.warning(f"Throttled {scope} request by {identifier}")
+
+    def wait(self):
+        return self.wait_seconds
@@ -39,3 +39,13 @@ class CustomerInfoSerializer(serializers.ModelSerializer):
             "delivery_address",
         ]
         read_only_fields = fields
+
+
+class CustomerImportSerializer(serializers.Serializer):
+    file = serializers.FileField(
+        help_text="CSV with a header row, or JSON Lines, with phone_number, location and delivery_address"
+    )
+    format = serializers.ChoiceField(
+        choices=["csv", "jsonl"], required=False, help_text="Defaults to the file extension"
+    )
+    dry_run = serializers.BooleanField(default=False)
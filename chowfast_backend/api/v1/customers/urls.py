@@ -1,9 +1,23 @@
 from django.urls import path
 
-from .views import CreateCustomerView, RetrieveCustomerView, UpdateCustomerView
+from .views import (
+    CreateCustomerView,
+    ExportCustomersView,
+    ImportCustomersView,
+    ListCustomerView,
+    PhoneResolverStatsView,
+    ResolvePhoneView,
+    RetrieveCustomerView,
+    UpdateCustomerView,
+)
 
 urlpatterns = [
+    path("", ListCustomerView.as_view(), name="list_customers"),
     path("register/", CreateCustomerView.as_view(), name="create_customer"),
+    path("import/", ImportCustomersView.as_view(), name="import_customers"),
+    path("export/", ExportCustomersView.as_view(), name="export_customers"),
+    path("resolve/", ResolvePhoneView.as_view(), name="resolve_customer_phone"),
+    path("resolve/stats/", PhoneResolverStatsView.as_view(), name="phone_resolver_stats"),
     path("<str:customer_id>/", RetrieveCustomerView.as_view(), name="retrieve_customer"),
     path("<str:customer_id>/update/", UpdateCustomerView.as_view(), name="update_customer"),
 ]
@@ -1,7 +1,14 @@
+from api.conditional import conditional_get, set_validators
+from api.pagination import KeysetPagination
+from core.exports import CONTENT_TYPES, export_response, get_export
+from customers.importer import CustomerImporter, ImportFileError, detect_format, iter_records
 from customers.models import Customer
+from customers.resolver import get_phone_resolver
+from django.db import IntegrityError, transaction
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -10,7 +17,7 @@ from .response_serializers import (
     DuplicatePhoneErrorSerializer,
     ResponseCustomerInfoSerializer,
 )
-from .serializers import CustomerSerializer
+from .serializers import CustomerImportSerializer, CustomerSerializer
 
 
 class CreateCustomerView(APIView):
@@ -37,15 +44,16 @@ class CreateCustomerView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
-            phone = serializer.validated_data.get("phone_number")
-
-            if Customer.objects.filter(phone_number=phone).exists():
+            # The unique constraint on phone_number is the duplicate check
+            try:
+                with transaction.atomic():
+                    customer = serializer.save()
+            except IntegrityError:
                 return Response(
                     {"error": "A customer with this phone number already exists."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            customer = serializer.save()
             data = self.serializer_class(customer).data
             return Response(
                 {
@@ -61,7 +69,7 @@ class CreateCustomerView(APIView):
 
 class RetrieveCustomerView(APIView):
     """
-    Retrieve a specific customer or all customers.
+    Retrieve a specific customer.
     """
     permission_classes = [AllowAny]
     serializer_class = CustomerSerializer
@@ -78,27 +86,48 @@ class RetrieveCustomerView(APIView):
             # drf-yasg will often generate a useful generic 400 response automatically.
         },
     )
-    def get(self, request, customer_id=None, *args, **kwargs):
-        if customer_id:
-            try:
-                customer = Customer.objects.get(customer_id=customer_id)
-            except Customer.DoesNotExist:
-                return Response(
-                    {"error": "Customer not found."},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
+    @conditional_get(
+        lambda request, customer_id, *args, **kwargs: Customer.objects.filter(customer_id=customer_id)
+        .values_list("customer_id", "updated_at")
+        .first()
+    )
+    def get(self, request, customer_id, *args, **kwargs):
+        try:
+            customer = Customer.objects.get(customer_id=customer_id)
+        except Customer.DoesNotExist:
+            return Response(
+                {"error": "Customer not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-            serializer = self.serializer_class(customer)
-            return Response(serializer.data)
+        serializer = self.serializer_class(customer)
+        return set_validators(Response(serializer.data), customer.customer_id, customer.updated_at)
 
-        customers = Customer.objects.all()
-        serializer = self.serializer_class(customers, many=True)
-        data = serializer.data
+
+class ListCustomerView(APIView):
+    """
+    List customers, newest first, one keyset page at a time.
+    Follow `next` (or pass `next_cursor` as ?cursor=) for the following page.
+    """
+
+    serializer_class = CustomerSerializer
+    pagination_class = KeysetPagination
+    http_method_names = ["get"]
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Customers"],
+        operation_summary="List customers (cursor paginated)",
+    )
+    def get(self, request, *args, **kwargs):
+        paginator = self.pagination_class()
+        customers = paginator.paginate_queryset(Customer.objects.all(), request, view=self)
+        data = self.serializer_class(customers, many=True).data
         return Response(
             {
                 "status": "success",
-                "message": "Customer retrieved successfully.",
-                "data": data,
+                "message": "Customers retrieved successfully.",
+                "data": paginator.get_paginated_data(data),
             },
             status=status.HTTP_200_OK,
         )
@@ -133,7 +162,14 @@ class UpdateCustomerView(APIView):
 
         serializer = self.serializer_class(customer, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError:
+                return Response(
+                    {"error": "A customer with this phone number already exists."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             data = serializer.data
             return Response(
                 {
@@ -145,3 +181,136 @@ class UpdateCustomerView(APIView):
             )
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ExportCustomersView(APIView):
+    """
+    Stream every customer as CSV or JSON Lines (?file_format=jsonl).
+    Rows are written as they are read, so memory use does not grow with the table.
+    """
+
+    http_method_names = ["get"]
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Customers"],
+        operation_summary="Export customers (streaming CSV / JSON Lines)",
+    )
+    def get(self, request, *args, **kwargs):
+        fmt = request.query_params.get("file_format", "csv")
+        if fmt not in CONTENT_TYPES:
+            return Response(
+                {"error": f"file_format must be one of: {', '.join(CONTENT_TYPES)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return export_response(get_export("customers"), fmt=fmt, request=request)
+
+
+class ImportCustomersView(APIView):
+    """
+    Bulk import customers from an uploaded CSV or JSONL file.
+    Rejected rows are reported individually in `errors`; a file that cannot be
+    read (not UTF-8, broken CSV) is a 400 naming the row, and imports nothing.
+    """
+
+    serializer_class = CustomerImportSerializer
+    parser_classes = [MultiPartParser]
+    http_method_names = ["post"]
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Customers"],
+        operation_summary="Bulk import customers",
+        request_body=CustomerImportSerializer,
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = serializer.validated_data["file"]
+        fmt = serializer.validated_data.get("format") or detect_format(upload.name)
+        importer = CustomerImporter(dry_run=serializer.validated_data["dry_run"])
+        try:
+            with transaction.atomic():
+                result = importer.run(iter_records(upload.file, fmt))
+        except ImportFileError as e:
+            return Response({"error": str(e), "row": e.row}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "status": "success",
+                "message": f"{result.created} customers imported.",
+                "data": {
+                    "created": result.created,
+                    "duplicates": result.duplicates,
+                    "rejected": len(result.errors),
+                    "errors": [
+                        {"row": row, "phone_number": phone_number, "error": error}
+                        for row, phone_number, error in result.errors
+                    ],
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ResolvePhoneView(APIView):
+    """
+    Resolve an inbound WhatsApp sender's number to a customer_id.
+    Unknown numbers are answered from the resolver's bloom filter without a query.
+    """
+
+    http_method_names = ["get"]
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Customers"],
+        operation_summary="Resolve a phone number to a customer",
+    )
+    def get(self, request, *args, **kwargs):
+        phone_number = request.query_params.get("phone_number")
+        if not phone_number:
+            return Response(
+                {"error": "phone_number is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        customer_id = get_phone_resolver().resolve(phone_number)
+        if customer_id is None:
+            return Response(
+                {"error": "Customer not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return Response(
+            {
+                "status": "success",
+                "message": "Customer resolved successfully.",
+                "data": {"customer_id": customer_id},
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class PhoneResolverStatsView(APIView):
+    """
+    Hit, no-query and false-positive rates of this worker's phone resolver.
+    """
+
+    http_method_names = ["get"]
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Customers"],
+        operation_summary="Phone resolver metrics",
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(
+            {
+                "status": "success",
+                "message": "Phone resolver metrics retrieved successfully.",
+                "data": get_phone_resolver().stats(),
+            },
+            status=status.HTTP_200_OK,
+        )
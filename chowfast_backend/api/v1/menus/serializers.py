@@ -0,0 +1,58 @@
+from menus.models import MenuItem
+from rest_framework import serializers
+
+
+class MenuItemSerializer(serializers.ModelSerializer):
+    image_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MenuItem
+        fields = [
+            "id",
+            "name",
+            "description",
+            "category",
+            "price",
+            "available",
+            "image_url",
+        ]
+
+    def get_image_url(self, obj):
+        # The resized copy this client asked for (menus.image_variants.ClientImage), if any
+        client_image = self.context.get("client_image")
+        if client_image is None:
+            return obj.image_url
+        return obj.image_url_for(client_image.width, client_image.webp)
+
+
+class MenuChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(required=False, default=0, min_value=0)
+    limit = serializers.IntegerField(required=False, default=100, min_value=1, max_value=500)
+
+
+class MenuSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100)
+    category = serializers.CharField(required=False, max_length=50)
+    min_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0)
+    max_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0)
+    available = serializers.BooleanField(required=False, allow_null=True, default=None)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=50)
+
+    def validate(self, attrs):
+        if attrs.get("min_price") is not None and attrs.get("max_price") is not None:
+            if attrs["min_price"] > attrs["max_price"]:
+                raise serializers.ValidationError("min_price cannot be greater than max_price.")
+        return attrs
+
+
+class MenuSearchResultSerializer(MenuItemSerializer):
+    vendor_id = serializers.CharField(source="vendor.vendor_id")
+    business_name = serializers.CharField(source="vendor.business_name")
+    vendor_online = serializers.BooleanField(source="vendor.online")
+    rank = serializers.SerializerMethodField()
+
+    class Meta(MenuItemSerializer.Meta):
+        fields = MenuItemSerializer.Meta.fields + ["vendor_id", "business_name", "vendor_online", "rank"]
+
+    def get_rank(self, obj):
+        return round(obj.search_rank, 4)
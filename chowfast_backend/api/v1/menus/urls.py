@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import MenuSearchView, VendorMenuChangesView, VendorMenuView
+
+urlpatterns = [
+    path("search/", MenuSearchView.as_view(), name="menu-search"),
+    path("<str:vendor_id>/", VendorMenuView.as_view(), name="vendor-menu"),
+    path("<str:vendor_id>/changes/", VendorMenuChangesView.as_view(), name="vendor-menu-changes"),
+]
@@ -0,0 +1,209 @@
+from api.conditional import REPRESENTATION_VERSION
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from menus.image_variants import ClientImage
+from menus.menu_cache import get_menu
+from menus.models import MenuItem, MenuItemTombstone
+from menus.search import MenuFilters, search_menu
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from vendors.models import Vendor
+
+from .serializers import (
+    MenuChangesQuerySerializer,
+    MenuItemSerializer,
+    MenuSearchQuerySerializer,
+    MenuSearchResultSerializer,
+)
+
+# Where delta sync picks up from: the vendor's last menu change sequence number
+MENU_SEQ = Coalesce("menu_sequence__last_seq", 0)
+
+IMAGE_WIDTH_PARAMETER = openapi.Parameter(
+    "image_width",
+    openapi.IN_QUERY,
+    description="Width in pixels the client displays images at: image_url is then the smallest resized copy "
+    "at least that wide (WebP if the Accept header lists image/webp). Omit for the original.",
+    type=openapi.TYPE_INTEGER,
+)
+
+
+class VendorMenuView(APIView):
+    """
+    A vendor's full menu, served as JSON bytes rendered once per menu version
+    (and image variant). The database (and Cloudinary URL building) is only
+    touched when the menu changed since it was last rendered.
+    """
+
+    permission_classes = [AllowAny]
+    http_method_names = ["get"]
+    serializer_class = MenuItemSerializer
+
+    @swagger_auto_schema(
+        tags=["Menus"],
+        operation_summary="Get a vendor's menu",
+        manual_parameters=[IMAGE_WIDTH_PARAMETER],
+        responses={status.HTTP_200_OK: MenuItemSerializer(many=True)},
+    )
+    def get(self, request, vendor_id):
+        client_image = ClientImage.from_request(request)
+        version, body = get_menu(
+            vendor_id, lambda: self.render_menu(vendor_id, client_image), variant=client_image.key
+        )
+        if body is None:
+            return Response({"error": "Vendor not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if version is None:
+            # Served but not tied to a version yet: nothing to revalidate against
+            response = HttpResponse(body, content_type="application/json")
+        else:
+            etag = f'W/"{REPRESENTATION_VERSION}-menu-{version}-{client_image.key}"'
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = HttpResponse(body, content_type="application/json")
+            response["ETag"] = etag
+        # Anyone may cache the menu but must revalidate (a cheap 304) before reuse
+        patch_cache_control(response, public=True, no_cache=True)
+        # WebP image URLs only for clients that accept them
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    def render_menu(self, vendor_id, client_image):
+        vendor = (
+            Vendor.objects.filter(vendor_id=vendor_id)
+            .only("vendor_id", "business_name")
+            .annotate(menu_seq=MENU_SEQ)
+            .first()
+        )
+        if vendor is None:
+            return None
+        items = vendor.menu_items.order_by("category", "name", "pk")
+        return JSONRenderer().render(
+            {
+                "status": "success",
+                "message": "Menu retrieved successfully.",
+                "data": {
+                    "vendor_id": vendor.vendor_id,
+                    "business_name": vendor.business_name,
+                    # Where delta sync (menu changes) picks up from
+                    "menu_seq": vendor.menu_seq,
+                    "items": self.serializer_class(items, many=True, context={"client_image": client_image}).data,
+                },
+            }
+        )
+
+
+class VendorMenuChangesView(APIView):
+    """
+    Menu changes after sequence number `since`, oldest first: items added or
+    changed ("upsert", with the item) and items deleted ("delete", id only).
+    Pass the returned next_since back until has_more is false; a client that
+    starts from 0 receives the whole menu.
+    """
+
+    permission_classes = [AllowAny]
+    http_method_names = ["get"]
+    serializer_class = MenuItemSerializer
+
+    @swagger_auto_schema(
+        tags=["Menus"],
+        operation_summary="Get a vendor's menu changes since a sequence number",
+        query_serializer=MenuChangesQuerySerializer,
+        manual_parameters=[IMAGE_WIDTH_PARAMETER],
+    )
+    def get(self, request, vendor_id):
+        query = MenuChangesQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        since, limit = query.validated_data["since"], query.validated_data["limit"]
+
+        vendor = Vendor.objects.filter(vendor_id=vendor_id).values("pk", menu_seq=MENU_SEQ).first()
+        if vendor is None:
+            return Response({"error": "Vendor not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Keyset page over both change streams: one extra row tells whether there is more
+        items = (
+            MenuItem.objects.filter(vendor_id=vendor["pk"], change_seq__gt=since)
+            .order_by("change_seq")[: limit + 1]
+        )
+        tombstones = (
+            MenuItemTombstone.objects.filter(vendor_id=vendor["pk"], change_seq__gt=since)
+            .order_by("change_seq")
+            .values_list("change_seq", "item_id")[: limit + 1]
+        )
+        context = {"client_image": ClientImage.from_request(request)}
+        changes = [
+            {"seq": item.change_seq, "op": "upsert", "item": self.serializer_class(item, context=context).data}
+            for item in items
+        ] + [{"seq": seq, "op": "delete", "id": str(item_id)} for seq, item_id in tombstones]
+        changes.sort(key=lambda change: change["seq"])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        response = Response(
+            {
+                "status": "success",
+                "message": f"{len(changes)} menu changes.",
+                "data": {
+                    "changes": changes,
+                    "next_since": changes[-1]["seq"] if changes else since,
+                    "has_more": has_more,
+                    "menu_seq": vendor["menu_seq"],
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
+        # WebP image URLs only for clients that accept them
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+
+class MenuSearchView(APIView):
+    """
+    Search menu items of all vendors. Ranked by text relevance, boosted for
+    online vendors and available items; filter by category, price and
+    availability. Misspelt words are corrected where the backend needs it.
+    """
+
+    permission_classes = [AllowAny]
+    http_method_names = ["get"]
+    serializer_class = MenuSearchResultSerializer
+
+    @swagger_auto_schema(
+        tags=["Menus"],
+        operation_summary="Search menu items",
+        query_serializer=MenuSearchQuerySerializer,
+        manual_parameters=[IMAGE_WIDTH_PARAMETER],
+    )
+    def get(self, request):
+        query = MenuSearchQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+
+        filters = MenuFilters(
+            category=params.get("category"),
+            min_price=params.get("min_price"),
+            max_price=params.get("max_price"),
+            available=params["available"],
+        )
+        items = search_menu(params["q"], filters, limit=params["limit"])
+        response = Response(
+            {
+                "status": "success",
+                "message": f"{len(items)} results.",
+                "data": self.serializer_class(
+                    items, many=True, context={"client_image": ClientImage.from_request(request)}
+                ).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+        # WebP image URLs only for clients that accept them
+        patch_vary_headers(response, ["Accept"])
+        return response
@@ -0,0 +1,59 @@
+from core.exports import EXPORTS, export_row
+from core.search import DEFAULT_LIMIT, SEARCHES, search
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+MAX_LIMIT = 100
+
+
+class SearchView(APIView):
+    """
+    Search customers, orders or payments.
+    IDs, phone numbers and payment references are exact index lookups;
+    other text is ranked full-text/trigram search.
+    """
+
+    http_method_names = ["get"]
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Search"],
+        operation_summary="Search customers, orders and payments",
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter("type", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(SEARCHES)),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        kind = request.query_params.get("type", "orders")
+        if not query:
+            return Response({"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if kind not in SEARCHES:
+            return Response(
+                {"error": f"type must be one of: {', '.join(SEARCHES)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
+
+        spec = EXPORTS[kind]
+        results = [
+            dict(export_row(spec, obj, children=False), rank=round(obj.search_rank, 4))
+            for obj in search(kind, query, limit=limit)
+        ]
+        return Response(
+            {
+                "status": "success",
+                "message": f"{len(results)} results.",
+                "data": results,
+            },
+            status=status.HTTP_200_OK,
+        )
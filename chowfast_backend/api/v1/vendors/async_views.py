@@ -0,0 +1,150 @@
+"""
+Async counterparts of the vendor signup, OTP verification and login views.
+
+Under uvicorn workers these run on the event loop: Argon2 hashing is handed
+to the bounded pool in users.hashing_pool and database work to sync_to_async,
+so other requests keep being served while a password is hashed.
+They answer with the same payloads as the DRF views.
+"""
+
+import json
+
+from api.throttling import SlidingWindowThrottle
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import serializers as drf_serializers
+from rest_framework import status
+from users.hashing_pool import check_password_async, make_password_async
+from users.tokens import ClaimsTokenObtainPairSerializer
+
+from .serializers import VendorEmailSignupSerializer, VerifyOTPSerializer
+
+User = get_user_model()
+
+
+class AsyncJSONView(View):
+    """Base for the async JSON views: CSRF exempt like DRF views, JSON body, throttling."""
+
+    http_method_names = ["post"]
+    throttle_scope = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def parse_payload(self, request):
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method.lower() not in self.http_method_names:
+            return await self.http_method_not_allowed(request, *args, **kwargs)
+
+        payload = self.parse_payload(request)
+        if payload is None:
+            return JsonResponse({"detail": "JSON parse error."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The throttle reads identifiers from request.data, as on a DRF request
+        request.data = payload
+        throttle = SlidingWindowThrottle()
+        if not await sync_to_async(throttle.allow_request)(request, self):
+            response = JsonResponse({"detail": "Request was throttled."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            if throttle.wait():
+                response["Retry-After"] = str(int(throttle.wait()))
+            return response
+
+        return await self.post(request, payload)
+
+
+class AsyncVendorEmailSignupView(AsyncJSONView):
+    throttle_scope = "vendor_signup"
+
+    async def post(self, request, payload):
+        serializer = VendorEmailSignupSerializer(data=payload)
+        # Field validation only, no database access
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        password_hash = await make_password_async(serializer.validated_data["password"])
+        try:
+            result = await sync_to_async(serializer.create)(
+                serializer.validated_data, password_hash=password_hash
+            )
+        except drf_serializers.ValidationError as e:
+            return JsonResponse(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        return JsonResponse(
+            {
+                "status": "success",
+                "message": "OTP sent to your email. Please verify to continue.",
+                "session_token": result["session_token"],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class AsyncVerifyOTPView(AsyncJSONView):
+    throttle_scope = "verify_otp"
+
+    async def post(self, request, payload):
+        serializer = VerifyOTPSerializer(data=payload)
+
+        def verify():
+            # OTPs use the cheap HMAC hasher, so this stays on the DB thread
+            if not serializer.is_valid():
+                return None
+            return serializer.verify()
+
+        tokens = await sync_to_async(verify)()
+        if tokens is None:
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return JsonResponse(
+            {
+                "status": "success",
+                "message": "Vendor Account activated successfully!",
+                "data": tokens,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class AsyncTokenObtainPairView(AsyncJSONView):
+    """Email/password login issuing the same claims tokens as the sync view."""
+
+    throttle_scope = "token_obtain"
+
+    async def post(self, request, payload):
+        email = payload.get("email")
+        password = payload.get("password")
+        if not email or not password:
+            return JsonResponse(
+                {"detail": "email and password are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user = await User.objects.filter(email=User.objects.normalize_email(email)).afirst()
+        if user is None:
+            # Hash anyway so unknown emails take as long as wrong passwords
+            await make_password_async(password)
+            is_valid = False
+        else:
+            is_valid = await check_password_async(password, user.password) and user.is_active
+
+        if not is_valid:
+            return JsonResponse(
+                {"detail": "No active account found with the given credentials"},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        refresh = await sync_to_async(ClaimsTokenObtainPairSerializer.get_token)(user)
+        return JsonResponse(
+            {"refresh": str(refresh), "access": str(refresh.access_token)},
+            status=status.HTTP_200_OK,
+        )
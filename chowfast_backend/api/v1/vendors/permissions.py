@@ -0,0 +1,10 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsVendor(BasePermission):
+    """The token belongs to a vendor who has completed their profile (has a vendor_id claim)."""
+
+    message = "Only vendors with a completed profile can do this."
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and getattr(request.user, "vendor_id", None))
@@ -65,5 +65,5 @@ class VendorEmailSignUpCompleteResponseSerializer(BaseResponseSerializer):
     )
     data = serializers.DictField(
         read_only=True,
-        help_text="Details of the activated vendor account.",
+        help_text="vendor_id plus a new refresh/access token pair that carries it.",
     )
\ No newline at end of file
@@ -3,10 +3,11 @@ import logging
 from django.contrib.auth import get_user_model
 
 # from django.contrib.auth.password_validation import validate_password
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.settings import api_settings
 from users.models import OTP, SessionToken
+from users.tokens import ClaimsRefreshToken
 from vendors.email_service import send_signup_otp_email, send_vendor_welcome_email
 from vendors.models import Vendor
 
@@ -19,22 +20,31 @@ class VendorEmailSignupSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True, max_length=255)
     password = serializers.CharField(write_only=True, min_length=8, max_length=75, required=True)
 
-    def validate(self, attrs):
-        email = attrs["email"]
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError("This email is already registered.")
-        return attrs
-
     @transaction.atomic
-    def create(self, validated_data):
-        user = User.objects.create(
+    def create(self, validated_data, password_hash=None):
+        """
+        `password_hash` lets async callers hash the password off the event loop
+        (users.hashing_pool) and pass the result in.
+        """
+        user = User(
             email=validated_data["email"],
             user_type="vendor",
             is_active=True,
             is_activated=False,  # Wait for OTP
         )
-        user.set_password(validated_data["password"])
-        user.save()
+        if password_hash:
+            user.password = password_hash
+        else:
+            user.set_password(validated_data["password"])
+
+        # The unique constraint on email is the duplicate check (no extra SELECT)
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["This email is already registered."]}
+            )
 
         # Generate OTP
         otp, raw_code = OTP.objects.create_otp(user, purpose="email_verification")
@@ -45,12 +55,8 @@ class VendorEmailSignupSerializer(serializers.Serializer):
             purpose="email_verification",
         )
 
-        # TODO: Send OTP via email
-        # Send OTP to user email
-        try:
-            send_signup_otp_email(user, raw_code)
-        except Exception as e:
-            logger.error(f"Failed to send OTP email to {user.email}: {str(e)}")
+        # Queue OTP email; it is delivered by the outbox worker after commit
+        send_signup_otp_email(user, raw_code)
 
         # print(f"OTP for {user.email}: {raw_code}")  # For testing purposes only
 
@@ -64,37 +70,39 @@ class CompleteVendorProfileSerializer(serializers.Serializer):
     phone_number = serializers.CharField(max_length=20, validators=[phone_regex])
     business_name = serializers.CharField(max_length=200)
     address = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    latitude = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, min_value=-180, max_value=180)
 
-    def validate_phone_number(self, value):
-        if User.objects.filter(phone_number=value).exists():
-            raise serializers.ValidationError("This phone number is already in use.")
-        return value
+    def validate(self, attrs):
+        if ("latitude" in attrs) != ("longitude" in attrs):
+            raise serializers.ValidationError("Provide both latitude and longitude, or neither.")
+        return attrs
 
     @transaction.atomic
     def save(self):
         request = self.context["request"]
         user = request.user
 
-        # Update user phone
+        # Update user phone; the unique constraint is the duplicate check
         user.phone_number = self.validated_data["phone_number"]
-        user.save()
+        try:
+            with transaction.atomic():
+                user.save(update_fields=["phone_number"])
+        except IntegrityError:
+            raise serializers.ValidationError({"phone_number": ["This phone number is already in use."]})
 
-        # Create Vendor profile
+        # Create Vendor profile, already marked as verified
         vendor = Vendor.objects.create(
             user=user,
             business_name=self.validated_data["business_name"],
             address=self.validated_data.get("address", ""),
+            latitude=self.validated_data.get("latitude"),
+            longitude=self.validated_data.get("longitude"),
+            verified=True,
         )
 
-        # Mark vendor as verified
-        vendor.verified = True
-        vendor.save()
-
-        # Send Onboarding mail
-        try:
-            send_vendor_welcome_email(vendor)
-        except Exception as e:
-            logger.error(f"Failed to send OTP email to {user.email}: {str(e)}")
+        # Queue onboarding mail
+        send_vendor_welcome_email(vendor)
 
         return vendor
 
@@ -107,25 +115,16 @@ class VerifyOTPSerializer(serializers.Serializer):
         token_str = str(attrs["session_token"])
         otp_code = attrs["otp"]
 
-        try:
-            session_token = SessionToken.objects.get(
-                token=token_str,
-                purpose="email_verification",
-                is_used=False
-            )
-        except SessionToken.DoesNotExist:
+        session_token = SessionToken.objects.get_active(token_str, purpose="email_verification")
+        if session_token is None:
             raise serializers.ValidationError("Invalid or expired session token.")
 
         if session_token.is_expired():
             raise serializers.ValidationError("Session token has expired.")
 
         # Get latest OTP for email verification
-        try:
-            otp_obj = OTP.objects.filter(
-                user=session_token.user,
-                purpose="email_verification"
-            ).latest("created_at")
-        except OTP.DoesNotExist:
+        otp_obj = OTP.objects.get_latest(session_token.user, purpose="email_verification")
+        if otp_obj is None:
             raise serializers.ValidationError("No OTP found.")
 
         if otp_obj.is_expired():
@@ -146,16 +145,15 @@ class VerifyOTPSerializer(serializers.Serializer):
         otp_obj = self.validated_data["otp_obj"]
 
         # Mark OTP & session as used
-        otp_obj.delete()  # or mark as used
-        session_token.is_used = True
-        session_token.save()
+        OTP.objects.discard(otp_obj)
+        SessionToken.objects.mark_used(session_token)
 
         # Activate user
         user.is_activated = True
-        user.save()
+        user.save(update_fields=["is_activated"])
 
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        # Generate JWT tokens (no vendor profile exists yet at this point)
+        refresh = ClaimsRefreshToken.for_user(user)
         return {
             "refresh": str(refresh),
             "access": str(refresh.access_token),
@@ -171,13 +169,8 @@ class ResendOTPSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         token_str = str(attrs["session_token"])
-        try:
-            session_token = SessionToken.objects.get(
-                token=token_str,
-                purpose="email_verification",
-                is_used=False
-            )
-        except SessionToken.DoesNotExist:
+        session_token = SessionToken.objects.get_active(token_str, purpose="email_verification")
+        if session_token is None:
             raise serializers.ValidationError("Invalid or expired session token.")
 
         if session_token.is_expired():
@@ -190,11 +183,8 @@ class ResendOTPSerializer(serializers.Serializer):
     @transaction.atomic
     def resend(self):
         user = self.validated_data["user"]
-        session_token = self.validated_data["session_token_obj"]
-
-        # Delte session and create a new one
-        session_token.delete()
 
+        # Create a new session; this also removes the one being replaced
         session_token = SessionToken.objects.create_token(
             user=user,
             purpose="email_verification",
@@ -203,15 +193,40 @@ class ResendOTPSerializer(serializers.Serializer):
         # Generate new OTP
         otp, raw_code = OTP.objects.create_otp(user, purpose="email_verification")
 
-        # Send OTP
-        # Send OTP to user email
-        try:
-            send_signup_otp_email(user, raw_code)
-        except Exception as e:
-            logger.error(f"Failed to send OTP email to {user.email}: {str(e)}")
+        # Queue OTP email to the user
+        send_signup_otp_email(user, raw_code)
 
         print(f"OTP for {user.email}: {raw_code}")  # For testing purposes only
 
         return {
             "session_token": str(session_token.token)
-        }
\ No newline at end of file
+        }
+
+class NearbyVendorsQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(required=False, default=5, min_value=0.1, max_value=25)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=50)
+
+
+class NearbyVendorSerializer(serializers.ModelSerializer):
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Vendor
+        fields = ["vendor_id", "business_name", "address", "rating", "latitude", "longitude", "distance_km"]
+
+    def get_distance_km(self, obj):
+        return round(obj.distance_km, 2)
+
+
+class VendorPresenceQuerySerializer(serializers.Serializer):
+    vendor_ids = serializers.CharField(help_text="Comma-separated vendor IDs (at most 100).")
+
+    def validate_vendor_ids(self, value):
+        vendor_ids = list(dict.fromkeys(part.strip().upper() for part in value.split(",") if part.strip()))
+        if not vendor_ids:
+            raise serializers.ValidationError("Provide at least one vendor ID.")
+        if len(vendor_ids) > 100:
+            raise serializers.ValidationError("At most 100 vendor IDs per request.")
+        return vendor_ids
@@ -1,9 +1,14 @@
 from django.urls import path
 
+from .async_views import AsyncVendorEmailSignupView, AsyncVerifyOTPView
 from .views import (
     CompleteVendorProfileView,
+    NearbyVendorsView,
     ResendOTPView,
     VendorEmailSignupView,
+    VendorHeartbeatView,
+    VendorOfflineView,
+    VendorPresenceView,
     VerifyOTPView,
 )
 
@@ -12,4 +17,11 @@ urlpatterns = [
     path('signup/complete/', CompleteVendorProfileView.as_view(), name='vendor-complete-profile'),
     path('verify-otp/', VerifyOTPView.as_view(), name='verify-otp'),
     path('resend-otp/', ResendOTPView.as_view(), name='resend-otp'),
-]
\ No newline at end of file
+    path('nearby/', NearbyVendorsView.as_view(), name='vendors-nearby'),
+    path('presence/', VendorPresenceView.as_view(), name='vendor-presence'),
+    path('presence/heartbeat/', VendorHeartbeatView.as_view(), name='vendor-heartbeat'),
+    path('presence/offline/', VendorOfflineView.as_view(), name='vendor-offline'),
+    # Async variants for ASGI workers: password hashing runs off the event loop
+    path('signup/async/', AsyncVendorEmailSignupView.as_view(), name='vendor-email-signup-async'),
+    path('verify-otp/async/', AsyncVerifyOTPView.as_view(), name='verify-otp-async'),
+]
@@ -1,9 +1,17 @@
+from api.throttling import SlidingWindowThrottle
+from django.conf import settings
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenObtainPairView
+from users.authentication import CachedUserJWTAuthentication, ClaimsJWTAuthentication
+from users.tokens import ClaimsRefreshToken
+from vendors import presence
+from vendors.models import Vendor
 
+from .permissions import IsVendor
 from .response_serializers import (
     VendorEmailSignUpCompleteResponseSerializer,
     VendorEmailSignUpResponseSerializer,
@@ -11,14 +19,19 @@ from .response_serializers import (
 )
 from .serializers import (
     CompleteVendorProfileSerializer,
+    NearbyVendorSerializer,
+    NearbyVendorsQuerySerializer,
     ResendOTPSerializer,
     VendorEmailSignupSerializer,
+    VendorPresenceQuerySerializer,
     VerifyOTPSerializer,
 )
 
 
 class VendorEmailSignupView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "vendor_signup"
     serializer_class = VendorEmailSignupSerializer
 
     @swagger_auto_schema(
@@ -45,6 +58,8 @@ class VendorEmailSignupView(APIView):
 
 
 class CompleteVendorProfileView(APIView):
+    # Saves the user, so it needs the model instance rather than token claims
+    authentication_classes = [CachedUserJWTAuthentication]
     permission_classes = [IsAuthenticated]
     http_method_names = ['post']
     serializer_class = CompleteVendorProfileSerializer
@@ -61,12 +76,16 @@ class CompleteVendorProfileView(APIView):
         serializer = self.serializer_class(data=request.data, context={"request": request})
         if serializer.is_valid():
             result = serializer.save()
+            # Fresh tokens carrying the new vendor_id claim
+            refresh = ClaimsRefreshToken.for_user(request.user, vendor_id=result.vendor_id)
             return Response(
                 {
                     "status": "success",
                     "message": "Vendor profile completed successfully.",
                     "data": {
-                        "vendor_id": result.vendor_id
+                        "vendor_id": result.vendor_id,
+                        "refresh": str(refresh),
+                        "access": str(refresh.access_token),
                     }
                 }, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -74,6 +93,8 @@ class CompleteVendorProfileView(APIView):
 
 class VerifyOTPView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "verify_otp"
     serializer_class = VerifyOTPSerializer
 
     @swagger_auto_schema(
@@ -101,6 +122,8 @@ class VerifyOTPView(APIView):
 
 class ResendOTPView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "resend_otp"
     serializer_class = ResendOTPSerializer
     http_method_names = ["post"]
 
@@ -125,3 +148,127 @@ class ResendOTPView(APIView):
                 status=status.HTTP_200_OK,
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    """Email/password login, throttled like AsyncTokenObtainPairView so neither bypasses the other."""
+
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "token_obtain"
+
+
+class NearbyVendorsView(APIView):
+    """
+    Online, verified vendors within radius_km of (lat, lng), ranked by
+    distance and rating. Only the geohash cells around the point are read.
+    """
+
+    permission_classes = [AllowAny]
+    http_method_names = ["get"]
+    serializer_class = NearbyVendorSerializer
+
+    @swagger_auto_schema(
+        tags=["Vendors"],
+        operation_summary="Find open vendors near a location",
+        query_serializer=NearbyVendorsQuerySerializer,
+    )
+    def get(self, request):
+        query = NearbyVendorsQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+
+        vendors = Vendor.objects.only(
+            "vendor_id", "business_name", "address", "rating", "latitude", "longitude"
+        ).nearby(params["lat"], params["lng"], params["radius_km"])
+        # Vendor.online lags behind heartbeats by a sync interval; drop vendors gone quiet since
+        live = presence.online_among(vendor.vendor_id for vendor in vendors)
+        vendors = [vendor for vendor in vendors if vendor.vendor_id in live][: params["limit"]]
+        return Response(
+            {
+                "status": "success",
+                "message": f"{len(vendors)} vendors nearby.",
+                "data": self.serializer_class(vendors, many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class VendorHeartbeatView(APIView):
+    """
+    Called periodically by the vendor app while the vendor is taking orders.
+    The vendor stays online for VENDOR_PRESENCE_TTL seconds after each call.
+    """
+
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsVendor]
+    http_method_names = ["post"]
+
+    @swagger_auto_schema(
+        tags=["Vendors"],
+        operation_summary="Vendor presence heartbeat",
+    )
+    def post(self, request):
+        presence.heartbeat(request.user.vendor_id)
+        return Response(
+            {
+                "status": "success",
+                "message": "Heartbeat recorded.",
+                "data": {
+                    "vendor_id": request.user.vendor_id,
+                    "online": True,
+                    "expires_in": settings.VENDOR_PRESENCE_TTL,
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class VendorOfflineView(APIView):
+    """Go offline now instead of waiting for the last heartbeat to expire."""
+
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsVendor]
+    http_method_names = ["post"]
+
+    @swagger_auto_schema(
+        tags=["Vendors"],
+        operation_summary="Mark vendor offline",
+    )
+    def post(self, request):
+        presence.go_offline(request.user.vendor_id)
+        return Response(
+            {
+                "status": "success",
+                "message": "Vendor is offline.",
+                "data": {"vendor_id": request.user.vendor_id, "online": False},
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class VendorPresenceView(APIView):
+    """Which of the given vendors are online right now (one cache lookup, no database)."""
+
+    permission_classes = [AllowAny]
+    http_method_names = ["get"]
+
+    @swagger_auto_schema(
+        tags=["Vendors"],
+        operation_summary="Check which vendors are online",
+        query_serializer=VendorPresenceQuerySerializer,
+    )
+    def get(self, request):
+        query = VendorPresenceQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        vendor_ids = query.validated_data["vendor_ids"]
+        online = presence.online_among(vendor_ids)
+        return Response(
+            {
+                "status": "success",
+                "message": f"{len(online)} of {len(vendor_ids)} vendors online.",
+                "data": {"online": [vendor_id for vendor_id in vendor_ids if vendor_id in online]},
+            },
+            status=status.HTTP_200_OK,
+        )
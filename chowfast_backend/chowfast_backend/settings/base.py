@@ -42,8 +42,10 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # apps
+    "core",
     "users",
     "customers",
     "vendors",
@@ -104,6 +106,64 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# In-process by default; deployed settings switch to Redis when REDIS_URL is set
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Where OTPs and session tokens are kept:
+#   users.stores.DatabaseSecretStore - rows in the users tables (default)
+#   users.stores.CacheSecretStore    - cache entries expired by TTL (needs a shared cache)
+USERS_SECRET_STORE = config("USERS_SECRET_STORE", default="users.stores.DatabaseSecretStore")
+USERS_SECRET_STORE_CACHE_ALIAS = "default"
+
+# Seconds a User loaded by users.authentication.CachedUserJWTAuthentication stays cached
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Per-view limits for api.throttling.SlidingWindowThrottle, keyed by the view's
+# throttle_scope and then by identifier ("ip", "email", "session_token").
+# Rates are "<requests>/<period>" with an optional multiplier, e.g. "5/10m".
+SLIDING_WINDOW_THROTTLE_RATES = {
+    "vendor_signup": {"ip": "20/h", "email": "5/h"},
+    "verify_otp": {"ip": "60/h", "session_token": "5/10m"},
+    "resend_otp": {"ip": "20/h", "session_token": "3/10m"},
+    "token_obtain": {"ip": "60/h", "email": "10/h"},
+}
+
+
+# Admin changelists of tables estimated above this many rows show the
+# planner's estimate instead of running COUNT(*) (core.paginator, PostgreSQL only)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config("ADMIN_ESTIMATED_COUNT_THRESHOLD", default=100000, cast=int)
+
+# customers.resolver: phone -> customer_id lookups for inbound WhatsApp messages
+CUSTOMER_RESOLVER_LRU_SIZE = config("CUSTOMER_RESOLVER_LRU_SIZE", default=50000, cast=int)
+CUSTOMER_RESOLVER_TTL = config("CUSTOMER_RESOLVER_TTL", default=300, cast=int)
+CUSTOMER_RESOLVER_REBUILD_SECONDS = config("CUSTOMER_RESOLVER_REBUILD_SECONDS", default=600, cast=int)
+CUSTOMER_RESOLVER_FALSE_POSITIVE_RATE = config("CUSTOMER_RESOLVER_FALSE_POSITIVE_RATE", default=0.01, cast=float)
+
+# vendors.counters: order/rating counter slots per vendor (more slots, less lock contention)
+VENDOR_COUNTER_SHARDS = config("VENDOR_COUNTER_SHARDS", default=8, cast=int)
+
+# vendors.presence: a vendor is online for this many seconds after its last heartbeat
+VENDOR_PRESENCE_TTL = config("VENDOR_PRESENCE_TTL", default=90, cast=int)
+
+# menus.menu_cache: how long a rendered menu is kept (saves replace it sooner)
+MENU_CACHE_TIMEOUT = config("MENU_CACHE_TIMEOUT", default=86400, cast=int)
+# menus.search: how often each process reloads the vocabulary used to correct typos
+MENU_SEARCH_VOCABULARY_SECONDS = config("MENU_SEARCH_VOCABULARY_SECONDS", default=600, cast=int)
+# menus.image_storage: where menu images are stored by the process_image_jobs worker
+MENU_IMAGE_STORAGE = config("MENU_IMAGE_STORAGE", default="menus.image_storage.CloudinaryImageStorage")
+MENU_IMAGE_LOCAL_ROOT = config("MENU_IMAGE_LOCAL_ROOT", default=str(BASE_DIR / "media" / "menu_images"))
+MENU_IMAGE_LOCAL_URL = config("MENU_IMAGE_LOCAL_URL", default="/media/menu_images/")
+# Largest menu image upload accepted; the bytes wait in the image job's row until processed
+MENU_IMAGE_MAX_UPLOAD_BYTES = config("MENU_IMAGE_MAX_UPLOAD_BYTES", default=10 * 1024 * 1024, cast=int)
+# Delete a menu item's image along with the item (production only)
+ALLOW_CLOUDINARY_DELETE = config("ALLOW_CLOUDINARY_DELETE", default=False, cast=bool)
 
 
 # Password validation
@@ -158,8 +218,17 @@ PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.PBKDF2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
     'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    # OTP codes only, selected explicitly by users.managers.OTPManager
+    'users.hashers.OTPHMACHasher',
 ]
 
+# Threads per worker process that hash passwords for the async views
+# (users.hashing_pool). Keep workers x this close to the number of cores.
+PASSWORD_HASHING_WORKERS = config("PASSWORD_HASHING_WORKERS", default=os.cpu_count() or 1, cast=int)
+
+# Key for the OTP HMAC hasher; rotating it invalidates outstanding OTPs only
+OTP_HASH_KEY = config("OTP_HASH_KEY", default=SECRET_KEY)
+
 
 
 
@@ -62,6 +62,16 @@ if not DEBUG:
     WHITENOISE_COMPRESS = True
     WHITENOISE_MANIFEST_STRICT = True
 
+REDIS_URL = config("REDIS_URL", default="")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 
@@ -105,6 +115,9 @@ SIMPLE_JWT = {
     'SIGNING_KEY': config("SECRET_KEY"), # Uses your Django secret key
     'AUTH_HEADER_TYPES': ('Bearer',), # Standard header type
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    # Login tokens carry user_type/is_activated/vendor_id claims
+    "TOKEN_OBTAIN_SERIALIZER": "users.tokens.ClaimsTokenObtainPairSerializer",
+    "TOKEN_USER_CLASS": "users.authentication.ClaimsUser",
 }
 
 LOGGING = {
@@ -118,7 +131,8 @@ LOGGING = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # Trusts token claims instead of selecting the user on every request
+        "users.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
@@ -132,6 +146,8 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
+    # Railway's edge proxy appends the client address to X-Forwarded-For; earlier entries are client-supplied
+    "NUM_PROXIES": config("NUM_PROXIES", default=1, cast=int),
     "DEFAULT_VERSION": "v1",
     "ALLOWED_VERSIONS": ["v1"],
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
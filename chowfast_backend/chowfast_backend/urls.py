@@ -15,16 +15,18 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from api.v1.vendors.async_views import AsyncTokenObtainPairView
+from api.v1.vendors.views import ThrottledTokenObtainPairView
 from django.contrib import admin
 from django.urls import include, path
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
     TokenRefreshView,
     TokenVerifyView,
 )
+from users.tokens import ClaimsTokenRefreshSerializer
 
 # 1. Define the Schema View (Restricted Access)
 schema_view = get_schema_view(
@@ -43,9 +45,16 @@ schema_view = get_schema_view(
 urlpatterns = [
     path("admin/", admin.site.urls),
     # Get a new access and refresh token pair (Login)
-    path("api/v1/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("api/v1/token/", ThrottledTokenObtainPairView.as_view(), name="token_obtain_pair"),
+    # Same login for ASGI workers, with password checks off the event loop
+    path("api/v1/token/async/", AsyncTokenObtainPairView.as_view(), name="token_obtain_pair_async"),
     # Get a new access token using the refresh token
-    path("api/v1/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    # Revoked refresh tokens (users.tokens.ClaimsTokenRefreshSerializer) are refused
+    path(
+        "api/v1/token/refresh/",
+        TokenRefreshView.as_view(serializer_class=ClaimsTokenRefreshSerializer),
+        name="token_refresh",
+    ),
     # Optional: Verify a token's validity
     path("api/v1/token/verify/", TokenVerifyView.as_view(), name="token_verify"),
     path(
@@ -68,4 +77,6 @@ urlpatterns = [
     ),
     path("api/v1/customers/", include("api.v1.customers.urls")),
     path("api/v1/vendors/", include("api.v1.vendors.urls")),
+    path("api/v1/search/", include("api.v1.search.urls")),
+    path("api/v1/menus/", include("api.v1.menus.urls")),
 ]
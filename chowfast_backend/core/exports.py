@@ -0,0 +1,241 @@
+"""
+Streaming CSV / JSON Lines exports.
+
+Rows are read with QuerySet.iterator(chunk_size=...) (a server-side cursor
+on PostgreSQL) and encoded one at a time by a generator, so memory stays
+flat however many rows there are. The same generator backs the admin
+actions, the export_data management command and API downloads.
+
+Under ASGI, Django would drain a sync iterator into a list before sending
+the first byte, so export_response wraps the generator in an async one that
+pulls a chunk of rows at a time through sync_to_async.
+
+Exports are declared in EXPORTS: a queryset factory plus the columns to
+write. An export with `children` writes nested rows (order items): an
+"items" list in JSON Lines, one line per item in CSV.
+"""
+
+import csv
+import datetime
+import decimal
+import itertools
+import json
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+DEFAULT_CHUNK_SIZE = 2000
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    name: str
+    queryset: Callable
+    columns: tuple  # (header, attribute path with "__" for relations)
+    children: str = None  # related name prefetched and written per row
+    child_columns: tuple = field(default_factory=tuple)
+
+
+def _customers():
+    from customers.models import Customer
+
+    return Customer.objects.order_by("pk")
+
+
+def _orders():
+    from orders.models import Order
+
+    return (
+        Order.objects.select_related("customer", "vendor")
+        .prefetch_related("order_items")
+        .order_by("created_at", "pk")
+    )
+
+
+def _payments():
+    from payments.models import Payment
+
+    return Payment.objects.order_by("created_at", "pk")
+
+
+EXPORTS = {
+    spec.name: spec
+    for spec in (
+        ExportSpec(
+            name="customers",
+            queryset=_customers,
+            columns=(
+                ("customer_id", "customer_id"),
+                ("phone_number", "phone_number"),
+                ("location", "location"),
+                ("delivery_address", "delivery_address"),
+                ("created_at", "created_at"),
+            ),
+        ),
+        ExportSpec(
+            name="orders",
+            queryset=_orders,
+            columns=(
+                ("order_id", "id"),
+                ("customer_id", "customer__customer_id"),
+                ("vendor_id", "vendor__vendor_id"),
+                ("status", "status"),
+                ("payment_status", "payment_status"),
+                ("subtotal", "subtotal"),
+                ("delivery_fee", "delivery_fee"),
+                ("total", "total"),
+                ("delivery_address", "delivery_address"),
+                ("created_at", "created_at"),
+            ),
+            children="order_items",
+            child_columns=(
+                ("menu_item_id", "item_id"),
+                ("item_name", "name"),
+                ("quantity", "quantity"),
+                ("unit_price", "price"),
+                ("line_total", "subtotal"),
+            ),
+        ),
+        ExportSpec(
+            name="payments",
+            queryset=_payments,
+            columns=(
+                ("payment_id", "id"),
+                ("order_id", "order_id"),
+                ("transaction_ref", "transaction_ref"),
+                ("status", "status"),
+                ("amount", "amount"),
+                ("paid_at", "paid_at"),
+                ("created_at", "created_at"),
+            ),
+        ),
+    )
+}
+
+
+def get_export(name):
+    try:
+        return EXPORTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown export {name!r}; choose from {', '.join(EXPORTS)}")
+
+
+def _value(obj, path):
+    for attr in path.split("__"):
+        if obj is None:
+            return None
+        obj = getattr(obj, attr)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    return obj
+
+
+def export_row(spec, obj, children=True):
+    """One exported record as a dict (also used for search results)."""
+    row = {header: _value(obj, path) for header, path in spec.columns}
+    if spec.children and children:
+        row["items"] = [
+            {header: _value(child, path) for header, path in spec.child_columns}
+            for child in getattr(obj, spec.children).all()
+        ]
+    return row
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_export(spec, queryset=None, fmt="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the export as text chunks, one per row (plus a CSV header)."""
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported export format {fmt!r}")
+    if queryset is None:
+        queryset = spec.queryset()
+    objects = queryset.iterator(chunk_size=chunk_size)
+
+    if fmt == "jsonl":
+        for obj in objects:
+            yield json.dumps(export_row(spec, obj), default=str) + "\n"
+        return
+
+    writer = csv.writer(_Echo())
+    headers = [header for header, _ in spec.columns]
+    yield writer.writerow(headers + [header for header, _ in spec.child_columns])
+    for obj in objects:
+        row = export_row(spec, obj)
+        values = [row[header] for header in headers]
+        if not spec.children:
+            yield writer.writerow(values)
+            continue
+        # One CSV line per child; orders without items still get a line
+        children = row["items"] or [{}]
+        yield "".join(
+            writer.writerow(values + [child.get(header) for header, _ in spec.child_columns])
+            for child in children
+        )
+
+
+def export_filename(spec, fmt):
+    return f"{spec.name}-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+
+
+def _next_chunks(chunks, count):
+    """Up to `count` chunks from the generator, joined ("" once it is exhausted)."""
+    return "".join(itertools.islice(chunks, count))
+
+
+async def aiter_export(chunks, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Async view of an iter_export generator: each step pulls `chunk_size`
+    chunks in the sync thread, where the generator's cursor and connection live.
+    """
+    next_chunks = sync_to_async(_next_chunks, thread_sensitive=True)
+    try:
+        while text := await next_chunks(chunks, chunk_size):
+            yield text
+    finally:
+        # Client went away or the export ended: release the cursor in its own thread
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def export_response(spec, queryset=None, fmt="csv", chunk_size=DEFAULT_CHUNK_SIZE, request=None):
+    """`request` (Django's or DRF's) tells whether this is served over ASGI."""
+    chunks = iter_export(spec, queryset, fmt, chunk_size)
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        chunks = aiter_export(chunks, chunk_size)
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{export_filename(spec, fmt)}"'
+    return response
+
+
+def export_actions(name):
+    """Admin actions that stream the selected rows as CSV and as JSON Lines."""
+    from django.contrib import admin
+
+    spec = get_export(name)
+
+    def make_action(fmt, label):
+        @admin.action(description=f"Export selected {spec.name} as {label}")
+        def action(modeladmin, request, queryset):
+            # Keep the export's own ordering and related-object loading for the selection
+            selection = spec.queryset().filter(pk__in=queryset.values("pk"))
+            return export_response(spec, selection, fmt, request=request)
+
+        action.__name__ = f"export_{spec.name}_{fmt}"
+        return action
+
+    return [make_action("csv", "CSV"), make_action("jsonl", "JSON Lines")]
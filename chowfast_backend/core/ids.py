@@ -0,0 +1,107 @@
+"""
+Sequential public IDs (CUST-00000001, VEND_00000001) allocated before the INSERT.
+
+IDs are handed out in hi/lo blocks of ID_BLOCK_SIZE so most saves need no
+query at all, and bulk_create can be given a whole range at once:
+
+- PostgreSQL: a native sequence per name with INCREMENT BY ID_BLOCK_SIZE.
+  nextval() is not rolled back with the surrounding transaction, so a block
+  stays valid for the life of the process.
+- Other backends: the IdSequence row is bumped with UPDATE ... RETURNING.
+  That bump is undone if the surrounding transaction rolls back, so a block
+  is only cached when it was reserved in autocommit; inside a transaction
+  exactly the IDs needed are reserved.
+
+Gaps (unused block remainders after a restart) are expected; IDs are unique
+and increasing per process, not dense.
+"""
+
+import threading
+
+from django.db import connection
+
+ID_BLOCK_SIZE = 100
+ID_WIDTH = 8
+
+_blocks = {}  # name -> [next, end)
+_lock = threading.Lock()
+
+
+def sequence_name(name):
+    return f"core_id_seq_{name}"
+
+
+def format_id(prefix, value):
+    return f"{prefix}{str(value).zfill(ID_WIDTH)}"
+
+
+def allocate_ids(name, count=1):
+    """Return `count` unused, increasing values of sequence `name`."""
+    values = []
+    with _lock:
+        block = _blocks.get(name)
+        while len(values) < count:
+            if block and block[0] < block[1]:
+                take = min(count - len(values), block[1] - block[0])
+                values.extend(range(block[0], block[0] + take))
+                block[0] += take
+                continue
+            block = _reserve(name, count - len(values))
+            _blocks[name] = block
+    return values
+
+
+def next_id(name):
+    return allocate_ids(name)[0]
+
+
+def _reserve(name, needed):
+    """Reserve a new block from the database; returns [start, end)."""
+    if connection.vendor == "postgresql":
+        # Blocks are ID_BLOCK_SIZE wide; grab as many as needed in one round trip
+        blocks = -(-needed // ID_BLOCK_SIZE)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)", [sequence_name(name), blocks]
+            )
+            starts = sorted(row[0] for row in cursor.fetchall())
+        if starts != list(range(starts[0], starts[0] + blocks * ID_BLOCK_SIZE, ID_BLOCK_SIZE)):
+            # Another process interleaved: use the first block, the loop asks again
+            return [starts[0], starts[0] + ID_BLOCK_SIZE]
+        return [starts[0], starts[0] + blocks * ID_BLOCK_SIZE]
+
+    size = needed if connection.in_atomic_block else max(needed, ID_BLOCK_SIZE)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE core_id_sequence SET next_value = next_value + %s WHERE name = %s RETURNING next_value",
+            [size, name],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        raise LookupError(f"ID sequence {name!r} does not exist; run migrations")
+    end = row[0]
+    return [end - size, end]
+
+
+def create_sequence(apps, schema_editor, name, start):
+    """
+    Create sequence `name` starting at `start`. For use in migrations
+    (RunPython), after any existing rows have been numbered.
+    """
+    IdSequence = apps.get_model("core", "IdSequence")
+    IdSequence.objects.using(schema_editor.connection.alias).update_or_create(
+        name=name, defaults={"next_value": start}
+    )
+    if schema_editor.connection.vendor == "postgresql":
+        seq = schema_editor.quote_name(sequence_name(name))
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {seq}")
+        schema_editor.execute(
+            f"CREATE SEQUENCE {seq} INCREMENT BY {ID_BLOCK_SIZE} START WITH {int(start)}"
+        )
+
+
+def drop_sequence(apps, schema_editor, name):
+    IdSequence = apps.get_model("core", "IdSequence")
+    IdSequence.objects.using(schema_editor.connection.alias).filter(name=name).delete()
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {schema_editor.quote_name(sequence_name(name))}")
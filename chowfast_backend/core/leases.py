@@ -0,0 +1,81 @@
+"""
+Leased claiming and retries for the background job tables (email_outbox,
+menu_image_jobs).
+
+A job model has STATUS_PENDING / STATUS_FAILED, attempts, last_error and
+next_attempt_at, and a LeasedJobManager subclass naming its in-progress
+status. A worker claims due jobs with claim_due(), which moves them to the
+in-progress status with a lease: if the worker dies before recording a
+result they become due again once it runs out, unless they already had
+max_attempts (a job that keeps killing the worker is given up on, not
+retried forever). A failed attempt is recorded with record_failure(), which
+schedules the retry with an exponential, jittered backoff.
+"""
+
+import random
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+LEASE_EXPIRED_ERROR = "Worker stopped before recording a result"
+
+# Retry backoff: 30s, 1m, 2m, ... capped at an hour, +/-20% so failures spread out
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+RETRY_JITTER = 0.2
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(1 - RETRY_JITTER, 1 + RETRY_JITTER))
+
+
+class LeasedJobManager(models.Manager):
+    claimed_status = None  # status of a job a worker holds the lease on
+
+    def claim_due(self, limit, max_attempts, lease_seconds=300):
+        """Lock and claim up to `limit` jobs that are due for (re)processing; their attempts are counted."""
+        now = timezone.now()
+        with transaction.atomic():
+            exhausted = list(
+                self.select_for_update(skip_locked=True).filter(
+                    status=self.claimed_status, next_attempt_at__lte=now, attempts__gte=max_attempts
+                )
+            )
+            if exhausted:
+                self.give_up(exhausted, LEASE_EXPIRED_ERROR)
+            jobs = list(
+                self.select_for_update(skip_locked=True)
+                .filter(
+                    status__in=[self.model.STATUS_PENDING, self.claimed_status],
+                    next_attempt_at__lte=now,
+                )
+                .order_by("next_attempt_at")[:limit]
+            )
+            self.filter(pk__in=[job.pk for job in jobs]).update(
+                status=self.claimed_status,
+                attempts=F("attempts") + 1,
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+            )
+
+        for job in jobs:
+            job.attempts += 1
+        return jobs
+
+    def give_up(self, jobs, error):
+        """Mark `jobs` failed for good."""
+        self.filter(pk__in=[job.pk for job in jobs]).update(status=self.model.STATUS_FAILED, last_error=error)
+
+    def record_failure(self, job, error, max_attempts):
+        """Schedule a claimed job's retry, or give up on it after `max_attempts`. Returns True if given up."""
+        if job.attempts >= max_attempts:
+            self.give_up([job], error)
+            return True
+        self.filter(pk=job.pk).update(
+            status=self.model.STATUS_PENDING,
+            last_error=error,
+            next_attempt_at=timezone.now() + retry_delay(job.attempts),
+        )
+        return False
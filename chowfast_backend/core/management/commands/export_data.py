@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import DEFAULT_CHUNK_SIZE, EXPORTS, iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream customers, orders (with items) or payments to CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', choices=sorted(EXPORTS), help='What to export')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            default='csv',
+            help='Output format',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='File to write (default: stdout)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Rows fetched from the database cursor at a time',
+        )
+
+    def handle(self, *args, **options):
+        chunks = iter_export(
+            EXPORTS[options['export']], fmt=options['format'], chunk_size=options['chunk_size']
+        )
+        try:
+            out = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        except OSError as e:
+            raise CommandError(str(e))
+
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        if options['output']:
+            self.stdout.write(f"Wrote {options['export']} to {options['output']}")
+
+
+# python manage.py export_data orders --format jsonl --output orders.jsonl
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.search import refill_fts_tables
+
+
+class Command(BaseCommand):
+    help = "Refill the SQLite FTS5 search tables from their base tables (optionally after a VACUUM)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='VACUUM the database first (it may renumber the rowids the FTS5 tables point at)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Only SQLite keeps FTS5 tables; PostgreSQL's trigram indexes need no rebuild.")
+
+        if options['vacuum']:
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM")
+        tables = refill_fts_tables(connection)
+        self.stdout.write(f"Rebuilt {len(tables)} search tables: {', '.join(tables)}")
+
+
+# python manage.py rebuild_search_indexes --vacuum
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:40
+
+from core.search import create_text_indexes, drop_text_indexes
+from django.db import migrations
+
+# (table, text columns, FTS5 table) as of this migration
+TEXT_INDEXES = (
+    ("customers", ("location", "delivery_address"), "customers_fts"),
+    ("orders", ("delivery_address", "notes"), "orders_fts"),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    for table, fields, fts_table in TEXT_INDEXES:
+        create_text_indexes(schema_editor, table, fields, fts_table)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for table, fields, fts_table in TEXT_INDEXES:
+        drop_text_indexes(schema_editor, table, fields, fts_table)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('customers', '0005_customer_updated_at'),
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
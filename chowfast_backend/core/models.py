@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class IdSequence(models.Model):
+    """
+    High-water mark of a named ID sequence (see core.ids).
+    On PostgreSQL the values come from a native sequence and this row only
+    records that the sequence exists.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+
+    class Meta:
+        db_table = "core_id_sequence"
+
+    def __str__(self):
+        return f"{self.name} (next {self.next_value})"
@@ -0,0 +1,59 @@
+"""
+Admin pagination that does not COUNT(*) big tables.
+
+On PostgreSQL the changelist total comes from the planner: pg_class.reltuples
+for an unfiltered table, the EXPLAIN row estimate for a filtered one. If
+that estimate is under ADMIN_ESTIMATED_COUNT_THRESHOLD the exact count is
+cheap enough and is used instead, as it is on every other backend.
+
+Estimates can be off by a few percent. The last page numbers may then
+point past the real end of the list, and the admin sends those requests back
+to the first page.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[getattr(queryset, "db", "default")]
+        if connection.vendor != "postgresql" or not hasattr(queryset, "query"):
+            return super().count
+
+        estimate = self.estimate(queryset, connection)
+        if estimate is None or estimate < settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return super().count
+        return estimate
+
+    def estimate(self, queryset, connection):
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                # Whole table: the statistics kept by (auto)vacuum/analyze
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                # -1 (or 0 on older servers) means never analyzed
+                return row[0] if row and row[0] > 0 else None
+
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountAdminMixin:
+    """ModelAdmin mixin: estimated changelist totals and no second full-table count."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,293 @@
+"""
+Indexed search over customers, orders and payments.
+
+A query is first classified. Identifiers (UUIDs, CUST-/VEND_ IDs, phone
+numbers, payment references) go to exact lookups on unique or foreign-key
+indexes. Anything else is free text, matched against the model's text
+columns through an index:
+
+- PostgreSQL: pg_trgm GIN indexes, ranked by trigram word similarity;
+- SQLite: an FTS5 table per model kept in sync by triggers, ranked by bm25;
+- other backends: icontains, unranked (no index).
+
+The indexes are created by core/migrations/0002_search_indexes.py.
+Admins opt in with IndexedSearchAdminMixin; the API uses search().
+
+The FTS5 tables are joined to their base tables on the implicit rowid (the
+primary keys are UUIDs). SQLite's VACUUM may renumber those rowids, so run
+`manage.py rebuild_search_indexes --vacuum` instead of a bare VACUUM.
+"""
+
+import re
+import uuid
+from dataclasses import dataclass, field
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import Q
+
+from customers.resolver import normalize_phone
+
+DEFAULT_LIMIT = 20
+TRIGRAM_THRESHOLD = 0.3
+
+_PUBLIC_ID = re.compile(r"^(CUST-|VEND_)\d+$", re.IGNORECASE)
+_PHONE = re.compile(r"^\+?\d{7,15}$")
+_TOKEN = re.compile(r"^[\w\-./]{4,100}$")
+_FTS_WORD = re.compile(r"\w+")
+
+IDENTIFIER_KINDS = ("uuid", "customer_id", "vendor_id", "phone")
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    name: str
+    model: str  # "app_label.Model"
+    exact: dict  # query kind -> lookups tried together (OR)
+    text_fields: tuple = ()
+    select_related: tuple = ()
+    fts_table: str = field(default=None)
+
+    def get_model(self):
+        from django.apps import apps
+
+        return apps.get_model(self.model)
+
+    def queryset(self):
+        return self.get_model()._default_manager.select_related(*self.select_related)
+
+
+SEARCHES = {
+    spec.name: spec
+    for spec in (
+        SearchSpec(
+            name="customers",
+            model="customers.Customer",
+            exact={
+                "customer_id": ("customer_id",),
+                "phone": ("phone_number",),
+            },
+            text_fields=("location", "delivery_address"),
+            fts_table="customers_fts",
+        ),
+        SearchSpec(
+            name="orders",
+            model="orders.Order",
+            exact={
+                "uuid": ("id",),
+                "customer_id": ("customer__customer_id",),
+                "vendor_id": ("vendor__vendor_id",),
+                "phone": ("customer__phone_number",),
+                "token": ("payment__transaction_ref",),
+            },
+            text_fields=("delivery_address", "notes"),
+            select_related=("customer", "vendor"),
+            fts_table="orders_fts",
+        ),
+        SearchSpec(
+            name="payments",
+            model="payments.Payment",
+            exact={
+                "uuid": ("id", "order_id"),
+                "token": ("transaction_ref",),
+            },
+            select_related=("order",),
+        ),
+    )
+}
+
+
+def classify(query):
+    """Return (kind, value) for a search string."""
+    query = query.strip()
+    compact = "".join(query.split())
+    try:
+        return "uuid", uuid.UUID(compact)
+    except ValueError:
+        pass
+    if _PUBLIC_ID.match(compact):
+        kind = "customer_id" if compact[:5].upper() == "CUST-" else "vendor_id"
+        return kind, compact.upper()
+    if _PHONE.match(compact):
+        return "phone", normalize_phone(compact)
+    if _TOKEN.match(query):
+        return "token", query
+    return "text", query
+
+
+def search(name, query, limit=DEFAULT_LIMIT):
+    """Ranked list of matches (best first); each has a `search_rank` attribute."""
+    spec = SEARCHES[name]
+    query = query.strip()
+    kind, value = classify(query)
+
+    attempts = [(kind, value)]
+    if kind != "token" and _TOKEN.match(query):
+        # References can look like phone numbers or UUIDs too
+        attempts.append(("token", query))
+    for attempt_kind, attempt_value in attempts:
+        lookups = spec.exact.get(attempt_kind)
+        if not lookups:
+            continue
+        condition = reduce(or_, (Q(**{lookup: attempt_value}) for lookup in lookups))
+        results = list(spec.queryset().filter(condition).distinct()[:limit])
+        if results:
+            for obj in results:
+                obj.search_rank = 1.0
+            return results
+
+    # Identifiers that matched nothing never fall back to a text scan
+    if kind in IDENTIFIER_KINDS or not spec.text_fields:
+        return []
+    return _text_search(spec, query, limit)
+
+
+def _text_search(spec, text, limit):
+    if connection.vendor == "postgresql":
+        return _trigram_search(spec, text, limit)
+    if connection.vendor == "sqlite" and spec.fts_table:
+        return _fts5_search(spec, text, limit)
+
+    condition = reduce(or_, (Q(**{f"{name}__icontains": text}) for name in spec.text_fields))
+    results = list(spec.queryset().filter(condition)[:limit])
+    for obj in results:
+        obj.search_rank = 0.0
+    return results
+
+
+def _trigram_search(spec, text, limit):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    from django.db.models.functions import Greatest
+
+    similarities = [TrigramWordSimilarity(text, name) for name in spec.text_fields]
+    rank = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+    # The word-similarity operator (%>) is what the GIN trigram indexes serve
+    condition = reduce(or_, (Q(**{f"{name}__trigram_word_similar": text}) for name in spec.text_fields))
+    queryset = spec.queryset().filter(condition).annotate(search_rank=rank)
+    return list(queryset.filter(search_rank__gte=TRIGRAM_THRESHOLD).order_by("-search_rank")[:limit])
+
+
+def fts5_query(text):
+    """Words as quoted prefix terms, so user input is never parsed as FTS5 syntax."""
+    return " ".join(f'"{word}"*' for word in _FTS_WORD.findall(text))
+
+
+def _fts5_search(spec, text, limit):
+    match = fts5_query(text)
+    if not match:
+        return []
+    model = spec.get_model()
+    table = model._meta.db_table
+    pk_column = model._meta.pk.column
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {table}.{pk_column}, bm25({spec.fts_table}) FROM {spec.fts_table} "
+            f"JOIN {table} ON {table}.rowid = {spec.fts_table}.rowid "
+            f"WHERE {spec.fts_table} MATCH %s ORDER BY bm25({spec.fts_table}) LIMIT %s",
+            [match, limit],
+        )
+        ranked = cursor.fetchall()
+    if not ranked:
+        return []
+
+    pk_field = model._meta.pk
+    ranks = {pk_field.to_python(pk): -score for pk, score in ranked}  # bm25: lower is better
+    objects = spec.queryset().in_bulk(list(ranks))
+    results = []
+    for pk, rank in ranks.items():
+        if pk in objects:
+            objects[pk].search_rank = rank
+            results.append(objects[pk])
+    return results
+
+
+# Index management, used by migrations (non-atomic ones on PostgreSQL).
+
+def create_text_indexes(schema_editor, table, fields, fts_table):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name in fields:
+            schema_editor.execute(
+                # CONCURRENTLY: building on a large table must not block writes
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_{name}_trgm ON {table} "
+                f"USING gin ({name} gin_trgm_ops)"
+            )
+    elif schema_editor.connection.vendor == "sqlite":
+        columns = ", ".join(fields)
+        new_values = ", ".join(f"new.{name}" for name in fields)
+        old_values = ", ".join(f"old.{name}" for name in fields)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({columns}, content='{table}', content_rowid='rowid')"
+        )
+        # External-content FTS5: mirror every write to the base table
+        schema_editor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.rowid, {new_values}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values}); "
+            f"INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.rowid, {new_values}); END"
+        )
+        schema_editor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def drop_text_indexes(schema_editor, table, fields, fts_table):
+    if schema_editor.connection.vendor == "postgresql":
+        for name in fields:
+            schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {table}_{name}_trgm")
+    elif schema_editor.connection.vendor == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+def sqlite_fts_tables(connection):
+    """Every FTS5 table in a SQLite database (its fts5vocab views excluded)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%USING fts5(%'"
+        )
+        return [name for (name,) in cursor.fetchall()]
+
+
+def refill_fts_tables(connection):
+    """Re-read every FTS5 table from its base table, e.g. after VACUUM renumbered the rowids."""
+    tables = sqlite_fts_tables(connection)
+    with connection.cursor() as cursor:
+        for fts_table in tables:
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+    return tables
+
+
+def rebuild_text_indexes(schema_editor, table, fields, fts_table):
+    """
+    For migrations that alter `table`. SQLite alters most columns by copying
+    the table into a new one, which drops its FTS5 triggers and renumbers
+    its rowids; PostgreSQL's indexes survive ALTER TABLE.
+    """
+    if schema_editor.connection.vendor == "sqlite":
+        drop_text_indexes(schema_editor, table, fields, fts_table)
+        create_text_indexes(schema_editor, table, fields, fts_table)
+
+
+class IndexedSearchAdminMixin:
+    """
+    ModelAdmin mixin routing the changelist (and autocomplete) search box
+    through search(). `search_name` picks the SearchSpec; search_fields
+    only needs to be non-empty so the box is shown.
+    """
+
+    search_name = None
+    search_limit = 500
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        pks = [obj.pk for obj in search(self.search_name, search_term, limit=self.search_limit)]
+        return queryset.filter(pk__in=pks), False
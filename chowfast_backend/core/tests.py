@@ -0,0 +1,168 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from core.exports import export_response, get_export, iter_export
+from core.leases import retry_delay
+from core.paginator import EstimatedCountPaginator
+from core.search import search
+from customers.models import Customer
+from django.contrib import admin
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from menus.models import MenuItem
+from orders.models import Order, OrderItem
+from payments.models import Payment
+from users.models import OTP, SessionToken, User
+from vendors.models import OutboxEmail, Vendor
+
+ADMIN_APPS = ("users", "customers", "vendors", "menus", "orders", "payments")
+ROWS = 100
+
+# Queries a changelist may run regardless of its row count: session and user,
+# COUNT(*)s, the page itself, filter choices and the like. A per-row query
+# (N+1) blows straight through it.
+CHANGELIST_QUERY_LIMIT = 15
+
+
+class AdminQueryBoundTests(TestCase):
+    """Every admin changelist of our apps renders 100 rows in a bounded number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            User(email=f"vendor{i}@example.com", user_type="vendor", password="!") for i in range(ROWS)
+        )
+        vendors = Vendor.objects.bulk_create(
+            Vendor(user=user, vendor_id=f"VEND_{i:08d}", business_name=f"Vendor {i}")
+            for i, user in enumerate(users)
+        )
+        customers = Customer.objects.bulk_create_with_ids(
+            [Customer(phone_number=f"+234800000{i:04d}") for i in range(ROWS)]
+        )
+        items = MenuItem.objects.bulk_create(
+            MenuItem(vendor=vendor, name=f"Dish {i}", price=Decimal("1500.00"))
+            for i, vendor in enumerate(vendors)
+        )
+        orders = Order.objects.bulk_create(
+            Order(customer=customer, vendor=vendor, total=Decimal("1500.00"))
+            for customer, vendor in zip(customers, vendors)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, item=item, name=item.name, price=item.price, subtotal=item.price)
+            for order, item in zip(orders, items)
+        )
+        Payment.objects.bulk_create(
+            Payment(order=order, transaction_ref=f"ref-{i}", status="success", amount=order.total)
+            for i, order in enumerate(orders)
+        )
+        OTP.objects.bulk_create(
+            OTP(user=user, code="!", purpose="email_verification") for user in users
+        )
+        SessionToken.objects.bulk_create(
+            SessionToken(user=user, purpose="email_verification", expires_at=now + timedelta(minutes=10))
+            for user in users
+        )
+        OutboxEmail.objects.bulk_create(
+            OutboxEmail(subject="Welcome", to_email=user.email, html_body="<p>Hi</p>") for user in users
+        )
+        cls.order = orders[0]
+        cls.admin_user = User.objects.create_superuser(email="admin@example.com", password="s3cret-pass")
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def assertBoundedQueries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertLessEqual(
+            len(ctx.captured_queries),
+            CHANGELIST_QUERY_LIMIT,
+            f"{url} ran {len(ctx.captured_queries)} queries:\n"
+            + "\n".join(query["sql"] for query in ctx.captured_queries),
+        )
+
+    def test_changelists(self):
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label not in ADMIN_APPS:
+                continue
+            with self.subTest(model=model.__name__):
+                opts = model._meta
+                self.assertBoundedQueries(reverse(f"admin:{opts.app_label}_{opts.model_name}_changelist"))
+
+    def test_changelist_counts(self):
+        # Exact counts below the estimate threshold (always on SQLite), and no second full count
+        response = self.client.get(reverse("admin:orders_order_changelist"), {"status": "pending_payment"})
+        changelist = response.context["cl"]
+        self.assertIsInstance(changelist.paginator, EstimatedCountPaginator)
+        self.assertEqual(changelist.result_count, ROWS)
+        self.assertIsNone(changelist.full_result_count)
+
+    def test_changelist_search(self):
+        Order.objects.filter(pk=self.order.pk).update(delivery_address="12 Herbert Macaulay Way, Yaba")
+        for url, term, expected in (
+            (reverse("admin:orders_order_changelist"), "herbert", [self.order.pk]),
+            (reverse("admin:orders_order_changelist"), "+2348000000000", [self.order.pk]),
+            (reverse("admin:payments_payment_changelist"), "ref-0", [self.order.payment.pk]),
+        ):
+            with self.subTest(url=url, term=term):
+                response = self.client.get(url, {"q": term})
+                self.assertEqual([obj.pk for obj in response.context["cl"].result_list], expected)
+
+    def test_order_change_form(self):
+        # The order item inline must not load every MenuItem into a select
+        self.assertBoundedQueries(reverse("admin:orders_order_change", args=[self.order.pk]))
+
+
+class StreamingExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Customer.objects.bulk_create_with_ids(
+            [Customer(phone_number=f"+234800000{i:04d}") for i in range(5)]
+        )
+
+    async def test_asgi_export_streams_chunk_by_chunk(self):
+        spec = get_export("customers")
+        response = export_response(spec, fmt="csv", chunk_size=2, request=AsyncRequestFactory().get("/"))
+        self.assertTrue(response.is_async)
+
+        chunks = aiter(response.streaming_content)
+        first = (await anext(chunks)).decode()
+        self.assertTrue(first.startswith("customer_id,phone_number"))
+        self.assertIn("+2348000000000", first)
+        self.assertNotIn("+2348000000004", first)  # Later rows are not read yet
+
+        rest = [chunk.decode() async for chunk in chunks]
+        self.assertEqual(len(rest), 2)
+        expected = await sync_to_async(lambda: "".join(iter_export(spec, fmt="csv")))()
+        self.assertEqual(first + "".join(rest), expected)
+
+
+class RebuildSearchIndexesTests(TransactionTestCase):
+    """VACUUM cannot run inside the transaction a TestCase wraps each test in."""
+
+    def test_vacuum_then_refill(self):
+        Customer.objects.create(phone_number="+2348012345678", location="Yaba")
+        with connection.cursor() as cursor:
+            # What rowids renumbered by VACUUM amount to: the index points at nothing
+            cursor.execute("INSERT INTO customers_fts(customers_fts) VALUES ('delete-all')")
+        self.assertEqual(search("customers", "Yaba"), [])
+
+        out = StringIO()
+        call_command("rebuild_search_indexes", "--vacuum", stdout=out)
+        self.assertIn("customers_fts", out.getvalue())
+        self.assertEqual([customer.location for customer in search("customers", "Yaba")], ["Yaba"])
+
+
+class RetryDelayTests(SimpleTestCase):
+    def test_doubles_with_jitter_up_to_an_hour(self):
+        for attempts, base in ((1, 30), (2, 60), (4, 240), (20, 3600)):
+            delays = [retry_delay(attempts).total_seconds() for _ in range(50)]
+            self.assertTrue(all(base * 0.8 <= delay <= base * 1.2 for delay in delays), attempts)
@@ -1,18 +1,22 @@
+from core.exports import export_actions
+from core.paginator import EstimatedCountAdminMixin
+from core.search import IndexedSearchAdminMixin
 from django.contrib import admin
 
 from .models import Customer
 
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(IndexedSearchAdminMixin, EstimatedCountAdminMixin, admin.ModelAdmin):
     # Fields to display in the admin list view
     list_display = ('customer_id', 'phone_number', 'location', 'created_at')
     
     # Fields to filter by in the admin
     list_filter = ('created_at',)
     
-    # Fields to search in the admin
-    search_fields = ('customer_id', 'phone_number', 'location')
+    # Fields to search in the admin (routed through core.search)
+    search_fields = ('customer_id', 'phone_number', 'location', 'delivery_address')
+    search_name = 'customers'
     
     # Fields to order by in the admin
     ordering = ('-created_at',)
@@ -24,4 +28,5 @@ class CustomerAdmin(admin.ModelAdmin):
     )
     
     # Read-only fields
-    readonly_fields = ('customer_id', 'created_at')
\ No newline at end of file
+    readonly_fields = ('customer_id', 'created_at')
+    actions = export_actions("customers")
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Bulk customer import from CSV or JSON Lines.
+
+Records are streamed from the file and handled in batches: each batch is
+validated with the same phone_regex as the API, checked against existing
+phone numbers with a single `phone_number IN (...)` query and written with
+Customer.objects.bulk_create_with_ids. Rows that cannot be imported are
+collected as (row, phone_number, error) so callers can write an error file.
+A file that cannot be read at all (not UTF-8, broken CSV quoting) raises
+ImportFileError with the row it stopped at.
+"""
+
+import csv
+import json
+from dataclasses import dataclass, field
+
+from api.v1.vendors.validators import phone_regex
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import Customer
+from .resolver import publish_recent
+
+IMPORT_FIELDS = ("phone_number", "location", "delivery_address")
+ERROR_FILE_HEADER = ("row", "phone_number", "error")
+
+
+class ImportFileError(ValueError):
+    """The file cannot be read past `row`; rows before it were read normally."""
+
+    def __init__(self, row, message):
+        super().__init__(f"Row {row}: {message}")
+        self.row = row
+
+
+def detect_format(filename):
+    return "jsonl" if filename.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def iter_records(stream, fmt="csv"):
+    """
+    Yield (row_number, record) from a binary or text stream without loading it.
+    CSV row numbers count the header as row 1, JSONL row numbers are line numbers.
+    Raises ImportFileError for undecodable bytes or malformed CSV.
+    """
+    if isinstance(stream.read(0), bytes):
+        # Decoded line by line, so a bad byte is reported on its own row
+        stream = _decode_lines(stream)
+
+    if fmt == "jsonl":
+        line_number = 0
+        try:
+            for line_number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield line_number, record if isinstance(record, dict) else None
+        except UnicodeDecodeError:
+            raise ImportFileError(line_number + 1, "the file is not UTF-8 encoded.") from None
+        return
+
+    row_number = 1
+    try:
+        for row_number, record in enumerate(csv.DictReader(stream), start=2):
+            yield row_number, record
+    except UnicodeDecodeError:
+        raise ImportFileError(row_number + 1, "the file is not UTF-8 encoded.") from None
+    except csv.Error as e:
+        raise ImportFileError(row_number + 1, f"malformed CSV ({e}).") from None
+
+
+def _decode_lines(stream):
+    for line_number, line in enumerate(stream):
+        yield line.decode("utf-8-sig" if line_number == 0 else "utf-8")
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    duplicates: int = 0
+    errors: list = field(default_factory=list)
+
+    def write_errors(self, stream):
+        writer = csv.writer(stream)
+        writer.writerow(ERROR_FILE_HEADER)
+        writer.writerows(self.errors)
+
+
+class CustomerImporter:
+    def __init__(self, batch_size=1000, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.result = ImportResult()
+        self.seen = set()  # phone numbers already handled earlier in the file
+
+    def run(self, records):
+        batch = []
+        for row_number, record in records:
+            batch.append((row_number, record))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        self.result.errors.sort()  # error file in file order
+        return self.result
+
+    def clean(self, row_number, record):
+        if record is None:
+            self.result.errors.append((row_number, "", "Malformed record."))
+            return None
+
+        values = {}
+        for name in IMPORT_FIELDS:
+            value = record.get(name)
+            if isinstance(value, (dict, list)):
+                self.result.errors.append((row_number, "", f"{name} must be a single value."))
+                return None
+            # JSON numbers arrive as numbers, not text
+            text = "" if value is None else str(value)
+            values[name] = text.strip() or None
+        phone_number = values["phone_number"]
+        if not phone_number:
+            self.result.errors.append((row_number, "", "phone_number is required."))
+            return None
+        try:
+            phone_regex(phone_number)
+        except ValidationError as e:
+            self.result.errors.append((row_number, phone_number, e.messages[0]))
+            return None
+        if values["location"] and len(values["location"]) > Customer._meta.get_field("location").max_length:
+            self.result.errors.append((row_number, phone_number, "location is too long."))
+            return None
+        return values
+
+    def import_batch(self, batch):
+        rows = {}
+        for row_number, record in batch:
+            values = self.clean(row_number, record)
+            if values is None:
+                continue
+            phone_number = values["phone_number"]
+            if phone_number in self.seen or phone_number in rows:
+                self.result.duplicates += 1
+                self.result.errors.append((row_number, phone_number, "Duplicate phone number in file."))
+                continue
+            rows[phone_number] = (row_number, values)
+
+        if not rows:
+            return
+
+        try:
+            with transaction.atomic():
+                created, existing = self.insert_new(rows)
+        except IntegrityError:
+            # A concurrent insert took one of the numbers after our check: one row at a time
+            created, existing = self.insert_each(rows)
+
+        for phone_number in existing:
+            row_number, _ = rows[phone_number]
+            self.result.duplicates += 1
+            self.result.errors.append((row_number, phone_number, "A customer with this phone number already exists."))
+        self.result.created += created
+        self.seen.update(rows)
+
+    def insert_each(self, rows):
+        """insert_new row by row, so a row that conflicts again is rejected alone."""
+        created, existing = 0, []
+        for phone_number, row in rows.items():
+            try:
+                with transaction.atomic():
+                    row_created, row_existing = self.insert_new({phone_number: row})
+            except IntegrityError:
+                row_number, _ = row
+                self.result.errors.append((row_number, phone_number, "Could not be saved, try again."))
+                continue
+            created += row_created
+            existing += row_existing
+        return created, existing
+
+    def insert_new(self, rows):
+        """Insert the rows whose phone number is not taken yet; returns (created, taken numbers)."""
+        existing = set(
+            Customer.objects.filter(phone_number__in=rows.keys()).values_list("phone_number", flat=True)
+        )
+        customers = [
+            Customer(**values) for phone_number, (_, values) in rows.items() if phone_number not in existing
+        ]
+        if customers and not self.dry_run:
+            Customer.objects.bulk_create_with_ids(customers)
+            # bulk_create sends no post_save, so tell the phone resolver directly
+            added = {customer.phone_number: customer.customer_id for customer in customers}
+            transaction.on_commit(lambda: publish_recent(added))
+        return len(customers), sorted(existing, key=lambda phone_number: rows[phone_number][0])
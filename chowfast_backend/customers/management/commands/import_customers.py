@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from customers.importer import CustomerImporter, ImportFileError, detect_format, iter_records
+
+
+class Command(BaseCommand):
+    help = "Bulk import customers from a CSV or JSONL file (phone_number, location, delivery_address)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            default=None,
+            help='File format (default: from the file extension)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows validated, deduplicated and inserted per batch',
+        )
+        parser.add_argument(
+            '--errors',
+            default=None,
+            help='Write rejected rows (row, phone_number, error) to this CSV file',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and deduplicate without inserting anything',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        importer = CustomerImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        started = time.monotonic()
+        try:
+            with open(path, 'rb') as fh:
+                result = importer.run(iter_records(fh, fmt))
+        except OSError as e:
+            raise CommandError(str(e))
+        except ImportFileError as e:
+            message = str(e)
+            if not options['dry_run']:
+                # Batches before the bad row are saved; a rerun reports them as duplicates
+                message += f" {importer.result.created} customers were imported before it."
+            raise CommandError(message)
+        elapsed = time.monotonic() - started
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='') as fh:
+                result.write_errors(fh)
+
+        verb = "would be imported" if options['dry_run'] else "imported"
+        self.stdout.write(
+            f"{result.created} customers {verb} in {elapsed:.1f}s, "
+            f"{result.duplicates} duplicates, {len(result.errors)} rows rejected"
+        )
+        if result.errors and not options['errors']:
+            self.stdout.write("Pass --errors <file> to get the rejected rows")
+
+
+# python manage.py import_customers partner_customers.csv --errors rejected.csv
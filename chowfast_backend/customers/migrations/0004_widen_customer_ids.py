@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:24
+
+from core.ids import create_sequence, drop_sequence, format_id
+from django.db import migrations
+from django.db.models import Max
+
+
+def widen_customer_ids(apps, schema_editor):
+    """CUST-00042 -> CUST-00000042, then start the sequence after the highest one."""
+    Customer = apps.get_model("customers", "Customer")
+    customers = Customer.objects.using(schema_editor.connection.alias)
+
+    batch = []
+    for customer in customers.only("pk").order_by("pk").iterator(chunk_size=2000):
+        customer.customer_id = format_id("CUST-", customer.pk)
+        batch.append(customer)
+        if len(batch) >= 2000:
+            customers.bulk_update(batch, ["customer_id"])
+            batch = []
+    if batch:
+        customers.bulk_update(batch, ["customer_id"])
+
+    start = (customers.aggregate(max_pk=Max("pk"))["max_pk"] or 0) + 1
+    create_sequence(apps, schema_editor, "customer", start)
+
+
+def restore_customer_ids(apps, schema_editor):
+    Customer = apps.get_model("customers", "Customer")
+    customers = Customer.objects.using(schema_editor.connection.alias)
+    batch = list(customers.only("pk"))
+    for customer in batch:
+        customer.customer_id = f"CUST-{str(customer.pk).zfill(5)}"
+    customers.bulk_update(batch, ["customer_id"], batch_size=2000)
+    drop_sequence(apps, schema_editor, "customer")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('customers', '0003_customer_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(widen_customer_ids, restore_customer_ids),
+    ]
@@ -1,5 +1,21 @@
+from core.ids import allocate_ids, format_id
 from django.db import models
 
+CUSTOMER_ID_SEQUENCE = "customer"
+
+
+def format_customer_id(value):
+    return format_id("CUST-", value)
+
+
+class CustomerManager(models.Manager):
+    def bulk_create_with_ids(self, customers, batch_size=None):
+        """bulk_create with customer_id assigned up front: one INSERT per batch."""
+        values = allocate_ids(CUSTOMER_ID_SEQUENCE, len(customers))
+        for customer, value in zip(customers, values):
+            customer.customer_id = format_customer_id(value)
+        return self.bulk_create(customers, batch_size=batch_size)
+
 
 class Customer(models.Model):
     customer_id = models.CharField(max_length=15, unique=True, editable=False, null=True, blank=True, db_index=True)
@@ -7,17 +23,32 @@ class Customer(models.Model):
     location = models.CharField(max_length=100, null=True, blank=True)
     delivery_address = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CustomerManager()
 
     class Meta:
         db_table = "customers"
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # Keyset pagination of the customer list (api.pagination)
+            models.Index(fields=["-created_at", "-id"], name="customer_created_id_idx"),
+        ]
+
+    # Number as loaded, so customers.signals can tell when it changes (no extra SELECT)
+    _loaded_phone_number = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_phone_number = instance.__dict__.get("phone_number")
+        return instance
 
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
+        # customer_id is allocated before the INSERT (core.ids), so creating is one write
+        if self._state.adding and not self.customer_id:
+            self.customer_id = format_customer_id(allocate_ids(CUSTOMER_ID_SEQUENCE)[0])
         super().save(*args, **kwargs)
-        if is_new and not self.customer_id:
-            self.customer_id = f"CUST-{str(self.pk).zfill(5)}"
-            Customer.objects.filter(pk=self.pk).update(customer_id=self.customer_id)
 
     def __str__(self):
         return f"{self.customer_id or 'Pending ID'} - {self.phone_number}"
@@ -0,0 +1,235 @@
+"""
+phone_number -> customer_id resolution for inbound WhatsApp messages.
+
+Most senders are not customers, so the resolver is built to answer "unknown"
+without touching the database:
+
+1. a per-process LRU of known numbers (entries expire after
+   CUSTOMER_RESOLVER_TTL seconds, which bounds staleness after a number
+   changes hands);
+2. a bloom filter of every phone number in the table, rebuilt every
+   CUSTOMER_RESOLVER_REBUILD_SECONDS by a background thread (lookups keep
+   using the previous filter, or the database until the first one is
+   built). "Not in the filter" is definitive for numbers that existed at
+   build time;
+3. numbers created or changed since the build are written to the shared
+   cache (publish_recent, from customers.signals and the bulk importer),
+   and a filter miss checks that key (a cache read, never a query). With a
+   per-process cache (LocMemCache) this only covers writes made by the
+   same process, so run Redis in production.
+
+Only filter hits go to the database; the ones that find nothing are counted
+as false positives. Deleted customers and numbers that changed hands are
+dropped from the LRU of the process that made the change; other processes
+see it once their entry's TTL runs out.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .models import Customer
+
+logger = logging.getLogger(__name__)
+
+RECENT_KEY = "customers:resolver:recent:{}"
+
+
+def normalize_phone(phone_number):
+    """'+234 801 234 5678' / '2348012345678' -> '+2348012345678'."""
+    phone_number = "".join((phone_number or "").split())
+    if phone_number and phone_number[0] != "+":
+        phone_number = f"+{phone_number}"
+    return phone_number
+
+
+def recent_key(phone_number):
+    return RECENT_KEY.format(phone_number)
+
+
+def publish_recent(customer_ids):
+    """
+    Record {phone_number: customer_id} as added since the last rebuild. The
+    keys outlive the rebuild interval, so every process's next filter
+    already contains them when they expire.
+    """
+    cache.set_many(
+        {recent_key(phone_number): customer_id for phone_number, customer_id in customer_ids.items()},
+        timeout=settings.CUSTOMER_RESOLVER_REBUILD_SECONDS * 2,
+    )
+    resolver = get_phone_resolver()
+    for phone_number in customer_ids:
+        resolver.forget(phone_number)
+
+
+def retract_recent(phone_number):
+    cache.delete(recent_key(phone_number))
+    get_phone_resolver().forget(phone_number)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class PhoneResolver:
+    def __init__(self):
+        self.max_size = settings.CUSTOMER_RESOLVER_LRU_SIZE
+        self.ttl = settings.CUSTOMER_RESOLVER_TTL
+        self.rebuild_seconds = settings.CUSTOMER_RESOLVER_REBUILD_SECONDS
+        self.error_rate = settings.CUSTOMER_RESOLVER_FALSE_POSITIVE_RATE
+
+        self._lru = OrderedDict()  # phone_number -> (customer_id, expires_at)
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = 0.0
+        self._rebuilding = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.counters = {
+                "lookups": 0,
+                "lru_hits": 0,
+                "filter_negatives": 0,  # answered "unknown" without a query
+                "recent_hits": 0,  # created after the last rebuild
+                "db_lookups": 0,
+                "db_hits": 0,
+                "false_positives": 0,  # filter said maybe, database said no
+            }
+
+    def count(self, *names):
+        # Lookups run on many threads at once; += on a shared dict is not atomic
+        with self._lock:
+            for name in names:
+                self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters["lookups"]
+        found = counters["lru_hits"] + counters["recent_hits"] + counters["db_hits"]
+        unknown = counters["filter_negatives"] + counters["false_positives"]
+        counters.update(
+            {
+                "hit_rate": found / lookups if lookups else 0.0,
+                "no_query_rate": (lookups - counters["db_lookups"]) / lookups if lookups else 0.0,
+                "false_positive_rate": counters["false_positives"] / unknown if unknown else 0.0,
+                "lru_size": len(self._lru),
+                "filter_bits": self._bloom.size if self._bloom else 0,
+                "filter_age_seconds": round(time.monotonic() - self._built_at) if self._bloom else None,
+            }
+        )
+        return counters
+
+    def rebuild(self):
+        """Build a fresh filter from the table and swap it in."""
+        started = time.monotonic()
+        phone_numbers = Customer.objects.values_list("phone_number", flat=True)
+        # Headroom so the filter stays accurate as customers are added until the next rebuild
+        bloom = BloomFilter(int(phone_numbers.count() * 1.2) + 1000, self.error_rate)
+        for phone_number in phone_numbers.order_by().iterator(chunk_size=5000):
+            bloom.add(phone_number)
+        with self._lock:
+            self._bloom = bloom
+            self._built_at = started
+
+    def _ensure_filter(self):
+        """Start a background rebuild if there is no filter yet or it is due; never waits for one."""
+        if self._bloom is not None and time.monotonic() - self._built_at < self.rebuild_seconds:
+            return
+        with self._lock:
+            if self._rebuilding:
+                return  # already under way; keep serving the current filter
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, name="phone-resolver-rebuild", daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Phone resolver filter rebuild failed")
+        finally:
+            self._rebuilding = False
+            connection.close()  # This thread's own connection
+
+    def _remember(self, phone_number, customer_id):
+        with self._lock:
+            self._lru[phone_number] = (customer_id, time.monotonic() + self.ttl)
+            self._lru.move_to_end(phone_number)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def forget(self, phone_number):
+        with self._lock:
+            self._lru.pop(phone_number, None)
+
+    def resolve(self, phone_number):
+        """Return the customer_id for phone_number, or None for unknown numbers."""
+        phone_number = normalize_phone(phone_number)
+
+        with self._lock:
+            self.counters["lookups"] += 1
+            entry = self._lru.get(phone_number)
+            if entry and entry[1] > time.monotonic():
+                self._lru.move_to_end(phone_number)
+                self.counters["lru_hits"] += 1
+                return entry[0]
+
+        self._ensure_filter()
+        bloom = self._bloom  # None until the first build is done: ask the database
+        if bloom is not None and phone_number not in bloom:
+            customer_id = cache.get(recent_key(phone_number))
+            if customer_id:
+                self.count("recent_hits")
+                self._remember(phone_number, customer_id)
+                return customer_id
+            self.count("filter_negatives")
+            return None
+
+        customer_id = (
+            Customer.objects.filter(phone_number=phone_number).values_list("customer_id", flat=True).first()
+        )
+        if customer_id is None:
+            self.count("db_lookups", "false_positives")
+            return None
+        self.count("db_lookups", "db_hits")
+        self._remember(phone_number, customer_id)
+        return customer_id
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_phone_resolver():
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = PhoneResolver()
+    return _resolver
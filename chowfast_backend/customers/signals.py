@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Customer
+from .resolver import publish_recent, retract_recent
+
+
+@receiver(post_save, sender=Customer)
+def update_phone_resolver(sender, instance, created, **kwargs):
+    """Tell the phone resolver about new numbers and numbers that changed hands."""
+    previous = instance._loaded_phone_number
+    if not created and previous == instance.phone_number:
+        return
+    instance._loaded_phone_number = instance.phone_number
+
+    def publish():
+        if previous and previous != instance.phone_number:
+            retract_recent(previous)
+        publish_recent({instance.phone_number: instance.customer_id})
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_delete, sender=Customer)
+def forget_deleted_phone(sender, instance, **kwargs):
+    """A deleted customer's number must stop resolving (the filter only ever says "maybe")."""
+    phone_number = instance._loaded_phone_number or instance.phone_number
+    transaction.on_commit(lambda: retract_recent(phone_number))
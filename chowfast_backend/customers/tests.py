@@ -1,3 +1,89 @@
+import io
+import tempfile
+import threading
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
 from django.test import TestCase
 
-# Create your tests here.
+from .importer import CustomerImporter, ImportFileError, iter_records
+from .models import Customer
+from .resolver import PhoneResolver, get_phone_resolver
+
+
+class CustomerImporterTests(TestCase):
+    def test_jsonl_values_that_are_not_strings(self):
+        stream = io.BytesIO(
+            b'{"phone_number": 2348012345678, "location": "Yaba"}\n'
+            b'{"phone_number": "+2348022222222", "location": 12}\n'
+            b'{"phone_number": ["+2348033333333"]}\n'
+            b'{"phone_number": null}\n'
+        )
+        result = CustomerImporter().run(iter_records(stream, fmt="jsonl"))
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(Customer.objects.get().location, "12")
+        self.assertEqual(
+            [(row, phone_number) for row, phone_number, _ in result.errors], [(1, "2348012345678"), (3, ""), (4, "")]
+        )
+        self.assertEqual(result.errors[1][2], "phone_number must be a single value.")
+
+    def test_unreadable_files_name_the_row(self):
+        latin1 = "phone_number,location\n+2348011111111,Yaba\n+2348022222222,Ik\u00e9ja\n".encode("latin-1")
+        oversized = b"phone_number,location\n+2348011111111," + b"x" * 200_000 + b"\n"
+        for stream, row in ((latin1, 3), (oversized, 2)):
+            with self.assertRaises(ImportFileError) as caught:
+                list(iter_records(io.BytesIO(stream)))
+            self.assertEqual(caught.exception.row, row)
+
+        with tempfile.NamedTemporaryFile(suffix=".csv") as fh:
+            fh.write(latin1)
+            fh.flush()
+            with self.assertRaisesMessage(CommandError, "Row 3: the file is not UTF-8 encoded."):
+                call_command("import_customers", fh.name, stdout=io.StringIO())
+
+    def test_rows_that_conflict_twice_are_rejected_alone(self):
+        stream = io.BytesIO(b"phone_number\n+2348011111111\n+2348022222222\n")
+        bulk_create = Customer.objects.bulk_create_with_ids
+
+        def conflict(customers):
+            # Another writer keeps taking this number between the check and the insert
+            if any(customer.phone_number == "+2348022222222" for customer in customers):
+                raise IntegrityError("UNIQUE constraint failed: customers.phone_number")
+            return bulk_create(customers)
+
+        with patch.object(Customer.objects, "bulk_create_with_ids", side_effect=conflict):
+            result = CustomerImporter().run(iter_records(stream))
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors, [(3, "+2348022222222", "Could not be saved, try again.")])
+
+
+class PhoneResolverTests(TestCase):
+    def test_deleted_customer_stops_resolving(self):
+        customer = Customer.objects.create(phone_number="+2348012345678")
+        resolver = get_phone_resolver()
+        resolver.rebuild()
+        self.assertEqual(resolver.resolve("+2348012345678"), customer.customer_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.delete()
+        self.assertIsNone(resolver.resolve("+2348012345678"))
+
+    def test_filter_is_built_off_the_request_path(self):
+        customer = Customer.objects.create(phone_number="+2348012345678")
+        building, release = threading.Event(), threading.Event()
+
+        def slow_rebuild():
+            building.set()
+            release.wait(5)
+
+        resolver = PhoneResolver()
+        with patch.object(resolver, "rebuild", side_effect=slow_rebuild) as rebuild:
+            # No filter yet: answered from the database without waiting for the build
+            self.assertEqual(resolver.resolve("+2348012345678"), customer.customer_id)
+            self.assertIsNone(resolver.resolve("+2348099999999"))
+            self.assertTrue(building.wait(5))
+            release.set()
+        self.assertEqual(rebuild.call_count, 1)
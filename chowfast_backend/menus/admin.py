@@ -1,24 +1,30 @@
 from django.contrib import admin
+from django.db.models import Q
+from django.utils import timezone
 
-from .models import MenuItem
+from .models import ImageJob, MenuItem
+from .search import text_condition
 
 
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
-    list_display = ('name', 'vendor', 'category', 'price', 'available', 'created_at', 'image_preview')
-    list_filter = ('vendor', 'category', 'available')
-    search_fields = ('name', 'description', 'vendor__business_name')
+    list_display = ('name', 'vendor', 'category', 'price', 'available', 'image_status', 'created_at', 'image_preview')
+    list_filter = ('vendor', 'category', 'available', 'image_status')
+    # Item text is routed through menus.search (FTS5 / trigram indexes) instead of icontains
+    search_fields = ('name', 'description', 'category', 'vendor__business_name')
     list_editable = ('price', 'available', 'category')
     list_per_page = 25
     date_hierarchy = 'created_at'
     ordering = ('-created_at',)
-    readonly_fields = ('id', 'created_at', 'image_preview')
+    readonly_fields = ('id', 'created_at', 'image_status', 'image_preview')
+    list_select_related = ('vendor',)
+    autocomplete_fields = ('vendor',)
     fieldsets = (
         (None, {
             'fields': ('vendor', 'name', 'category', 'price', 'available')
         }),
         ('Details', {
-            'fields': ('description', 'image', 'image_preview')
+            'fields': ('description', 'image', 'image_status', 'image_preview')
         }),
         ('Metadata', {
             'fields': ('id', 'created_at'),
@@ -26,11 +32,46 @@ class MenuItemAdmin(admin.ModelAdmin):
         }),
     )
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('vendor')
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        # Every match, paged by the changelist; vendors by the start of their business name
+        condition = Q(vendor__business_name__istartswith=search_term)
+        matches = text_condition(search_term)
+        if matches is not None:
+            condition |= matches
+        return queryset.filter(condition), False
 
     def image_preview(self, obj):
         if obj.image_url:
             return admin.utils.format_html('<img src="{}" style="max-height: 50px;"/>', obj.image_url)
         return "-"
-    image_preview.short_description = "Image"
\ No newline at end of file
+    image_preview.short_description = "Image"
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ('action', 'public_id', 'source', 'status', 'attempts', 'next_attempt_at', 'finished_at', 'created_at')
+    list_filter = ('action', 'status', 'created_at')
+    search_fields = ('=item_id', 'public_id', 'source')
+    ordering = ('-created_at',)
+    readonly_fields = (
+        'action', 'item_id', 'public_id', 'source', 'filename', 'status', 'attempts', 'last_error',
+        'next_attempt_at', 'finished_at', 'created_at',
+    )
+    exclude = ('payload',)  # Raw image bytes
+    actions = ['retry_now']
+
+    def has_add_permission(self, request):
+        # Jobs are queued by menu item saves, not via admin
+        return False
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_now(self, request, queryset):
+        updated = queryset.filter(status=ImageJob.STATUS_FAILED).update(
+            status=ImageJob.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} image jobs queued for retry.")
@@ -0,0 +1,127 @@
+"""
+Where menu item images live.
+
+MenuItem.image holds the stored value a backend returns (CloudinaryField's
+"image/upload/v<version>/<public_id>.<format>" form). Only the
+process_image_jobs worker writes to a backend; requests just build URLs.
+MENU_IMAGE_STORAGE picks the backend: Cloudinary in production, the local
+filesystem for tests and offline development.
+"""
+
+import functools
+import io
+import os
+import re
+from pathlib import Path
+
+from cloudinary import CloudinaryResource, uploader
+from cloudinary.models import CLOUDINARY_FIELD_DB_RE
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def get_image_storage():
+    """Return the backend configured by MENU_IMAGE_STORAGE."""
+    return _load_storage(settings.MENU_IMAGE_STORAGE)
+
+
+@functools.cache
+def _load_storage(path):
+    return import_string(path)()
+
+
+def stored_value(image):
+    """The string MenuItem.image keeps in the database, or None."""
+    if isinstance(image, CloudinaryResource):
+        return image.get_prep_value()
+    return str(image) if image else None
+
+
+def parse(value):
+    """A stored value as a CloudinaryResource (public_id, format, version)."""
+    match = re.match(CLOUDINARY_FIELD_DB_RE, stored_value(value))
+    return CloudinaryResource(
+        public_id=match.group("public_id"),
+        format=match.group("format"),
+        version=match.group("version"),
+        type=match.group("type") or "upload",
+        resource_type=match.group("resource_type") or "image",
+    )
+
+
+class BaseImageStorage:
+    def save(self, public_id, content, filename):
+        """Store image bytes under public_id; return the stored value."""
+        raise NotImplementedError
+
+    def rename(self, value, public_id):
+        """Move a stored image to public_id without re-uploading it; return the new stored value."""
+        raise NotImplementedError
+
+    def delete(self, value):
+        raise NotImplementedError
+
+    def url(self, value):
+        raise NotImplementedError
+
+
+class CloudinaryImageStorage(BaseImageStorage):
+    def save(self, public_id, content, filename):
+        resource = uploader.upload_resource(
+            io.BytesIO(content),
+            public_id=public_id,
+            resource_type="image",
+            overwrite=True,
+            invalidate=True,
+        )
+        return resource.get_prep_value()
+
+    def rename(self, value, public_id):
+        # Server-side: nothing is downloaded or uploaded again
+        result = uploader.rename(parse(value).public_id, public_id, overwrite=True, invalidate=True)
+        return CloudinaryResource(
+            public_id=result["public_id"],
+            format=result.get("format"),
+            version=result.get("version"),
+            type="upload",
+            resource_type="image",
+        ).get_prep_value()
+
+    def delete(self, value):
+        uploader.destroy(parse(value).public_id, invalidate=True)
+
+    def url(self, value):
+        return parse(value).build_url(secure=True)
+
+
+class LocalImageStorage(BaseImageStorage):
+    """Files under MENU_IMAGE_LOCAL_ROOT, served from MENU_IMAGE_LOCAL_URL."""
+
+    def path(self, value):
+        resource = parse(value)
+        name = f"{resource.public_id}.{resource.format}" if resource.format else resource.public_id
+        return Path(settings.MENU_IMAGE_LOCAL_ROOT) / name
+
+    def save(self, public_id, content, filename):
+        extension = os.path.splitext(filename)[1].lstrip(".").lower()
+        value = f"{public_id}.{extension}" if extension else public_id
+        path = self.path(value)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return value
+
+    def rename(self, value, public_id):
+        resource = parse(value)
+        new_value = f"{public_id}.{resource.format}" if resource.format else public_id
+        new_path = self.path(new_value)
+        new_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.path(value), new_path)
+        return new_value
+
+    def delete(self, value):
+        self.path(value).unlink(missing_ok=True)
+
+    def url(self, value):
+        resource = parse(value)
+        name = f"{resource.public_id}.{resource.format}" if resource.format else resource.public_id
+        return f"{settings.MENU_IMAGE_LOCAL_URL}{name}"
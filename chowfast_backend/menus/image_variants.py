@@ -0,0 +1,93 @@
+"""
+Resized copies of menu images, so clients download what they display.
+
+When an image is uploaded, the process_image_jobs worker renders WebP and
+JPEG copies at VARIANT_WIDTHS in a process pool (resizing is CPU bound) and
+stores them next to the original. MenuItem.image_variants keeps the stored
+value of each copy:
+
+    {"webp": {"160": value, "320": value, ...}, "jpeg": {...}}
+
+ClientImage describes what a client asked for (display width, whether it
+takes WebP); MenuItem.image_url_for() serves the smallest copy at least
+that wide, or the original.
+"""
+
+import io
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+VARIANT_WIDTHS = (160, 320, 640)
+# format -> (Pillow encoder, file extension, save options)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def variant_public_id(public_id, width):
+    return f"{public_id}_w{width}"
+
+
+def render_variants(content):
+    """
+    [(format, width, bytes)] for an uploaded image: every VARIANT_WIDTHS width
+    narrower than the original, in every format. Empty if the bytes are not
+    an image Pillow can read. Runs in a worker process: no Django, no I/O.
+    """
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            image = ImageOps.exif_transpose(image)  # Phone photos are often stored rotated
+            image = image.convert("RGB")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return []
+
+    variants = []
+    for width in VARIANT_WIDTHS:
+        if width >= image.width:
+            break
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for name, (encoder, _, options) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, encoder, **options)
+            variants.append((name, width, buffer.getvalue()))
+    return variants
+
+
+def pick_variant(variants, width=None, webp=False):
+    """Stored value of the smallest variant at least `width` wide, or None for the original."""
+    if width is None:
+        return None
+    widths = (variants or {}).get("webp" if webp else "jpeg", {})
+    wide_enough = sorted(int(stored) for stored in widths if int(stored) >= width)
+    return widths[str(wide_enough[0])] if wide_enough else None
+
+
+@dataclass(frozen=True)
+class ClientImage:
+    """The image a client wants: `width` in device pixels (None for the original), WebP or JPEG."""
+
+    width: int = None
+    webp: bool = False
+
+    @classmethod
+    def from_request(cls, request):
+        """From ?image_width= and whether the Accept header lists image/webp."""
+        try:
+            width = int(request.query_params.get("image_width", ""))
+        except ValueError:
+            width = None
+        if width is not None and width > 0:
+            # Snap to a rendered width (None past the widest), so clients share cached menus
+            width = next((candidate for candidate in VARIANT_WIDTHS if candidate >= width), None)
+        else:
+            width = None
+        return cls(width=width, webp="image/webp" in request.headers.get("Accept", ""))
+
+    @property
+    def key(self):
+        if self.width is None:
+            return "full"
+        return f"{'webp' if self.webp else 'jpeg'}-{self.width}"
@@ -0,0 +1,126 @@
+import random
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from core.ids import allocate_ids
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from menus.models import MenuItem
+from menus.search import MenuFilters, rebuild_typo_index, search_menu
+from users.models import User
+from vendors.models import VENDOR_ID_SEQUENCE, Vendor, format_vendor_id
+
+DISHES = [
+    "jollof", "rice", "fried", "plantain", "dodo", "moi", "egusi", "soup", "pounded", "yam", "amala",
+    "ewedu", "efo", "riro", "suya", "beef", "chicken", "goat", "meat", "pepper", "pepperedsoup", "fish",
+    "catfish", "ofada", "stew", "beans", "porridge", "akara", "puff", "shawarma", "spaghetti", "noodles",
+    "asun", "gizdodo", "nkwobi", "abacha", "okra", "ogbono", "banga", "edikaikong", "afang", "tuwo",
+    "masa", "kilishi", "zobo", "chapman", "smoothie", "salad", "coleslaw", "burger", "pizza", "wrap",
+]
+STYLES = ["party", "smoky", "spicy", "special", "mini", "jumbo", "classic", "native", "village", "royal"]
+CATEGORIES = ["Rice", "Soups", "Swallow", "Grills", "Sides", "Drinks", "Snacks", "Pasta", "Breakfast"]
+BATCH_SIZE = 10_000
+
+QUERIES = {
+    "one word": ["jollof", "suya", "egusi", "shawarma", "plantain", "catfish"],
+    "two words": ["jollof rice", "pounded yam", "pepper soup", "fried plantain", "goat meat"],
+    "typo": ["jolof rice", "egusy", "shawama", "spagetti", "plantian"],
+    "filtered": ["rice", "chicken", "beans"],
+}
+
+
+class Command(BaseCommand):
+    help = "Time menu search (bounded FTS5 candidates / trigram, with typo fallback) against a large synthetic menu"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1_000_000, help='Menu items to create')
+        parser.add_argument('--vendors', type=int, default=2000, help='Vendors the items belong to')
+        parser.add_argument('--repeat', type=int, default=20, help='Times each query is timed')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        try:
+            started = time.perf_counter()
+            self.create_menu(options['items'], options['vendors'])
+            self.stdout.write(f"Created {options['items']} menu items in {time.perf_counter() - started:.1f}s")
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            started = time.perf_counter()
+            rebuild_typo_index()
+            self.stdout.write(f"Typo index built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+            filters = MenuFilters(category="Rice", min_price=Decimal("1000"), max_price=Decimal("4000"), available=True)
+            for label, queries in QUERIES.items():
+                self.bench(label, queries, filters if label == "filtered" else MenuFilters(), options['repeat'])
+        finally:
+            self.cleanup()
+
+    def create_menu(self, count, vendor_count):
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                User(email=f"{self.prefix}{i}@example.com", user_type="vendor", password="!")
+                for i in range(vendor_count)
+            )
+            vendors = Vendor.objects.bulk_create(
+                Vendor(
+                    user=user,
+                    vendor_id=format_vendor_id(vendor_id),
+                    business_name=f"{self.prefix}vendor",
+                    online=self.rng.random() < 0.5,
+                    verified=True,
+                )
+                for user, vendor_id in zip(users, allocate_ids(VENDOR_ID_SEQUENCE, vendor_count))
+            )
+
+        for start in range(0, count, BATCH_SIZE):
+            with transaction.atomic():
+                # bulk_create: no per-item signals; the FTS5 triggers still index every row
+                MenuItem.objects.bulk_create(
+                    self.random_item(self.rng.choice(vendors)) for _ in range(min(BATCH_SIZE, count - start))
+                )
+
+    def random_item(self, vendor):
+        words = self.rng.sample(DISHES, self.rng.randint(1, 3))
+        if self.rng.random() < 0.3:
+            words.insert(0, self.rng.choice(STYLES))
+        return MenuItem(
+            vendor=vendor,
+            name=" ".join(words).capitalize(),
+            description=" ".join(self.rng.sample(DISHES + STYLES, 8)),
+            category=self.rng.choice(CATEGORIES),
+            price=Decimal(self.rng.randrange(300, 15000, 50)),
+            available=self.rng.random() < 0.85,
+        )
+
+    def bench(self, label, queries, filters, repeat):
+        timings = []
+        empty = 0
+        for _ in range(repeat):
+            for query in queries:
+                started = time.perf_counter()
+                results = search_menu(query, filters)
+                timings.append((time.perf_counter() - started) * 1000)
+                empty += not results
+        timings.sort()
+        self.stdout.write(
+            f"{label:>10}: {len(timings)} searches, p50 {statistics.median(timings):.1f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms, max {timings[-1]:.1f} ms, {empty} empty"
+        )
+
+    def cleanup(self):
+        vendors = Vendor.objects.filter(business_name=f"{self.prefix}vendor").values("pk")
+        with transaction.atomic():
+            # Raw delete: a million per-item post_delete signals (tombstones, image cleanup) is not a cleanup
+            sql, params = vendors.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM menu_items WHERE vendor_id IN ({sql})", params)
+            Vendor.objects.filter(business_name=f"{self.prefix}vendor").delete()
+            User.objects.filter(email__startswith=self.prefix).delete()
+
+
+# python manage.py bench_menu_search --items 1000000 --vendors 2000
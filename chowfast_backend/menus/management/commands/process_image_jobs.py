@@ -0,0 +1,184 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from menus.image_storage import get_image_storage, parse, stored_value
+from menus.image_variants import VARIANT_FORMATS, render_variants, variant_public_id
+from menus.models import ImageJob, MenuItem
+
+logger = logging.getLogger(__name__)
+
+
+def run_job(job, rendered):
+    """
+    Carry out one job against the image storage; `rendered` are an upload's
+    resized copies (render_variants). Runs in a worker thread and never
+    touches the database. Returns (job, stored value, stored variants,
+    error); error is None on success.
+    """
+    storage = get_image_storage()
+    try:
+        variants = {}
+        if job.action == ImageJob.UPLOAD:
+            value = storage.save(job.public_id, bytes(job.payload), job.filename)
+            for name, width, content in rendered:
+                extension = VARIANT_FORMATS[name][1]
+                variants.setdefault(name, {})[str(width)] = storage.save(
+                    variant_public_id(job.public_id, width), content, f"{width}.{extension}"
+                )
+        elif job.action == ImageJob.RENAME:
+            value = storage.rename(job.source, job.public_id)
+            for name, widths in job.variants.items():
+                variants[name] = {
+                    width: storage.rename(stored, variant_public_id(job.public_id, width))
+                    for width, stored in widths.items()
+                }
+        else:
+            value = None
+            storage.delete(job.source)
+            for widths in job.variants.values():
+                for stored in widths.values():
+                    storage.delete(stored)
+        return job, value, variants, None
+    except Exception as e:
+        return job, None, None, str(e) or e.__class__.__name__
+
+
+class Command(BaseCommand):
+    help = "Upload (with resized variants), rename and delete queued menu images, with retries and backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Jobs claimed per round',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Jobs run against the image storage at once',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=2,
+            help='Processes resizing uploads into variants',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Give up on a job after this many failed attempts',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for jobs instead of exiting once there are none',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when there are no jobs (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        # Resizing is CPU bound: threads would take turns on the GIL
+        with ProcessPoolExecutor(max_workers=max(1, options['processes'])) as self.process_pool:
+            while True:
+                processed = self.drain(options)
+                if processed:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['poll_interval'])
+
+    def drain(self, options):
+        jobs = ImageJob.objects.claim_due(options['batch_size'], options['max_attempts'])
+        if not jobs:
+            return 0
+
+        # An upload or rename the item has moved on from (newer job, or item deleted) is not worth doing
+        current = set(
+            MenuItem.objects.filter(image_job__in=[job.pk for job in jobs]).values_list("image_job_id", flat=True)
+        )
+        stale = [job.pk for job in jobs if job.action != ImageJob.DELETE and job.pk not in current]
+        if stale:
+            ImageJob.objects.filter(pk__in=stale).update(
+                status=ImageJob.STATUS_CANCELLED, payload=None, finished_at=timezone.now()
+            )
+        live = [job for job in jobs if job.pk not in stale]
+
+        if live:
+            uploads = [job for job in live if job.action == ImageJob.UPLOAD]
+            rendered = dict(
+                zip(
+                    [job.pk for job in uploads],
+                    self.process_pool.map(render_variants, [bytes(job.payload) for job in uploads]),
+                )
+            )
+            with ThreadPoolExecutor(max_workers=max(1, min(options['concurrency'], len(live)))) as pool:
+                results = list(pool.map(run_job, live, [rendered.get(job.pk, []) for job in live]))
+            self.record(results, options['max_attempts'])
+        return len(jobs)
+
+    def record(self, results, max_attempts):
+        done = 0
+        for job, value, variants, error in results:
+            if error is not None:
+                self.record_failure(job, error, max_attempts)
+                continue
+            if job.action != ImageJob.DELETE:
+                self.apply(job, value, variants)
+            ImageJob.objects.filter(pk=job.pk).update(
+                status=ImageJob.STATUS_DONE, payload=None, last_error="", finished_at=timezone.now()
+            )
+            done += 1
+        self.stdout.write(f"Processed {done} image jobs, {len(results) - done} failed")
+
+    def apply(self, job, value, variants):
+        """Point the item at the stored image, unless it moved on while the job ran."""
+        with transaction.atomic():
+            item = MenuItem.objects.select_for_update().select_related("vendor").filter(pk=job.item_id).first()
+            previous = stored_value(item.image) if item else None
+            if item is None or item.image_job_id != job.pk:
+                # Stored for nothing, unless the item's image lives under the same name
+                if previous is None or parse(previous).public_id != parse(value).public_id:
+                    ImageJob.objects.create(
+                        action=ImageJob.DELETE, item_id=job.item_id, source=value, variants=variants
+                    )
+                return
+
+            if previous and parse(previous).public_id != parse(value).public_id and job.action == ImageJob.UPLOAD:
+                # The replaced image was stored under another name
+                ImageJob.objects.create(
+                    action=ImageJob.DELETE, item_id=item.pk, source=previous, variants=item.image_variants
+                )
+            item.image = value
+            item.image_variants = variants
+            item.image_status = MenuItem.IMAGE_READY
+            if item.image_public_id != job.public_id:
+                # Renamed while the job ran: follow the name
+                item.image_job = ImageJob.objects.create(
+                    action=ImageJob.RENAME,
+                    item_id=item.pk,
+                    source=value,
+                    variants=variants,
+                    public_id=item.image_public_id,
+                )
+                item.image_status = MenuItem.IMAGE_PENDING
+            item.save(update_fields=["image", "image_variants", "image_status", "image_job"])
+
+    def record_failure(self, job, error, max_attempts):
+        if ImageJob.objects.record_failure(job, error, max_attempts):
+            logger.error(f"Giving up on image job {job.pk} ({job.action} for item {job.item_id}): {error}")
+        else:
+            logger.warning(f"Image job {job.pk} ({job.action}) failed (attempt {job.attempts}): {error}")
+
+
+# python manage.py process_image_jobs --loop --concurrency 4
@@ -0,0 +1,72 @@
+"""
+Pre-serialized vendor menus in the cache.
+
+A vendor's menu is rendered to JSON bytes once and stored under its current
+menu version. Any MenuItem save or delete (and any Vendor save) replaces the
+version, after the transaction commits, so the next read misses and rebuilds.
+Readers never see a stale body: a body is only reachable through the version
+it was built under.
+
+Versions are random tokens rather than counters, so a version key that was
+evicted or expired can never come back as an old value that still has a
+cached body. A version is only started once the vendor has been found; unknown
+vendor ids get a short-lived "missing" marker instead, so probing random ids
+neither fills the cache nor reaches the database on every request.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Seconds an unknown vendor id is answered from the cache (creating the vendor clears it sooner)
+MISSING_TIMEOUT = 60
+
+
+def version_key(vendor_id):
+    return f"menus:version:{vendor_id}"
+
+
+def body_key(vendor_id, version, variant):
+    return f"menus:menu:{vendor_id}:{version}:{variant}"
+
+
+def missing_key(vendor_id):
+    return f"menus:missing:{vendor_id}"
+
+
+def bump_version(vendor_id):
+    cache.set(version_key(vendor_id), uuid.uuid4().hex, timeout=settings.MENU_CACHE_TIMEOUT)
+    cache.delete(missing_key(vendor_id))
+
+
+def get_menu(vendor_id, build, variant="full"):
+    """
+    (version, body) for the vendor's menu. `build()` is only called on a miss
+    and returns the body bytes, or None when there is no such vendor.
+    Bodies differing by client (image variant) are cached apart.
+
+    body is None for an unknown vendor. version is None when the body could
+    not be tied to a version (another process started or replaced it while
+    this one was building); such a body is served but not cached.
+    """
+    version = cache.get(version_key(vendor_id))
+    if version is not None:
+        body = cache.get(body_key(vendor_id, version, variant))
+        if body is not None:
+            return version, body
+    elif cache.get(missing_key(vendor_id)):
+        return None, None
+
+    body = build()
+    if body is None:
+        cache.set(missing_key(vendor_id), True, timeout=MISSING_TIMEOUT)
+        return None, None
+    if version is None:
+        # The first reader to add() a version owns it; a body built by anyone
+        # else may predate a save that raced with the build
+        version = uuid.uuid4().hex
+        if not cache.add(version_key(vendor_id), version, timeout=settings.MENU_CACHE_TIMEOUT):
+            return None, body
+    cache.set(body_key(vendor_id, version, variant), body, timeout=settings.MENU_CACHE_TIMEOUT)
+    return version, body
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def number_existing_items(apps, schema_editor):
+    """Give existing items sequence numbers 1..n per vendor, oldest first."""
+    MenuItem = apps.get_model("menus", "MenuItem")
+    MenuSequence = apps.get_model("menus", "MenuSequence")
+    alias = schema_editor.connection.alias
+    items = MenuItem.objects.using(alias).only("pk", "vendor_id").order_by("vendor_id", "created_at", "pk")
+
+    last_seq = {}
+    batch = []
+    for item in items.iterator(chunk_size=2000):
+        last_seq[item.vendor_id] = item.change_seq = last_seq.get(item.vendor_id, 0) + 1
+        batch.append(item)
+        if len(batch) >= 2000:
+            MenuItem.objects.using(alias).bulk_update(batch, ["change_seq"])
+            batch = []
+    if batch:
+        MenuItem.objects.using(alias).bulk_update(batch, ["change_seq"])
+    MenuSequence.objects.using(alias).bulk_create(
+        (MenuSequence(vendor_id=vendor_pk, last_seq=seq) for vendor_pk, seq in last_seq.items()), batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0003_menuitem_updated_at'),
+        ('vendors', '0007_vendor_counter_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuSequence',
+            fields=[
+                ('vendor', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='menu_sequence', serialize=False, to='vendors.vendor')),
+                ('last_seq', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'menu_sequences',
+            },
+        ),
+        migrations.CreateModel(
+            name='MenuItemTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.UUIDField()),
+                ('change_seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'menu_item_tombstones',
+            },
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['vendor', 'change_seq'], name='menu_item_change_seq_idx'),
+        ),
+        migrations.AddField(
+            model_name='menuitemtombstone',
+            name='vendor',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='menu_tombstones', to='vendors.vendor'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitemtombstone',
+            index=models.Index(fields=['vendor', 'change_seq'], name='menu_tombstone_change_seq_idx'),
+        ),
+        migrations.RunPython(number_existing_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:05
+
+from core.search import create_text_indexes, drop_text_indexes
+from django.db import migrations
+
+# As of this migration
+TABLE = "menu_items"
+FIELDS = ("name", "description", "category")
+FTS_TABLE = "menu_items_fts"
+FTS_VOCAB_TABLE = "menu_items_fts_vocab"
+
+
+def create_search_index(apps, schema_editor):
+    create_text_indexes(schema_editor, TABLE, FIELDS, FTS_TABLE)
+    if schema_editor.connection.vendor == "sqlite":
+        # Distinct indexed words, read by menus.search.TypoIndex
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_VOCAB_TABLE}")
+    drop_text_indexes(schema_editor, TABLE, FIELDS, FTS_TABLE)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0002_search_indexes'),
+        ('menus', '0004_menu_change_seq'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
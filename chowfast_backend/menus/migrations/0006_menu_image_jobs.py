@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from core.search import rebuild_text_indexes
+from django.db import migrations, models
+
+
+def rebuild_search_index(apps, schema_editor):
+    # Adding a column with a default copies menu_items on SQLite
+    rebuild_text_indexes(schema_editor, "menu_items", ("name", "description", "category"), "menu_items_fts")
+
+
+def mark_existing_images_ready(apps, schema_editor):
+    MenuItem = apps.get_model("menus", "MenuItem")
+    MenuItem.objects.using(schema_editor.connection.alias).exclude(image__isnull=True).exclude(image="").update(
+        image_status="ready"
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0005_menu_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, rebuild_search_index),
+        migrations.AddField(
+            model_name='menuitem',
+            name='image_status',
+            field=models.CharField(choices=[('none', 'No image'), ('pending', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('upload', 'Upload'), ('rename', 'Rename'), ('delete', 'Delete')], max_length=10)),
+                ('item_id', models.UUIDField()),
+                ('public_id', models.CharField(blank=True, max_length=255)),
+                ('source', models.CharField(blank=True, max_length=255)),
+                ('payload', models.BinaryField(blank=True, null=True)),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'menu_image_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('status__in', ['pending', 'running'])), fields=['next_attempt_at'], name='menu_image_job_due_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='image_job',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='menus.imagejob'),
+        ),
+        migrations.RunPython(mark_existing_images_ready, migrations.RunPython.noop),
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
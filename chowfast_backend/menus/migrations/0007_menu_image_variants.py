@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:14
+
+from core.search import rebuild_text_indexes
+from django.db import migrations, models
+
+
+def rebuild_search_index(apps, schema_editor):
+    # Adding a column with a default copies menu_items on SQLite
+    rebuild_text_indexes(schema_editor, "menu_items", ("name", "description", "category"), "menu_items_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0006_menu_image_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, rebuild_search_index),
+        migrations.AddField(
+            model_name='imagejob',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:00
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0007_menu_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='menu_item_name_lower_idx'),
+        ),
+    ]
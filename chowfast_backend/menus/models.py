@@ -1,12 +1,131 @@
 import uuid
 
 from cloudinary.models import CloudinaryField
-from django.db import models
+from core.leases import LeasedJobManager
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, models, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
 from vendors.models import Vendor
 from django.utils.text import slugify
 
+from .image_storage import get_image_storage
+from .image_variants import pick_variant
+
+IMAGE_FOLDER = "ChowFast_menu_images"
+
+
+def next_change_seq(vendor_pk):
+    """
+    Next menu change sequence number of a vendor. Must run inside the
+    transaction making the change: the vendor's MenuSequence row stays locked
+    until it commits, so a vendor's changes become visible in sequence order
+    and a client that has seen N can never miss a change below N.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO menu_sequences (vendor_id, last_seq) VALUES (%s, 1) "
+            "ON CONFLICT (vendor_id) DO UPDATE SET last_seq = menu_sequences.last_seq + 1 "
+            "RETURNING last_seq",
+            [vendor_pk],
+        )
+        return cursor.fetchone()[0]
+
+
+def validate_image_upload(image):
+    """Reject uploads over MENU_IMAGE_MAX_UPLOAD_BYTES before their bytes are queued."""
+    if isinstance(image, UploadedFile) and image.size > settings.MENU_IMAGE_MAX_UPLOAD_BYTES:
+        limit_mb = settings.MENU_IMAGE_MAX_UPLOAD_BYTES / (1024 * 1024)
+        raise ValidationError({"image": f"Images may be at most {limit_mb:g} MB."})
+
+
+class ImageJobManager(LeasedJobManager):
+    claimed_status = "running"
+
+    def give_up(self, jobs, error):
+        for job in jobs:
+            job.give_up(error)
+
+
+class ImageJob(models.Model):
+    """
+    A menu image upload, rename or delete, recorded in the transaction that
+    saves the MenuItem and carried out later by the `process_image_jobs`
+    worker against the MENU_IMAGE_STORAGE backend.
+    """
+
+    UPLOAD = "upload"
+    RENAME = "rename"
+    DELETE = "delete"
+    ACTION_CHOICES = [(UPLOAD, "Upload"), (RENAME, "Rename"), (DELETE, "Delete")]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_CANCELLED, "Cancelled"),
+    ]
+
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # No foreign key: deletes outlive the item
+    item_id = models.UUIDField()
+    public_id = models.CharField(max_length=255, blank=True)  # Upload/rename target
+    source = models.CharField(max_length=255, blank=True)  # Stored value to rename/delete
+    variants = models.JSONField(default=dict, blank=True)  # Its resized copies (MenuItem.image_variants)
+    payload = models.BinaryField(blank=True, null=True)  # Upload bytes, cleared once processed
+    filename = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ImageJobManager()
+
+    class Meta:
+        db_table = "menu_image_jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="menu_image_job_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.public_id or self.source} ({self.status})"
+
+    def give_up(self, error):
+        """Mark the job failed for good, and its item's image if it was waiting on it."""
+        ImageJob.objects.filter(pk=self.pk).update(status=ImageJob.STATUS_FAILED, last_error=error)
+        if self.action != ImageJob.DELETE:
+            # A failed rename leaves the image under its old name, still served
+            image_status = MenuItem.IMAGE_FAILED if self.action == ImageJob.UPLOAD else MenuItem.IMAGE_READY
+            MenuItem.objects.filter(pk=self.item_id, image_job=self.pk).update(image_status=image_status)
+
 
 class MenuItem(models.Model):
+    IMAGE_NONE = "none"
+    IMAGE_PENDING = "pending"
+    IMAGE_READY = "ready"
+    IMAGE_FAILED = "failed"
+    IMAGE_STATUS_CHOICES = [
+        (IMAGE_NONE, "No image"),
+        (IMAGE_PENDING, "Processing"),
+        (IMAGE_READY, "Ready"),
+        (IMAGE_FAILED, "Failed"),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     vendor = models.ForeignKey(Vendor, related_name="menu_items", on_delete=models.CASCADE)
     name = models.CharField(max_length=200)
@@ -16,22 +135,135 @@ class MenuItem(models.Model):
     available = models.BooleanField(default=True)
     image = CloudinaryField(
         "image", 
-        folder="ChowFast_menu_images", 
+        folder=IMAGE_FOLDER, 
         public_id=lambda instance: slugify(f"{instance.vendor.vendor_id}_{instance.name}"),
         overwrite=True,
         resource_type='image',
         blank=True, 
         null=True)
+    # Stored resized copies of the image, see menus.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default=IMAGE_NONE)
+    # Latest image job; an older job that finishes late sees it is no longer current
+    image_job = models.ForeignKey(
+        ImageJob, related_name="+", on_delete=models.SET_NULL, blank=True, null=True, editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Vendor-wide sequence number of this item's last change (delta sync)
+    change_seq = models.BigIntegerField(default=0, editable=False)
 
     class Meta:
         db_table = "menu_items"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["vendor", "change_seq"], name="menu_item_change_seq_idx"),
+            # Exact-name lookups of menus.search, which the newest-matches window may not reach
+            models.Index(Lower("name"), name="menu_item_name_lower_idx"),
+        ]
+
+    _loaded_image = None
+    _loaded_name = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What menus.signals compares against to queue image jobs, without a SELECT per save
+        instance._loaded_image = instance.__dict__.get("image")
+        instance._loaded_name = instance.__dict__.get("name")
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_image, self._loaded_name = self.image, self.name
+
+    def clean(self):
+        validate_image_upload(self.image)
+
+    def save(self, *args, **kwargs):
+        # bulk_create and QuerySet.update() bypass this and are not seen by delta sync
+        with transaction.atomic():
+            self.change_seq = next_change_seq(self.vendor_id)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                update_fields = {*update_fields, "change_seq"}
+                if update_fields & {"image", "name"}:
+                    # An image change may queue a job (menus.signals)
+                    update_fields |= {"image", "image_variants", "image_status", "image_job"}
+                kwargs["update_fields"] = update_fields
+            super().save(*args, **kwargs)
+        self._loaded_image, self._loaded_name = self.image, self.name
 
     def __str__(self):
-        return f"{self.name} - {self.vendor.business_name}"
+        # Vendor name only when already loaded (select_related), never a query per row
+        if MenuItem.vendor.is_cached(self):
+            return f"{self.name} - {self.vendor.business_name}"
+        return self.name
+
+    @property
+    def image_public_id(self):
+        """Where this item's image is stored, named after the vendor and the dish."""
+        return f"{IMAGE_FOLDER}/{slugify(f'{self.vendor.vendor_id}_{self.name}')}"
 
     @property
     def image_url(self):
-        """Generate full Cloudinary URL for the food image."""
-        return self.image.build_url(secure=True) if self.image else None
\ No newline at end of file
+        """Full URL of the original food image in the configured image storage."""
+        return self.image_url_for()
+
+    def image_url_for(self, width=None, webp=False):
+        """
+        URL of the smallest resized copy at least `width` pixels wide (WebP if
+        the client takes it), or of the original when there is none.
+        """
+        if not self.image:
+            return None
+        return get_image_storage().url(pick_variant(self.image_variants, width, webp) or self.image)
+
+
+class MenuSequence(models.Model):
+    """
+    Last menu change sequence number handed out to a vendor (next_change_seq).
+    Kept out of the vendors table so that menu edits never lock the vendor row
+    and a Vendor.save() from a stale instance cannot write an old value back.
+    No database constraint on vendor, for the same reason as MenuItemTombstone.
+    """
+
+    vendor = models.OneToOneField(
+        Vendor,
+        primary_key=True,
+        related_name="menu_sequence",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    last_seq = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "menu_sequences"
+
+    def __str__(self):
+        return f"Vendor {self.vendor_id} menu seq {self.last_seq}"
+
+
+class MenuItemTombstone(models.Model):
+    """
+    Left behind by a deleted MenuItem so delta sync can tell clients to drop
+    it. No database constraint on vendor: a vendor's items (and so their
+    tombstones) are deleted before the vendor itself, whose post_delete
+    then clears them.
+    """
+
+    vendor = models.ForeignKey(
+        Vendor, related_name="menu_tombstones", on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    item_id = models.UUIDField()
+    change_seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "menu_item_tombstones"
+        indexes = [
+            models.Index(fields=["vendor", "change_seq"], name="menu_tombstone_change_seq_idx"),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.item_id} (seq {self.change_seq})"
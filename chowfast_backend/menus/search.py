@@ -0,0 +1,393 @@
+"""
+Menu search across vendors.
+
+Matching uses the text indexes core.search maintains for menu_items
+(menus/migrations/0005_menu_search_index.py):
+
+- PostgreSQL: pg_trgm GIN indexes, ranked by trigram word similarity, which
+  already tolerates typos;
+- SQLite: the menu_items_fts FTS5 table. bm25 reads every match of a word
+  (its row count, then a score per row), which is far too slow for common
+  words on a large menu, so a bounded set of candidates is scored here by
+  the field each word is found in: items named exactly as the query
+  (menu_item_name_lower_idx), the newest matches with every word in the
+  name and the newest with every word anywhere. An older partial match
+  beyond those windows is not found. When nothing matches, words the index
+  has never seen are corrected with TypoIndex, an in-process trigram index
+  over the FTS5 vocabulary, and the search is run again with the
+  corrections. The vocabulary is loaded by a background thread; until the
+  first load finishes, searches run without corrections;
+- other backends: icontains, unranked.
+
+Relevance is boosted for items whose vendor is online and items that are
+available. Filters: category, price range, available; they are applied with
+the text match, before any window or LIMIT.
+
+text_condition() is the unranked match alone, for callers that page through
+every match themselves (the admin changelist).
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from core.search import TRIGRAM_THRESHOLD
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+from .models import MenuItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 20
+TEXT_FIELDS = ("name", "description", "category")
+FTS_TABLE = "menu_items_fts"
+FTS_VOCAB_TABLE = "menu_items_fts_vocab"
+# Matches scored per requested result (newest first), and at least
+FTS_WINDOW_PER_RESULT = 10
+MIN_FTS_WINDOW = 200
+FTS_FIELD_WEIGHTS = {"name": 10.0, "category": 5.0, "description": 2.0}
+
+# Relevance multipliers
+ONLINE_BOOST = 1.5
+UNAVAILABLE_PENALTY = 0.3
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class MenuFilters:
+    category: str = None
+    min_price: Decimal = None
+    max_price: Decimal = None
+    available: bool = None
+
+    def q(self):
+        conditions = Q()
+        if self.category:
+            conditions &= Q(category__iexact=self.category)
+        if self.min_price is not None:
+            conditions &= Q(price__gte=self.min_price)
+        if self.max_price is not None:
+            conditions &= Q(price__lte=self.max_price)
+        if self.available is not None:
+            conditions &= Q(available=self.available)
+        return conditions
+
+    def sql(self, alias):
+        """The same conditions as SQL on menu_items AS `alias`, with params."""
+        clauses, params = [], []
+        if self.category:
+            clauses.append(f"LOWER({alias}.category) = LOWER(%s)")
+            params.append(self.category)
+        if self.min_price is not None:
+            clauses.append(f"{alias}.price >= %s")
+            params.append(str(self.min_price))
+        if self.max_price is not None:
+            clauses.append(f"{alias}.price <= %s")
+            params.append(str(self.max_price))
+        if self.available is not None:
+            clauses.append(f"{alias}.available = %s")
+            params.append(self.available)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def search_menu(query, filters=MenuFilters(), limit=DEFAULT_LIMIT):
+    """Menu items (vendor loaded) best first; each has a `search_rank`."""
+    query = query.strip()
+    if not _WORD.search(query):
+        return []
+    if connection.vendor == "postgresql":
+        return _trigram_search(query, filters, limit)
+    if connection.vendor == "sqlite":
+        typo_index = get_typo_index()
+        vocabulary = typo_index.vocabulary if typo_index else {}
+        results = _fts5_search(query, filters, limit, vocabulary)
+        if not results and typo_index:
+            # Every word must match, so a single typo empties the result: retry corrected
+            corrected = typo_index.correct_query(query)
+            if corrected != query.lower():
+                results = _fts5_search(corrected, filters, limit, vocabulary)
+        return results
+
+    results = list(
+        _queryset().filter(filters.q(), _icontains(query)).order_by("-vendor__online", "-available")[:limit]
+    )
+    for item in results:
+        item.search_rank = 0.0
+    return results
+
+
+def text_condition(query):
+    """Q matching every menu item the query matches, unranked and uncorrected; None for no words."""
+    query = query.strip()
+    if not _WORD.search(query):
+        return None
+    if connection.vendor == "postgresql":
+        return _trigram_condition(query)
+    if connection.vendor == "sqlite":
+        terms = _fts5_terms(query, {})
+        matches = RawSQL(
+            f"SELECT m.id FROM {FTS_TABLE} JOIN menu_items m ON m.rowid = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s",
+            [_fts5_match(terms)],
+        )
+        return Q(pk__in=matches)
+    return _icontains(query)
+
+
+def _icontains(query):
+    words = _WORD.findall(query)
+    return reduce(or_, (Q(**{f"{name}__icontains": word}) for name in TEXT_FIELDS for word in words))
+
+
+def _queryset():
+    return MenuItem.objects.select_related("vendor")
+
+
+def _boost():
+    return Case(When(vendor__online=True, then=Value(ONLINE_BOOST)), default=Value(1.0)) * Case(
+        When(available=True, then=Value(1.0)), default=Value(UNAVAILABLE_PENALTY)
+    )
+
+
+def _trigram_search(query, filters, limit):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    relevance = Greatest(*(TrigramWordSimilarity(query, name) for name in TEXT_FIELDS))
+    queryset = (
+        _queryset()
+        .filter(filters.q(), _trigram_condition(query))
+        .annotate(relevance=relevance)
+        .filter(relevance__gte=TRIGRAM_THRESHOLD)
+        .annotate(search_rank=ExpressionWrapper(F("relevance") * _boost(), output_field=FloatField()))
+    )
+    return list(queryset.order_by("-search_rank")[:limit])
+
+
+def _trigram_condition(query):
+    return reduce(or_, (Q(**{f"{name}__trigram_word_similar": query}) for name in TEXT_FIELDS))
+
+
+def _fts5_terms(query, vocabulary):
+    """
+    [(word, is_prefix)]: the last word is matched as a prefix while it is not
+    a known word (still being typed); a prefix match costs far more than a
+    word match on a large index.
+    """
+    words = _WORD.findall(query.lower())
+    return [(word, i == len(words) - 1 and word not in vocabulary) for i, word in enumerate(words)]
+
+
+def _fts5_match(terms, column=None):
+    match = " ".join(f'"{word}"*' if prefix else f'"{word}"' for word, prefix in terms)
+    return f"{{{column}}} : ({match})" if column else match
+
+
+def _fts5_candidates(terms, filters, limit, window):
+    """
+    Rows (pk, name, description, category, vendor online, available) passing
+    filters: of the newest `window` items with every word in the name, of the
+    newest `window` with every word anywhere, and of the newest `limit` items
+    named exactly as the query (so some more than once).
+    """
+    where, params = filters.sql("m")
+    match_filter = ""
+    if filters.category and _WORD.search(filters.category):
+        # Narrow the text match too; the SQL condition keeps the exact comparison
+        category_words = [(word, False) for word in _WORD.findall(filters.category.lower())]
+        match_filter = f" AND {_fts5_match(category_words, 'category')}"
+
+    columns = "m.id, m.name, m.description, m.category, v.online, m.available"
+    newest = (
+        f"SELECT * FROM (SELECT {columns} FROM {FTS_TABLE} "
+        f"JOIN menu_items m ON m.rowid = {FTS_TABLE}.rowid "
+        f"JOIN vendors v ON v.id = m.vendor_id "
+        f"WHERE {FTS_TABLE} MATCH %s{where} ORDER BY {FTS_TABLE}.rowid DESC LIMIT %s)"
+    )
+    # LOWER(m.name) as in menu_item_name_lower_idx, read newest first off the index
+    named = (
+        f"SELECT * FROM (SELECT {columns} FROM menu_items m "
+        f"JOIN vendors v ON v.id = m.vendor_id "
+        f"WHERE LOWER(m.name) = %s{where} ORDER BY m.rowid DESC LIMIT %s)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"{newest} UNION ALL {newest} UNION ALL {named}",
+            [
+                f"({_fts5_match(terms, 'name')}){match_filter}", *params, window,
+                f"({_fts5_match(terms)}){match_filter}", *params, window,
+                " ".join(word for word, _ in terms), *params, limit,
+            ],
+        )
+        return cursor.fetchall()
+
+
+def _fts5_score(row, terms):
+    """Each word counts by the best field it appears in; names made up of the query count most."""
+    _, name, description, category, online, available = row
+    name_words = _WORD.findall((name or "").lower())
+    fields = [
+        (FTS_FIELD_WEIGHTS["name"], set(name_words)),
+        (FTS_FIELD_WEIGHTS["category"], set(_WORD.findall((category or "").lower()))),
+        (FTS_FIELD_WEIGHTS["description"], set(_WORD.findall((description or "").lower()))),
+    ]
+    score = 0.0
+    for word, prefix in terms:
+        for weight, words in fields:
+            if word in words or (prefix and any(candidate.startswith(word) for candidate in words)):
+                score += weight
+                break
+    exact = {word for word, prefix in terms if not prefix}
+    prefixes = tuple(word for word, prefix in terms if prefix)
+    matched = sum(1 for word in name_words if word in exact or (prefixes and word.startswith(prefixes)))
+    coverage = matched / len(name_words) if name_words else 0.0
+    score *= 0.5 + 0.5 * coverage
+    return score * (ONLINE_BOOST if online else 1.0) * (1.0 if available else UNAVAILABLE_PENALTY)
+
+
+def _fts5_search(query, filters, limit, vocabulary):
+    terms = _fts5_terms(query, vocabulary)
+    if not terms:
+        return []
+    rows = _fts5_candidates(terms, filters, limit, max(limit * FTS_WINDOW_PER_RESULT, MIN_FTS_WINDOW))
+    scores = {}
+    for row in rows:
+        scores.setdefault(row[0], _fts5_score(row, terms))
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+    if not ranked:
+        return []
+
+    pk_field = MenuItem._meta.pk
+    ranks = {pk_field.to_python(pk): score for pk, score in ranked}
+    items = _queryset().in_bulk(list(ranks))
+    results = []
+    for pk, rank in ranks.items():
+        if pk in items:
+            items[pk].search_rank = rank
+            results.append(items[pk])
+    return results
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 once above limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class TypoIndex:
+    """Vocabulary (word -> document count) with a trigram index for spelling correction."""
+
+    MIN_SIMILARITY = 0.3
+    CANDIDATES = 30
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.grams = {}
+        for word in vocabulary:
+            for gram in trigrams(word):
+                self.grams.setdefault(gram, []).append(word)
+
+    def correct(self, word):
+        """The word itself if known, else the closest known word (or the word if none is close)."""
+        word = word.lower()
+        if word in self.vocabulary or len(word) < 3:
+            return word
+        grams = trigrams(word)
+        shared = Counter(candidate for gram in grams for candidate in self.grams.get(gram, ()))
+        max_distance = 1 if len(word) < 6 else 2
+        best = None
+        for candidate, common in shared.most_common(self.CANDIDATES):
+            if common / len(grams | trigrams(candidate)) < self.MIN_SIMILARITY:
+                continue
+            distance = edit_distance(word, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            key = (distance, -self.vocabulary[candidate])
+            if best is None or key < best[0]:
+                best = (key, candidate)
+        return best[1] if best else word
+
+    def correct_query(self, query):
+        return " ".join(self.correct(word) for word in _WORD.findall(query.lower()))
+
+
+def load_vocabulary():
+    """word -> number of menu items containing it."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT term, doc FROM {FTS_VOCAB_TABLE}")
+            return dict(cursor.fetchall())
+    vocabulary = Counter()
+    for name in MenuItem.objects.values_list("name", flat=True).order_by().iterator(chunk_size=5000):
+        vocabulary.update({word.lower() for word in _WORD.findall(name)})
+    return dict(vocabulary)
+
+
+_typo_index = None
+_typo_index_built_at = 0.0
+_typo_index_rebuilding = False
+_typo_index_lock = threading.Lock()
+
+
+def get_typo_index():
+    """
+    The process's TypoIndex, or None until the first one is loaded. Loaded,
+    and reloaded every MENU_SEARCH_VOCABULARY_SECONDS, by a background
+    thread; searches never wait for it.
+    """
+    global _typo_index_rebuilding
+    index = _typo_index
+    if index is not None and time.monotonic() - _typo_index_built_at <= settings.MENU_SEARCH_VOCABULARY_SECONDS:
+        return index
+    with _typo_index_lock:
+        if _typo_index_rebuilding:
+            return index  # already under way; keep using the current index
+        _typo_index_rebuilding = True
+    threading.Thread(target=_rebuild_typo_index_in_background, name="menu-typo-index-rebuild", daemon=True).start()
+    return index
+
+
+def rebuild_typo_index():
+    global _typo_index, _typo_index_built_at
+    index = TypoIndex(load_vocabulary())
+    with _typo_index_lock:
+        _typo_index, _typo_index_built_at = index, time.monotonic()
+    return index
+
+
+def _rebuild_typo_index_in_background():
+    global _typo_index_rebuilding
+    try:
+        rebuild_typo_index()
+    except Exception:
+        logger.exception("Menu search vocabulary load failed")
+    finally:
+        _typo_index_rebuilding = False
+        connection.close()  # This thread's own connection
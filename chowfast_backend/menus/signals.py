@@ -1,119 +1,113 @@
-import logging
-
-from cloudinary.uploader import destroy, upload
-from decouple import config
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
 from django.db import transaction
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from django.utils.text import slugify
+from vendors.models import Vendor
 
-from .models import MenuItem
+from .image_storage import parse, stored_value
+from .menu_cache import bump_version
+from .models import ImageJob, MenuItem, MenuItemTombstone, MenuSequence, next_change_seq, validate_image_upload
 
-logger = logging.getLogger(__name__)
 
+def _queue(instance, action, **fields):
+    job = ImageJob.objects.create(action=action, item_id=instance.pk, **fields)
+    instance.image_job = job
+    return job
 
-FOLDER_NAME = "ChowFast_menu_images"
 
 @receiver(pre_save, sender=MenuItem)
-def handle_recipe_image_upload(sender, instance, **kwargs):
+def queue_image_changes(sender, instance, **kwargs):
     """
-    Handles image management with proper error handling:
-    - New uploads go to ChowFast_menu_images
-    - Recipe renames move to ChowFast_menu_images
-    - Image deletions are atomic
+    Record image uploads, renames and deletions as ImageJobs in the saving
+    transaction. The process_image_jobs worker talks to the image storage;
+    until it is done the item keeps serving its previous image.
     """
-    # if not instance.pk:  # New instance
-    #     if (
-    #         hasattr(instance, "image")
-    #         and instance.image
-    #         and hasattr(instance.image, "file")
-    #     ):
-    #         handle_new_upload(instance)
-    #         print("New Upload")
-    #     return
-        
-
-    try:
-        old_instance = MenuItem.objects.get(pk=instance.pk)
-    except MenuItem.DoesNotExist:
-        logger.error(f"MenuItem instance {instance.pk} found in pre_save but not in DB.")
+    image = instance.image
+    loaded = stored_value(instance._loaded_image)
+
+    # New image uploaded
+    if isinstance(image, UploadedFile):
+        # Forms already ran this through MenuItem.clean(); other saves get it here
+        validate_image_upload(image)
+        image.seek(0)
+        _queue(
+            instance,
+            ImageJob.UPLOAD,
+            public_id=instance.image_public_id,
+            payload=image.read(),
+            filename=image.name,
+        )
+        instance.image = loaded
+        instance.image_status = MenuItem.IMAGE_PENDING
         return
 
-    # Case 1: Image was cleared
-    if not instance.image and old_instance.image:
-        with transaction.atomic():
-            destroy(old_instance.image.public_id)
+    # Image was cleared
+    if not image and loaded:
+        _queue(instance, ImageJob.DELETE, source=loaded, variants=instance.image_variants)
+        instance.image_variants = {}
+        instance.image_status = MenuItem.IMAGE_NONE
         return
 
-    # Case 2: Recipe name changed with same image file
+    # Dish renamed with the same image: move the image to the new name.
+    # An upload still pending is renamed by the worker once it lands.
     if (
-        instance.name != old_instance.name
-        and instance.image
-        and old_instance.image
-        and str(instance.image) == str(old_instance.image)
+        image
+        and stored_value(image) == loaded
+        and instance.name != instance._loaded_name
+        and instance.image_status != MenuItem.IMAGE_PENDING
     ):
-        with transaction.atomic():
-            try:
-                old_public_id = old_instance.image.public_id
-                new_public_id = slugify(f"{instance.vendor.vendor_id}_{instance.name}")
-
-                # 1. First upload to new location
-                upload(
-                    instance.image.url,
-                    public_id=new_public_id,
-                    folder=FOLDER_NAME,
-                    overwrite=True,
-                    resource_type="image",
-                    invalidate=True,
-                )
-                
-
-                # 2. Then delete old version
-                destroy(old_public_id)
-
-                # 3. Finally update instance
-                instance.image = f"{FOLDER_NAME}/{new_public_id}"
-                print("Name Changed: Update upload")
-
-            except Exception as e:
-                # Ensure we don't leave the instance in an inconsistent state
-                instance.image = old_instance.image
-                raise RuntimeError(f"Failed to rename image: {str(e)}") from e
-
-    # Case 3: New image uploaded
-    elif hasattr(instance.image, "file"):
-        with transaction.atomic():
-            if old_instance.image:
-                destroy(old_instance.image.public_id)
-                print("New Image Upload")
-            return handle_new_upload(instance)
-
-
-def handle_new_upload(instance):
-    """Handles new uploads with transaction safety"""
-    NEW_PUBLIC_ID = slugify(f"{instance.vendor.vendor_id}_{instance.name}")
-    try:
-        result = upload(
-            instance.image.file,
-            folder=FOLDER_NAME,
-            public_id=NEW_PUBLIC_ID,
-            resource_type="image",
-            overwrite=True,
-            invalidate=True,
-        )
-        instance.image = result["public_id"]
-    except Exception as e:
-        raise RuntimeError(f"Image upload failed: {str(e)}") from e
+        public_id = instance.image_public_id
+        if parse(loaded).public_id != public_id:
+            _queue(instance, ImageJob.RENAME, source=loaded, variants=instance.image_variants, public_id=public_id)
+            instance.image_status = MenuItem.IMAGE_PENDING
 
 
 @receiver(post_delete, sender=MenuItem)
 def delete_recipe_image(sender, instance, **kwargs):
-    """Ensures image deletion when recipe is deleted, only in production"""
-    # Check if the environment is production
-    is_allowed_to_delete = config('ALLOW_CLOUDINARY_DELETE', default=False, cast=bool)
-
-    if hasattr(instance, "image") and instance.image and is_allowed_to_delete:
-        try:
-            destroy(instance.image.public_id)
-        except Exception as e:
-            raise RuntimeError(f"Image deletion failed: {str(e)}") from e
+    """Queue the image's deletion with the item's, only where ALLOW_CLOUDINARY_DELETE is set."""
+    if instance.image and settings.ALLOW_CLOUDINARY_DELETE:
+        ImageJob.objects.create(
+            action=ImageJob.DELETE,
+            item_id=instance.pk,
+            source=stored_value(instance.image),
+            variants=instance.image_variants,
+        )
+
+
+def _public_vendor_id(menu_item):
+    if MenuItem.vendor.is_cached(menu_item):
+        return menu_item.vendor.vendor_id
+    return Vendor.objects.filter(pk=menu_item.vendor_id).values_list("vendor_id", flat=True).first()
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def invalidate_menu_on_item_change(sender, instance, **kwargs):
+    """Retire the cached menu once the change is committed."""
+    vendor_id = _public_vendor_id(instance)
+    if vendor_id:
+        transaction.on_commit(lambda: bump_version(vendor_id))
+
+
+@receiver(post_delete, sender=MenuItem)
+def record_menu_item_tombstone(sender, instance, **kwargs):
+    """Deletes are menu changes too: leave a sequenced tombstone for delta sync."""
+    MenuItemTombstone.objects.create(
+        vendor_id=instance.vendor_id,
+        item_id=instance.pk,
+        change_seq=next_change_seq(instance.vendor_id),
+    )
+
+
+@receiver(post_delete, sender=Vendor)
+def clear_menu_changes(sender, instance, **kwargs):
+    MenuItemTombstone.objects.filter(vendor_id=instance.pk).delete()
+    MenuSequence.objects.filter(vendor_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Vendor)
+def invalidate_menu_on_vendor_change(sender, instance, **kwargs):
+    # The menu carries the business name
+    if instance.vendor_id:
+        transaction.on_commit(lambda: bump_version(instance.vendor_id))
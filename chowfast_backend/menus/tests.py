@@ -1,3 +1,189 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from core.leases import LEASE_EXPIRED_ERROR
+from django.contrib.admin.sites import site
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from users.models import User
+from vendors.models import Vendor
+
+from . import search
+from .admin import MenuItemAdmin
+from .image_storage import LocalImageStorage
+from .models import ImageJob, MenuItem, MenuItemTombstone, MenuSequence
+
+
+class ImageJobTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(
+            MENU_IMAGE_STORAGE="menus.image_storage.LocalImageStorage",
+            MENU_IMAGE_LOCAL_ROOT=self.root,
+            ALLOW_CLOUDINARY_DELETE=True,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        user = User.objects.create_user(email="vendor@example.com", password="!", user_type="vendor")
+        self.vendor = Vendor.objects.create(user=user, business_name="Mama Put")
+
+    def png(self, width, height):
+        buffer = BytesIO()
+        Image.new("RGB", (width, height), "orange").save(buffer, "PNG")
+        return SimpleUploadedFile("jollof.png", buffer.getvalue(), content_type="image/png")
+
+    def process_jobs(self):
+        call_command("process_image_jobs", stdout=StringIO())
+
+    def test_upload_rename_and_delete_run_in_the_worker(self):
+        storage = LocalImageStorage()
+        with self.assertNumQueries(5):  # Vendor sequence, item, and the upload job: no storage calls
+            item = MenuItem.objects.create(
+                vendor=self.vendor,
+                name="Jollof rice",
+                price=2500,
+                image=SimpleUploadedFile("jollof.jpg", b"jpeg bytes", content_type="image/jpeg"),
+            )
+        item.refresh_from_db()
+        self.assertEqual((item.image, item.image_status), (None, MenuItem.IMAGE_PENDING))
+
+        self.process_jobs()
+        item.refresh_from_db()
+        self.assertEqual(item.image_status, MenuItem.IMAGE_READY)
+        uploaded = storage.path(item.image)
+        self.assertEqual(uploaded.read_bytes(), b"jpeg bytes")
+        self.assertEqual(ImageJob.objects.get().payload, None)
+
+        item.name = "Party jollof rice"
+        item.save()
+        self.assertEqual(item.image_status, MenuItem.IMAGE_PENDING)
+        self.process_jobs()
+        item.refresh_from_db()
+        self.assertEqual(item.image_status, MenuItem.IMAGE_READY)
+        self.assertIn("party-jollof-rice", str(item.image))
+        self.assertFalse(uploaded.exists())
+        self.assertEqual(storage.path(item.image).read_bytes(), b"jpeg bytes")
+
+        renamed = storage.path(item.image)
+        item.delete()
+        self.process_jobs()
+        self.assertFalse(renamed.exists())
+
+    def test_superseded_upload_is_cancelled(self):
+        item = MenuItem.objects.create(
+            vendor=self.vendor, name="Dodo", price=800, image=SimpleUploadedFile("a.png", b"first")
+        )
+        item.image = SimpleUploadedFile("b.png", b"second")
+        item.save()
+
+        self.process_jobs()
+        item.refresh_from_db()
+        self.assertEqual(LocalImageStorage().path(item.image).read_bytes(), b"second")
+        self.assertEqual(
+            sorted(ImageJob.objects.values_list("status", flat=True)), [ImageJob.STATUS_CANCELLED, ImageJob.STATUS_DONE]
+        )
+
+    def test_upload_renders_variants_narrower_than_the_original(self):
+        item = MenuItem.objects.create(vendor=self.vendor, name="Jollof rice", price=2500, image=self.png(400, 300))
+        self.process_jobs()
+        item.refresh_from_db()
+
+        self.assertEqual(
+            {name: sorted(widths) for name, widths in item.image_variants.items()},
+            {"webp": ["160", "320"], "jpeg": ["160", "320"]},
+        )
+        with Image.open(LocalImageStorage().path(item.image_variants["webp"]["320"])) as variant:
+            self.assertEqual((variant.format, variant.size), ("WEBP", (320, 240)))
+        self.assertTrue(item.image_url_for(200, webp=True).endswith("_w320.webp"))
+        self.assertTrue(item.image_url_for(100).endswith("_w160.jpg"))
+        self.assertEqual(item.image_url_for(1000, webp=True), item.image_url)  # Wider than any copy: the original
+
+    @override_settings(MENU_IMAGE_MAX_UPLOAD_BYTES=100)
+    def test_oversized_upload_is_rejected_before_queuing(self):
+        item = MenuItem(vendor=self.vendor, name="Dodo", price=800, image=self.png(100, 100))
+        with self.assertRaises(ValidationError) as raised:
+            item.full_clean()
+        self.assertIn("image", raised.exception.message_dict)
+
+        with self.assertRaises(ValidationError):
+            item.save()
+        self.assertFalse(ImageJob.objects.exists())
+        self.assertFalse(MenuItem.objects.exists())
+
+    def test_expired_lease_at_max_attempts_gives_up(self):
+        item = MenuItem.objects.create(vendor=self.vendor, name="Dodo", price=800, image=self.png(100, 100))
+        ImageJob.objects.filter(pk=item.image_job_id).update(
+            status=ImageJob.STATUS_RUNNING, attempts=5, next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        call_command("process_image_jobs", "--max-attempts", "5", stdout=StringIO())
+        job = ImageJob.objects.get()
+        item.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (ImageJob.STATUS_FAILED, 5, LEASE_EXPIRED_ERROR))
+        self.assertEqual((item.image, item.image_status), (None, MenuItem.IMAGE_FAILED))
+
+
+class MenuSequenceTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email="vendor@example.com", password="!", user_type="vendor")
+        self.vendor = Vendor.objects.create(user=user, business_name="Mama Put")
+
+    def test_stale_vendor_save_keeps_the_sequence(self):
+        stale = Vendor.objects.get(pk=self.vendor.pk)
+        first = MenuItem.objects.create(vendor=self.vendor, name="Jollof rice", price=2500)
+        stale.business_name = "Mama Put Kitchen"
+        stale.save()
+        second = MenuItem.objects.create(vendor=self.vendor, name="Dodo", price=800)
+
+        self.assertEqual((first.change_seq, second.change_seq), (1, 2))
+        self.assertEqual(MenuSequence.objects.get(vendor=self.vendor).last_seq, 2)
+
+    def test_deleting_the_vendor_takes_its_sequence(self):
+        MenuItem.objects.create(vendor=self.vendor, name="Jollof rice", price=2500)
+        self.vendor.delete()
+        self.assertFalse(MenuSequence.objects.exists())
+        self.assertFalse(MenuItemTombstone.objects.exists())
+
+
+class MenuSearchTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email="vendor@example.com", password="!", user_type="vendor")
+        self.vendor = Vendor.objects.create(user=user, business_name="Mama Put")
+        self.jollof = MenuItem.objects.create(vendor=self.vendor, name="Jollof", price=2000)
+        # Newer partial matches, far more than a page of results
+        MenuItem.objects.bulk_create(
+            MenuItem(vendor=self.vendor, name=f"Jollof rice combo {i}", description="Jollof with chicken", price=3000)
+            for i in range(300)
+        )
+        search.rebuild_typo_index()
+
+    def test_every_match_is_ranked(self):
+        self.assertEqual(search.search_menu("jollof", limit=5)[0], self.jollof)
+
+    def test_admin_search_finds_every_match_and_vendor_names(self):
+        model_admin = MenuItemAdmin(MenuItem, site)
+        queryset, _ = model_admin.get_search_results(None, MenuItem.objects.all(), "jollof")
+        self.assertEqual(queryset.count(), 301)
+        queryset, _ = model_admin.get_search_results(None, MenuItem.objects.all(), "mama")
+        self.assertEqual(queryset.count(), 301)
+        queryset, _ = model_admin.get_search_results(None, MenuItem.objects.all(), "put")
+        self.assertEqual(queryset.count(), 0)
+
+    def test_first_search_does_not_wait_for_the_vocabulary(self):
+        self.addCleanup(setattr, search, "_typo_index", search._typo_index)
+        self.addCleanup(setattr, search, "_typo_index_rebuilding", False)
+        search._typo_index = None
+        with patch("menus.search.threading.Thread") as thread:
+            self.assertEqual(search.search_menu("jollof", limit=1), [self.jollof])
+            search.search_menu("jollof", limit=1)
+        # Started once, in the background; the second search found it under way
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once_with()
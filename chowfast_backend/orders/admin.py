@@ -1,3 +1,6 @@
+from core.exports import export_actions
+from core.paginator import EstimatedCountAdminMixin
+from core.search import IndexedSearchAdminMixin
 from django.contrib import admin
 
 from .models import Order, OrderItem
@@ -9,17 +12,23 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ('id', 'subtotal')
     fields = ('item', 'name', 'quantity', 'price', 'subtotal')
     can_delete = True
+    # A select would load every MenuItem for every inline row
+    autocomplete_fields = ('item',)
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(IndexedSearchAdminMixin, EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'customer', 'vendor', 'total', 'status', 'payment_status', 'created_at')
     list_filter = ('status', 'payment_status', 'vendor')
-    search_fields = ('id', 'customer__user__username', 'vendor__business_name', 'delivery_address')
+    # Routed through core.search: IDs, phone numbers and references hit indexes
+    search_fields = ('id', 'delivery_address', 'notes')
+    search_name = 'orders'
     list_editable = ('status', 'payment_status')
     date_hierarchy = 'created_at'
     ordering = ('-created_at',)
     readonly_fields = ('id', 'created_at', 'subtotal', 'total')
+    list_select_related = ('customer', 'vendor')
+    autocomplete_fields = ('customer', 'vendor')
     fieldsets = (
         (None, {
             'fields': ('customer', 'vendor', 'status', 'payment_status')
@@ -28,7 +37,7 @@ class OrderAdmin(admin.ModelAdmin):
             'fields': ('subtotal', 'delivery_fee', 'total')
         }),
         ('Details', {
-            'fields': ('delivery_address', 'notes')
+            'fields': ('delivery_address', 'notes', 'rating')
         }),
         ('Metadata', {
             'fields': ('id', 'created_at'),
@@ -36,23 +45,21 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
     inlines = [OrderItemInline]
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('vendor')
+    actions = export_actions("orders")
 
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ('order', 'name', 'item', 'quantity', 'price', 'subtotal')
     list_filter = ('order__vendor',)
     search_fields = ('name', 'item__name', 'order__id')
     readonly_fields = ('id', 'subtotal')
     ordering = ('order',)
+    list_select_related = ('order__vendor', 'item')
+    raw_id_fields = ('order',)
+    autocomplete_fields = ('item',)
     fieldsets = (
         (None, {
             'fields': ('order', 'item', 'name', 'quantity', 'price', 'subtotal')
         }),
     )
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('order__vendor', 'item')
\ No newline at end of file
@@ -1,6 +1,7 @@
 import uuid
 
 from customers.models import Customer
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from menus.models import MenuItem
 from vendors.models import Vendor
@@ -32,14 +33,29 @@ class Order(models.Model):
     payment_status = models.CharField(max_length=50, choices=PAYMENT_STATUS_CHOICES, default="unpaid")
     delivery_address = models.TextField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+    # The customer's 1-5 star rating; summed into Vendor.rating by the counter rollup
+    rating = models.PositiveSmallIntegerField(
+        blank=True, null=True, validators=[MinValueValidator(1), MaxValueValidator(5)]
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "orders"
         ordering = ["-created_at"]
 
+    _loaded_rating = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = instance.__dict__.get("rating")
+        return instance
+
     def __str__(self):
-        return f"Order {self.id} - {self.vendor.business_name}"
+        # Vendor name only when already loaded (select_related), never a query per row
+        if Order.vendor.is_cached(self):
+            return f"Order {self.id} - {self.vendor.business_name}"
+        return f"Order {self.id}"
 
 
 class OrderItem(models.Model):
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from vendors.counters import increment
+
+from .models import Order
+
+
+@receiver(post_save, sender=Order)
+def count_vendor_order(sender, instance, created, **kwargs):
+    """Count new orders and rating changes in the vendor's counter slots."""
+    previous = instance._loaded_rating
+    rating_total = (instance.rating or 0) - (previous or 0)
+    ratings = (instance.rating is not None) - (previous is not None)
+    instance._loaded_rating = instance.rating
+    if created or rating_total or ratings:
+        increment(instance.vendor_id, orders=int(created), rating_total=rating_total, ratings=ratings)
+
+
+@receiver(post_delete, sender=Order)
+def uncount_vendor_order(sender, instance, **kwargs):
+    """Take a deleted order, and its rating, back out of the vendor's counter slots."""
+    rating = instance._loaded_rating
+    increment(
+        instance.vendor_id,
+        orders=-1,
+        rating_total=-(rating or 0),
+        ratings=-int(rating is not None),
+        create=False,
+    )
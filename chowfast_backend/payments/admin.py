@@ -1,17 +1,25 @@
+from core.exports import export_actions
+from core.paginator import EstimatedCountAdminMixin
+from core.search import IndexedSearchAdminMixin
 from django.contrib import admin
 
 from .models import Payment
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(IndexedSearchAdminMixin, EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'order', 'transaction_ref', 'status', 'amount', 'paid_at', 'created_at')
     list_filter = ('status',)
+    # Routed through core.search: payment or order UUID, transaction_ref
     search_fields = ('id', 'transaction_ref', 'order__id')
+    search_name = 'payments'
     list_editable = ('status',)
     date_hierarchy = 'created_at'
     ordering = ('-created_at',)
     readonly_fields = ('id', 'created_at', 'paid_at')
+    list_select_related = ('order',)
+    raw_id_fields = ('order',)
+    actions = export_actions("payments")
     fieldsets = (
         (None, {
             'fields': ('order', 'transaction_ref', 'status', 'amount')
@@ -19,7 +27,4 @@ class PaymentAdmin(admin.ModelAdmin):
         ('Dates', {
             'fields': ('paid_at', 'created_at')
         }),
-    )
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('order')
\ No newline at end of file
+    )
\ No newline at end of file
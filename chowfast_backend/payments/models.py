@@ -23,4 +23,4 @@ class Payment(models.Model):
         db_table = "payments"
 
     def __str__(self):
-        return f"Payment for Order {self.order.id}"
+        return f"Payment for Order {self.order_id}"
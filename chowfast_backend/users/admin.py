@@ -49,6 +49,7 @@ class OTPAdmin(admin.ModelAdmin):
     search_fields = ("user__email", "user__phone_number")
     readonly_fields = ("user", "code", "purpose", "created_at")
     ordering = ("-created_at",)
+    list_select_related = ("user",)
 
     def has_add_permission(self, request):
         # OTPs should only be created programmatically, not via admin
@@ -74,6 +75,7 @@ class SessionTokenAdmin(admin.ModelAdmin):
     search_fields = ("user__email", "user__phone_number", "token")
     readonly_fields = ("user", "token", "purpose", "expires_at", "is_used", "created_at", "updated_at")
     ordering = ("-created_at",)
+    list_select_related = ("user",)
 
     def has_add_permission(self, request):
         # Session tokens should be created via code, not admin
@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .tokens import AUTH_VERSION_CLAIM
+
+
+def auth_version_cache_key(user_id):
+    return f"users:auth_version:{user_id}"
+
+
+def user_cache_key(user_id):
+    return f"users:user:{user_id}"
+
+
+# What CachedUserJWTAuthentication keeps of a User: never the password hash.
+# Other fields are deferred and loaded from the database if a view reads them.
+CACHED_USER_FIELDS = (
+    "id",
+    "email",
+    "phone_number",
+    "user_type",
+    "is_active",
+    "is_activated",
+    "is_staff",
+    "is_superuser",
+    "auth_version",
+)
+
+
+def forget_cached_users(user_ids):
+    """Drop the cached user and token version of each user, now and after commit."""
+    keys = [key for user_id in user_ids for key in (user_cache_key(user_id), auth_version_cache_key(user_id))]
+    cache.delete_many(keys)
+    # Also after commit, so a concurrent request cannot re-cache the old state
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_auth_version(user_id):
+    """
+    Current token version for a user, or None if the user no longer exists.
+    Served from the cache; the database is only read on a miss.
+    """
+    version = cache.get(auth_version_cache_key(user_id))
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list("auth_version", flat=True).first()
+        if version is None:
+            return None
+        cache.set(auth_version_cache_key(user_id), version, timeout=None)
+    return version
+
+
+class ClaimsUser(TokenUser):
+    """
+    Authenticated user backed only by the token claims (no database row).
+    It cannot be saved; views that need the model use CachedUserJWTAuthentication.
+    """
+
+    @cached_property
+    def user_type(self):
+        return self.token.get("user_type")
+
+    @cached_property
+    def is_activated(self):
+        return self.token.get("is_activated", False)
+
+    @cached_property
+    def vendor_id(self):
+        return self.token.get("vendor_id")
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the token claims instead of selecting the
+    user on every request. Tokens are revoked by bumping User.auth_version
+    (done when a claimed field changes, see users.models.CLAIMED_USER_FIELDS),
+    checked with a single cache read.
+    """
+
+    def check_auth_version(self, validated_token, current_version):
+        if current_version is None or validated_token.get(AUTH_VERSION_CLAIM, 0) != current_version:
+            raise AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        self.check_auth_version(validated_token, get_auth_version(user_id))
+        return ClaimsUser(validated_token)
+
+
+class CachedUserJWTAuthentication(ClaimsJWTAuthentication):
+    """
+    For views that need a real User instance: the user is loaded once and its
+    CACHED_USER_FIELDS are cached for AUTH_USER_CACHE_TIMEOUT seconds. Saving
+    the user clears the entry.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        values = cache.get(user_cache_key(user_id))
+        if values is None:
+            # Loads the row and checks is_active
+            user = JWTAuthentication.get_user(self, validated_token)
+            cache.set(
+                user_cache_key(user_id),
+                {field: getattr(user, field) for field in CACHED_USER_FIELDS},
+                timeout=settings.AUTH_USER_CACHE_TIMEOUT,
+            )
+            cache.set(auth_version_cache_key(user_id), user.auth_version, timeout=None)
+            current_version = user.auth_version
+        else:
+            # from_db wants the loaded fields in model order
+            fields = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+            user = User.from_db(DEFAULT_DB_ALIAS, fields, [values[field] for field in fields])
+            current_version = get_auth_version(user_id)
+
+        self.check_auth_version(validated_token, current_version)
+        return user
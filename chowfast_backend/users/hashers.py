@@ -0,0 +1,58 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.contrib.auth.hashers import BasePasswordHasher, mask_hash
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+OTP_HASHER_ALGORITHM = "otp_hmac_sha256"
+
+
+class OTPHMACHasher(BasePasswordHasher):
+    """
+    Keyed HMAC-SHA256 hasher for short-lived OTP codes.
+
+    OTPs expire within minutes and are rate limited, so a slow KDF like Argon2
+    buys nothing over a server-side secret key. Each code gets its own salt and
+    is compared in constant time. Never use this hasher for user passwords.
+    """
+
+    algorithm = OTP_HASHER_ALGORITHM
+
+    def _key(self):
+        return getattr(settings, "OTP_HASH_KEY", None) or settings.SECRET_KEY
+
+    def encode(self, password, salt):
+        self._check_encode_args(password, salt)
+        digest = hmac.new(
+            self._key().encode(),
+            f"{salt}${password}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        return f"{self.algorithm}${salt}${digest}"
+
+    def decode(self, encoded):
+        algorithm, salt, hash = encoded.split("$", 2)
+        assert algorithm == self.algorithm
+        return {
+            "algorithm": algorithm,
+            "hash": hash,
+            "salt": salt,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(password, decoded["salt"])
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _("algorithm"): decoded["algorithm"],
+            _("salt"): mask_hash(decoded["salt"], show=2),
+            _("hash"): mask_hash(decoded["hash"]),
+        }
+
+    def harden_runtime(self, password, encoded):
+        pass
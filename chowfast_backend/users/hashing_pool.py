@@ -0,0 +1,38 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor():
+    """
+    Bounded pool for password hashing off the event loop.
+
+    Argon2 (argon2-cffi) releases the GIL while hashing, so threads hash in
+    parallel up to PASSWORD_HASHING_WORKERS at a time; further requests queue
+    here instead of blocking the worker's event loop.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    thread_name_prefix="password-hashing",
+                )
+    return _executor
+
+
+async def make_password_async(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), make_password, password)
+
+
+async def check_password_async(password, encoded):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), check_password, password, encoded)
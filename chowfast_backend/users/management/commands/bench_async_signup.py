@@ -0,0 +1,91 @@
+import asyncio
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from users.models import User
+from vendors.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent vendor signup throughput of the sync and async views in one worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=40,
+            help='Signups sent per view',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Signups in flight at once',
+        )
+
+    def handle(self, *args, **options):
+        self.run_id = uuid.uuid4().hex[:8]
+        hosts = list(settings.ALLOWED_HOSTS) + ["testserver"]
+        # Rate limits would reject most of the burst; the bench targets the view itself
+        with override_settings(SLIDING_WINDOW_THROTTLE_RATES={}, ALLOWED_HOSTS=hosts):
+            try:
+                for label, url_name in (
+                    ("sync", "vendor-email-signup"),
+                    ("async", "vendor-email-signup-async"),
+                ):
+                    asyncio.run(self.bench(label, reverse(url_name), options))
+            finally:
+                self.cleanup()
+
+    async def bench(self, label, url, options):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        failures = 0
+
+        async def signup(i):
+            nonlocal failures
+            async with semaphore:
+                response = await client.post(
+                    url,
+                    {"email": f"bench-{self.run_id}-{label}-{i}@example.com", "password": "bench-pass-123"},
+                    content_type="application/json",
+                )
+                if response.status_code != 201:
+                    failures += 1
+
+        # A ticker shows how long the event loop stalls while requests are in flight
+        stop = asyncio.Event()
+        max_lag = 0.0
+
+        async def ticker():
+            nonlocal max_lag
+            interval = 0.01
+            while not stop.is_set():
+                tick = time.perf_counter()
+                await asyncio.sleep(interval)
+                max_lag = max(max_lag, time.perf_counter() - tick - interval)
+
+        ticker_task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        await asyncio.gather(*(signup(i) for i in range(options['requests'])))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ticker_task
+
+        self.stdout.write(
+            f"{label:>5}: {options['requests']} signups in {elapsed:.2f}s "
+            f"({options['requests'] / elapsed:.1f}/sec), {failures} failed, "
+            f"max event loop stall {max_lag * 1000:.0f} ms"
+        )
+
+    def cleanup(self):
+        prefix = f"bench-{self.run_id}-"
+        OutboxEmail.objects.filter(to_email__startswith=prefix).delete()
+        User.objects.filter(email__startswith=prefix).delete()
+
+
+# python manage.py bench_async_signup --requests 100 --concurrency 16
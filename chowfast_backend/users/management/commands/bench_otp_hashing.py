@@ -0,0 +1,57 @@
+import time
+
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+from django.core.management.base import BaseCommand
+
+from users.hashers import OTP_HASHER_ALGORITHM
+
+
+class Command(BaseCommand):
+    help = "Compare CPU time spent hashing OTPs per signup/verify request (Argon2 vs keyed HMAC)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Number of simulated signup/verify requests per hasher',
+        )
+
+    def measure(self, func, iterations):
+        start = time.process_time()
+        for _ in range(iterations):
+            func()
+        return (time.process_time() - start) / iterations * 1000  # ms per request
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        password = "correct-horse-battery"
+        raw_code = "123456"
+        password_hash = make_password(password)
+
+        self.stdout.write(f"Simulating {iterations} requests per hasher...")
+
+        rows = []
+        for label, algorithm in (("before (argon2)", get_hasher().algorithm), ("after (hmac)", OTP_HASHER_ALGORITHM)):
+            otp_hash = make_password(raw_code, hasher=algorithm)
+
+            # Signup hashes the account password and the OTP; verify checks the OTP only
+            signup_ms = self.measure(
+                lambda: (make_password(password), make_password(raw_code, hasher=algorithm)),
+                iterations,
+            )
+            verify_ms = self.measure(lambda: check_password(raw_code, otp_hash), iterations)
+            rows.append((label, signup_ms, verify_ms))
+
+        # Password hashing is unchanged; report it separately for reference
+        password_ms = self.measure(lambda: check_password(password, password_hash), iterations)
+
+        self.stdout.write(f"{'hasher':<18}{'signup cpu/req':>18}{'verify cpu/req':>18}")
+        for label, signup_ms, verify_ms in rows:
+            self.stdout.write(f"{label:<18}{signup_ms:>15.2f} ms{verify_ms:>15.3f} ms")
+        self.stdout.write(f"(account password hash alone: {password_ms:.2f} ms/req)")
+
+        self.stdout.write(self.style.SUCCESS("Benchmark complete."))
+
+
+# python manage.py bench_otp_hashing --iterations 100
@@ -0,0 +1,109 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import OTP, OTP_VALIDITY_MINUTES, SessionToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired OTPs and used/expired session tokens in small batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per transaction (keeps each lock short)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches to let other writers in',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many batches per table; rerun to resume',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the rows that would be deleted',
+        )
+
+    def targets(self, now):
+        """
+        (label, model, queryset) per pass. Each pass filters and orders on one
+        index: an OR across is_used and expires_at would fit none of the
+        partial indexes and scan the whole table for every batch.
+        """
+        return (
+            (
+                "OTP",
+                OTP,
+                OTP.objects.filter(created_at__lt=now - timedelta(minutes=OTP_VALIDITY_MINUTES)).order_by(
+                    "created_at"
+                ),
+            ),
+            (
+                "SessionToken (expired)",
+                SessionToken,
+                SessionToken.objects.filter(is_used=False, expires_at__lt=now).order_by("expires_at"),
+            ),
+            ("SessionToken (used)", SessionToken, SessionToken.objects.filter(is_used=True).order_by("pk")),
+        )
+
+    def handle(self, *args, **options):
+        for label, model, queryset in self.targets(timezone.now()):
+            if options['dry_run']:
+                self.stdout.write(f"{label}: {queryset.count()} rows would be deleted")
+                continue
+
+            self.purge(label, model, queryset, options)
+
+    def purge(self, label, model, queryset, options):
+        batch_size = options['batch_size']
+        max_batches = options['max_batches']
+
+        deleted_total = 0
+        batches = 0
+        lock_total = 0.0
+        lock_max = 0.0
+        started = time.monotonic()
+
+        while max_batches is None or batches < max_batches:
+            # Each batch is its own transaction: an interrupted run loses nothing
+            # and simply resumes from the remaining rows next time.
+            pks = list(queryset.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+
+            lock_start = time.monotonic()
+            with transaction.atomic():
+                deleted, _ = model.objects.filter(pk__in=pks).delete()
+            lock_time = time.monotonic() - lock_start
+
+            deleted_total += deleted
+            batches += 1
+            lock_total += lock_time
+            lock_max = max(lock_max, lock_time)
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.monotonic() - started
+        rate = deleted_total / elapsed if elapsed else 0
+
+        self.stdout.write(
+            f"{label}: deleted {deleted_total} rows in {batches} batches, "
+            f"{rate:.0f} rows/sec, lock time {lock_total * 1000:.1f} ms total "
+            f"(max {lock_max * 1000:.1f} ms per batch)"
+        )
+
+
+# python manage.py purge_expired_secrets --batch-size 500 --sleep 0.1
@@ -1,13 +1,36 @@
-import random
+import secrets
 from datetime import timedelta
 
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import BaseUserManager
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 
+from .hashers import OTP_HASHER_ALGORITHM
 
-class CustomUserManager(BaseUserManager):
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Bulk updates bypass User.save(), so one that sets a field tokens carry
+        (CLAIMED_USER_FIELDS, e.g. update(is_active=False) or is_staff=False)
+        bumps auth_version in the same UPDATE to revoke the users' tokens.
+        """
+        from .models import CLAIMED_USER_FIELDS
+
+        if not CLAIMED_USER_FIELDS & kwargs.keys() or "auth_version" in kwargs:
+            return super().update(**kwargs)
+
+        from .authentication import forget_cached_users
+
+        user_ids = list(self.values_list("pk", flat=True))
+        rows = super().update(auth_version=F("auth_version") + 1, **kwargs)
+        forget_cached_users(user_ids)
+        return rows
+
+
+class CustomUserManager(BaseUserManager.from_queryset(UserQuerySet)):
     use_in_migrations = True
 
     def create_user(self, email, password=None, **extra_fields):
@@ -33,35 +56,58 @@ class CustomUserManager(BaseUserManager):
 
 
 class OTPManager(models.Manager):
+    """
+    OTP storage is delegated to the store configured by USERS_SECRET_STORE
+    (database rows by default, or the cache).
+    """
+
     def create_otp(self, user, purpose, length=6):
         """
         Creates and stores a hashed OTP for the given user and purpose.
+        Codes are hashed with the keyed HMAC hasher, not the (slow) password hasher.
         """
-        raw_code = "".join([str(random.randint(0, 9)) for _ in range(length)])  # numeric OTP
-        hashed_code = make_password(raw_code)
-
-        otp = self.create(
-            user=user,
-            code=hashed_code,
-            purpose=purpose,
-        )
+        raw_code = "".join([str(secrets.randbelow(10)) for _ in range(length)])  # numeric OTP
+        hashed_code = make_password(raw_code, hasher=OTP_HASHER_ALGORITHM)
+
+        otp = _secret_store().add_otp(user, purpose, hashed_code)
         return otp, raw_code
-    
+
+    def get_latest(self, user, purpose):
+        """Returns the most recent OTP for the given user and purpose, or None."""
+        return _secret_store().get_latest_otp(user, purpose)
+
+    def discard(self, otp):
+        _secret_store().delete_otp(otp)
+
 
 class SessionTokenManager(models.Manager):
+    """
+    Session token storage is delegated to the store configured by
+    USERS_SECRET_STORE (database rows by default, or the cache).
+    """
+
     def create_token(self, user, purpose, expiry_hours=12):
         """
         Creates a new session token for the given user and purpose.
-        Defaults to 12 hours expiry.
+        Defaults to 12 hours expiry. Older live tokens for the same
+        user & purpose are invalidated.
         """
-        # Invalidate old tokens for this user & purpose (optional, depending on business rules)
-        self.filter(user=user, purpose=purpose, is_used=False).update(is_used=True)
-
         expires_at = timezone.now() + timedelta(hours=expiry_hours)
+        return _secret_store().add_session_token(user, purpose, expires_at)
+
+    def get_active(self, token, purpose):
+        """Returns the unused session token with its user loaded, or None."""
+        return _secret_store().get_session_token(token, purpose)
+
+    def mark_used(self, session_token):
+        _secret_store().mark_session_token_used(session_token)
+
+    def discard(self, session_token):
+        _secret_store().delete_session_token(session_token)
+
+
+def _secret_store():
+    # Imported lazily: the stores module depends on the models using these managers
+    from .stores import get_secret_store
 
-        token = self.create(
-            user=user,
-            purpose=purpose,
-            expires_at=expires_at,
-        )
-        return token
\ No newline at end of file
+    return get_secret_store()
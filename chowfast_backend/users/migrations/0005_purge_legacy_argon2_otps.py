@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:11
+
+from datetime import timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def purge_expired_legacy_otps(apps, schema_editor):
+    """
+    OTPs hashed with Argon2 before the switch to the HMAC hasher.
+    Unexpired ones still verify (check_password dispatches on the prefix),
+    expired ones can never be used again so drop them.
+    """
+    OTP = apps.get_model("users", "OTP")
+    cutoff = timezone.now() - timedelta(minutes=10)
+    OTP.objects.filter(created_at__lt=cutoff).exclude(
+        code__startswith="otp_hmac_sha256$"
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_user_phone_number'),
+    ]
+
+    operations = [
+        migrations.RunPython(purge_expired_legacy_otps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_purge_legacy_argon2_otps'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['created_at'], name='otp_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessiontoken',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['user', 'purpose'], name='sessiontoken_live_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessiontoken',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['expires_at'], name='sessiontoken_live_expiry_idx'),
+        ),
+    ]
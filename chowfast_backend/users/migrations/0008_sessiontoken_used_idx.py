@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sessiontoken',
+            index=models.Index(condition=models.Q(('is_used', True)), fields=['id'], name='sessiontoken_used_idx'),
+        ),
+    ]
@@ -13,6 +13,15 @@ PURPOSE_CHOICES = (
     ("password_reset", "Password Reset"),
     ("2fa", "Two-Factor Authentication"),
 )
+
+OTP_VALIDITY_MINUTES = 10
+
+# User fields that tokens carry as claims (users.tokens), or that decide whether
+# a token is honoured at all: changing any of them bumps User.auth_version,
+# revoking every token issued before
+CLAIMED_USER_FIELDS = frozenset({"is_active", "user_type", "is_activated", "is_staff", "is_superuser"})
+
+
 class User(AbstractUser):
     USER_TYPES = [
         ("vendor", "Vendor"),
@@ -29,6 +38,8 @@ class User(AbstractUser):
     is_activated = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
+    # Bumped to revoke every JWT issued to the user (see users.authentication)
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["phone_number"]
@@ -46,6 +57,51 @@ class User(AbstractUser):
             models.UniqueConstraint(fields=['phone_number'], name='unique_phone_number_constraint')
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What save() compares against to revoke tokens, without a SELECT per save
+        instance._loaded_claims = {
+            name: instance.__dict__[name] for name in CLAIMED_USER_FIELDS if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        self._revoke_tokens = False
+        if not self._state.adding:
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                # auth_version is only ever written as a bump below, so saving a
+                # stale instance cannot bring revoked tokens back
+                deferred = self.get_deferred_fields()
+                update_fields = {
+                    field.attname
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred and field.attname != "auth_version"
+                }
+            self._revoke_tokens = self.claims_changed(update_fields)
+            if self._revoke_tokens:
+                self.auth_version = models.F("auth_version") + 1
+                update_fields = {*update_fields, "auth_version"}
+            if update_fields:
+                kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+        if self._revoke_tokens:
+            self.refresh_from_db(fields=["auth_version"])
+        self._loaded_claims = {name: self.__dict__[name] for name in CLAIMED_USER_FIELDS if name in self.__dict__}
+
+    def claims_changed(self, update_fields):
+        """Whether saving `update_fields` changes a field that tokens carry (CLAIMED_USER_FIELDS)."""
+        names = [name for name in CLAIMED_USER_FIELDS if name in update_fields]
+        if not names:
+            return False
+        loaded = getattr(self, "_loaded_claims", {})
+        missing = [name for name in names if name not in loaded]
+        if missing:
+            # Not loaded from the database (or deferred): only these pay for a lookup
+            loaded = {**loaded, **(User.objects.filter(pk=self.pk).values(*missing).first() or {})}
+        return any(name in loaded and getattr(self, name) != loaded[name] for name in names)
+
     def __str__(self):
         return f"{self.email} ({self.user_type})"
 
@@ -61,10 +117,12 @@ class OTP(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["user", "purpose"]),
+            # Used by purge_expired_secrets to find expired codes
+            models.Index(fields=["created_at"], name="otp_created_at_idx"),
         ]
         verbose_name = "OTP"
 
-    def is_expired(self, validity_minutes=10):
+    def is_expired(self, validity_minutes=OTP_VALIDITY_MINUTES):
         return timezone.now() > self.created_at + timezone.timedelta(
             minutes=validity_minutes
         )
@@ -72,11 +130,15 @@ class OTP(models.Model):
     def verify_otp(self, raw_code):
         """
         Verify OTP by checking hashed code.
+        check_password dispatches on the stored algorithm prefix, so OTPs
+        hashed with Argon2 before the switch to HMAC still verify.
         """
         return check_password(raw_code, self.code)
 
     def __str__(self):
-        return f"OTP for {self.user.email} ({self.purpose})"
+        # Name the user only when already loaded, so lists of OTPs never query per row
+        user = self.user.email if OTP.user.is_cached(self) else f"user {self.user_id}"
+        return f"OTP for {user} ({self.purpose})"
 
 
 class SessionToken(TimestampMixin, models.Model):
@@ -93,6 +155,27 @@ class SessionToken(TimestampMixin, models.Model):
 
     objects = SessionTokenManager()
 
+    class Meta:
+        indexes = [
+            # Lookups only ever target live tokens; keep the index to that subset
+            models.Index(
+                fields=["user", "purpose"],
+                condition=models.Q(is_used=False),
+                name="sessiontoken_live_user_idx",
+            ),
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(is_used=False),
+                name="sessiontoken_live_expiry_idx",
+            ),
+            # Lets purge_expired_secrets find used tokens without a table scan
+            models.Index(
+                fields=["id"],
+                condition=models.Q(is_used=True),
+                name="sessiontoken_used_idx",
+            ),
+        ]
+
     def is_valid(self):
         """Checks if the session token is still valid (not expired and not yet used)."""
         return not self.is_used and self.expires_at > timezone.now()
@@ -101,4 +184,5 @@ class SessionToken(TimestampMixin, models.Model):
         return timezone.now() > self.expires_at
 
     def __str__(self):
-        return f"Session for {self.user.email} - {str(self.token)[:10]}..."
+        user = self.user.email if SessionToken.user.is_cached(self) else f"user {self.user_id}"
+        return f"Session for {user} - {str(self.token)[:10]}..."
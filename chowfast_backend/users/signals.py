@@ -0,0 +1,23 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .authentication import auth_version_cache_key, user_cache_key
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_auth(sender, instance, **kwargs):
+    """
+    Drop the cached user on any save, and the cached token version when
+    User.save() bumped auth_version (a claimed field changed), so every
+    token issued before is rejected by ClaimsJWTAuthentication.
+    """
+    keys = [user_cache_key(instance.pk)]
+    if getattr(instance, "_revoke_tokens", False):
+        keys.append(auth_version_cache_key(instance.pk))
+
+    cache.delete_many(keys)
+    # Also after commit, so a concurrent request cannot re-cache the old state
+    transaction.on_commit(lambda: cache.delete_many(keys))
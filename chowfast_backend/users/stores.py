@@ -0,0 +1,176 @@
+import functools
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OTP, OTP_VALIDITY_MINUTES, SessionToken, User
+
+
+def get_secret_store():
+    """Return the store configured by USERS_SECRET_STORE."""
+    return _load_store(settings.USERS_SECRET_STORE)
+
+
+@functools.cache
+def _load_store(path):
+    return import_string(path)()
+
+
+class BaseSecretStore:
+    """
+    Storage for short-lived secrets (OTPs and session tokens).
+    OTPManager and SessionTokenManager delegate to the configured store.
+    """
+
+    def add_otp(self, user, purpose, code):
+        raise NotImplementedError
+
+    def get_latest_otp(self, user, purpose):
+        """Return the most recent OTP for user & purpose, or None."""
+        raise NotImplementedError
+
+    def delete_otp(self, otp):
+        raise NotImplementedError
+
+    def add_session_token(self, user, purpose, expires_at):
+        """Create a token, invalidating older live tokens for user & purpose."""
+        raise NotImplementedError
+
+    def get_session_token(self, token, purpose):
+        """Return the unused token (with its user loaded), or None."""
+        raise NotImplementedError
+
+    def mark_session_token_used(self, session_token):
+        raise NotImplementedError
+
+    def delete_session_token(self, session_token):
+        raise NotImplementedError
+
+
+class DatabaseSecretStore(BaseSecretStore):
+    """Keeps OTPs and session tokens as rows in the users tables."""
+
+    def add_otp(self, user, purpose, code):
+        return OTP.objects.create(user=user, purpose=purpose, code=code)
+
+    def get_latest_otp(self, user, purpose):
+        return OTP.objects.filter(user=user, purpose=purpose).order_by("-created_at").first()
+
+    def delete_otp(self, otp):
+        otp.delete()
+
+    def add_session_token(self, user, purpose, expires_at):
+        # Superseded tokens are removed outright rather than left behind as used rows
+        SessionToken.objects.filter(user=user, purpose=purpose, is_used=False).delete()
+        return SessionToken.objects.create(user=user, purpose=purpose, expires_at=expires_at)
+
+    def get_session_token(self, token, purpose):
+        return (
+            SessionToken.objects.select_related("user")
+            .filter(token=token, purpose=purpose, is_used=False)
+            .first()
+        )
+
+    def mark_session_token_used(self, session_token):
+        session_token.is_used = True
+        session_token.save(update_fields=["is_used", "updated_at"])
+
+    def delete_session_token(self, session_token):
+        session_token.delete()
+
+
+class CacheSecretStore(BaseSecretStore):
+    """
+    Keeps OTPs and session tokens in the Django cache and lets the cache TTL
+    expire them. Instances returned are unsaved OTP/SessionToken objects.
+
+    Production needs a cache shared by every worker (Redis); LocMemCache is only
+    suitable for tests and single-process development.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.USERS_SECRET_STORE_CACHE_ALIAS]
+
+    def _otp_key(self, user_id, purpose):
+        return f"users:otp:{purpose}:{user_id}"
+
+    def _token_key(self, token):
+        return f"users:session_token:{token}"
+
+    def _user_token_key(self, user_id, purpose):
+        return f"users:session_token:{purpose}:{user_id}"
+
+    def add_otp(self, user, purpose, code):
+        # Only the latest OTP per user & purpose is ever checked, so overwrite
+        otp = OTP(user=user, purpose=purpose, code=code, created_at=timezone.now())
+        self.cache.set(
+            self._otp_key(user.pk, purpose),
+            {"code": code, "created_at": otp.created_at},
+            timeout=OTP_VALIDITY_MINUTES * 60,
+        )
+        return otp
+
+    def get_latest_otp(self, user, purpose):
+        data = self.cache.get(self._otp_key(user.pk, purpose))
+        if data is None:
+            return None
+        return OTP(user=user, purpose=purpose, code=data["code"], created_at=data["created_at"])
+
+    def delete_otp(self, otp):
+        self.cache.delete(self._otp_key(otp.user_id, otp.purpose))
+
+    def add_session_token(self, user, purpose, expires_at):
+        user_token_key = self._user_token_key(user.pk, purpose)
+        previous = self.cache.get(user_token_key)
+        if previous:
+            self.cache.delete(self._token_key(previous))
+
+        session_token = SessionToken(user=user, purpose=purpose, expires_at=expires_at)
+        timeout = max(int((expires_at - timezone.now()).total_seconds()), 1)
+        self.cache.set_many(
+            {
+                self._token_key(session_token.token): {
+                    "user_id": user.pk,
+                    "purpose": purpose,
+                    "expires_at": expires_at,
+                    "created_at": session_token.created_at,
+                },
+                user_token_key: session_token.token,
+            },
+            timeout=timeout,
+        )
+        return session_token
+
+    def get_session_token(self, token, purpose):
+        token = uuid.UUID(str(token))
+        data = self.cache.get(self._token_key(token))
+        if data is None or data["purpose"] != purpose:
+            return None
+
+        user = User.objects.filter(pk=data["user_id"]).first()
+        if user is None:
+            return None
+
+        return SessionToken(
+            user=user,
+            token=token,
+            purpose=purpose,
+            expires_at=data["expires_at"],
+            created_at=data["created_at"],
+        )
+
+    def mark_session_token_used(self, session_token):
+        # Single-use: a used token is indistinguishable from a missing one
+        self.delete_session_token(session_token)
+
+    def delete_session_token(self, session_token):
+        keys = [self._token_key(session_token.token)]
+        user_token_key = self._user_token_key(session_token.user_id, session_token.purpose)
+        # The index may already point at a newer token; leave that one alone
+        if self.cache.get(user_token_key) == session_token.token:
+            keys.append(user_token_key)
+        self.cache.delete_many(keys)
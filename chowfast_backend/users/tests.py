@@ -1,3 +1,221 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from api.v1.search.views import SearchView
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .authentication import CachedUserJWTAuthentication, ClaimsJWTAuthentication, user_cache_key
+from .hashers import OTP_HASHER_ALGORITHM, OTPHMACHasher
+from .management.commands.purge_expired_secrets import Command as PurgeCommand
+from .models import OTP, OTP_VALIDITY_MINUTES, SessionToken, User
+from .stores import CacheSecretStore
+from .tokens import ClaimsRefreshToken
+
+
+@override_settings(OTP_HASH_KEY="first-key")
+class OTPHMACHasherTests(SimpleTestCase):
+    def test_round_trip(self):
+        encoded = make_password("123456", hasher=OTP_HASHER_ALGORITHM)
+        self.assertTrue(encoded.startswith(f"{OTP_HASHER_ALGORITHM}$"))
+        self.assertNotIn("123456", encoded)
+        self.assertTrue(check_password("123456", encoded))
+        # Salted: the same code never encodes the same way twice
+        self.assertNotEqual(encoded, make_password("123456", hasher=OTP_HASHER_ALGORITHM))
+
+    def test_wrong_code(self):
+        encoded = OTPHMACHasher().encode("123456", "salt")
+        self.assertFalse(check_password("654321", encoded))
+        self.assertFalse(check_password("", encoded))
+
+    def test_key_change_invalidates_codes(self):
+        encoded = OTPHMACHasher().encode("123456", "salt")
+        with override_settings(OTP_HASH_KEY="second-key"):
+            self.assertFalse(check_password("123456", encoded))
+        self.assertTrue(check_password("123456", encoded))
+
+
+class CacheSecretStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = CacheSecretStore()
+        self.user = User.objects.create_user(email="vendor@example.com", password="!", user_type="vendor")
+
+    def test_latest_otp_replaces_the_previous_one(self):
+        self.store.add_otp(self.user, "email_verification", "first")
+        self.store.add_otp(self.user, "email_verification", "second")
+        otp = self.store.get_latest_otp(self.user, "email_verification")
+        self.assertEqual(otp.code, "second")
+        self.assertIsNone(self.store.get_latest_otp(self.user, "password_reset"))
+
+        self.store.delete_otp(otp)
+        self.assertIsNone(self.store.get_latest_otp(self.user, "email_verification"))
+
+    def test_new_session_token_invalidates_the_previous_one(self):
+        expires_at = timezone.now() + timedelta(hours=1)
+        first = self.store.add_session_token(self.user, "email_verification", expires_at)
+        second = self.store.add_session_token(self.user, "email_verification", expires_at)
+
+        self.assertIsNone(self.store.get_session_token(first.token, "email_verification"))
+        self.assertIsNone(self.store.get_session_token(second.token, "password_reset"))
+        found = self.store.get_session_token(second.token, "email_verification")
+        self.assertEqual((found.token, found.user), (second.token, self.user))
+
+    def test_used_session_token_leaves_nothing_behind(self):
+        expires_at = timezone.now() + timedelta(hours=1)
+        session_token = self.store.add_session_token(self.user, "email_verification", expires_at)
+        self.store.mark_session_token_used(session_token)
+
+        self.assertIsNone(self.store.get_session_token(session_token.token, "email_verification"))
+        self.assertIsNone(cache.get(self.store._token_key(session_token.token)))
+        self.assertIsNone(cache.get(self.store._user_token_key(self.user.pk, "email_verification")))
+
+    def test_deleting_a_superseded_token_keeps_the_newer_index(self):
+        expires_at = timezone.now() + timedelta(hours=1)
+        first = self.store.add_session_token(self.user, "email_verification", expires_at)
+        second = self.store.add_session_token(self.user, "email_verification", expires_at)
+        self.store.delete_session_token(first)
+        self.assertEqual(cache.get(self.store._user_token_key(self.user.pk, "email_verification")), second.token)
+
+
+class PurgeExpiredSecretsTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email="vendor@example.com", password="!", user_type="vendor")
+        now = timezone.now()
+        stale = now - timedelta(minutes=OTP_VALIDITY_MINUTES + 1)
+        self.live_otp = OTP.objects.create(user=user, code="!", purpose="email_verification")
+        old_otps = OTP.objects.bulk_create(OTP(user=user, code="!", purpose="2fa") for _ in range(3))
+        OTP.objects.filter(pk__in=[otp.pk for otp in old_otps]).update(created_at=stale)
+
+        self.live_token = SessionToken.objects.create(
+            user=user, purpose="email_verification", expires_at=now + timedelta(hours=1)
+        )
+        SessionToken.objects.bulk_create(
+            SessionToken(user=user, purpose="2fa", expires_at=now - timedelta(minutes=1)) for _ in range(3)
+        )
+        SessionToken.objects.bulk_create(
+            SessionToken(user=user, purpose="password_reset", expires_at=now + timedelta(hours=1), is_used=True)
+            for _ in range(2)
+        )
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command("purge_expired_secrets", "--batch-size", "2", *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_only_expired_and_used_rows(self):
+        self.assertIn("SessionToken (used): 2 rows would be deleted", self.purge("--dry-run"))
+        self.assertEqual((OTP.objects.count(), SessionToken.objects.count()), (4, 6))
+
+        output = self.purge()
+        self.assertIn("OTP: deleted 3 rows in 2 batches", output)
+        self.assertIn("SessionToken (expired): deleted 3 rows in 2 batches", output)
+        self.assertIn("SessionToken (used): deleted 2 rows in 1 batches", output)
+        self.assertEqual(list(OTP.objects.all()), [self.live_otp])
+        self.assertEqual(list(SessionToken.objects.all()), [self.live_token])
+
+    def test_each_pass_uses_an_index(self):
+        for label, _, queryset in PurgeCommand().targets(timezone.now()):
+            with self.subTest(label=label):
+                plan = queryset.values_list("pk", flat=True)[:2].explain()
+                self.assertIn("USING", plan)
+                self.assertNotIn("TEMP B-TREE", plan)  # Ordered by the index, no sort
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="vendor@example.com", password="s3cret-pass", user_type="vendor")
+        self.request = RequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(self.user).access_token}"
+        )
+
+    def authenticate(self, authentication_class=ClaimsJWTAuthentication):
+        user, _ = authentication_class().authenticate(self.request)
+        return user
+
+    def test_claims_are_trusted_after_the_first_request(self):
+        self.assertEqual(self.authenticate().user_type, "vendor")
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual((str(user.id), user.is_activated), (str(self.user.pk), False))
+
+    def test_deactivation_revokes_tokens(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, "Token has been revoked."):
+            self.authenticate()
+
+        # Reactivating does not bring the old tokens back
+        self.user.is_active = True
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, "Token has been revoked."):
+            self.authenticate()
+
+    def test_bulk_deactivation_revokes_tokens(self):
+        self.authenticate(CachedUserJWTAuthentication)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.auth_version, 1)
+        for authentication_class in (ClaimsJWTAuthentication, CachedUserJWTAuthentication):
+            with self.subTest(authentication_class=authentication_class.__name__):
+                with self.assertRaises(AuthenticationFailed):
+                    self.authenticate(authentication_class)
+
+    def test_cached_user_leaves_out_the_password_hash(self):
+        self.authenticate(CachedUserJWTAuthentication)
+        self.assertNotIn(self.user.password, cache.get(user_cache_key(self.user.pk)).values())
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(CachedUserJWTAuthentication)
+        self.assertEqual((user.pk, user.email, user.user_type), (self.user.pk, "vendor@example.com", "vendor"))
+        self.assertIn("password", user.get_deferred_fields())
+
+        user.phone_number = "+2348012345678"
+        user.save()  # Writes the loaded fields only
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("s3cret-pass"))
+
+    @patch.object(SearchView, "authentication_classes", [ClaimsJWTAuthentication])
+    def test_demotion_revokes_tokens(self):
+        admin = User.objects.create_user(email="admin@example.com", password="!", user_type="admin", is_staff=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(admin).access_token}")
+        self.assertEqual(client.get(reverse("search"), {"q": "jollof"}).status_code, 200)
+
+        refresh = ClaimsRefreshToken.for_user(admin)
+        response = APIClient().post(reverse("token_refresh"), {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        admin.is_staff = False
+        admin.save(update_fields=["is_staff"])
+        self.assertEqual(client.get(reverse("search"), {"q": "jollof"}).status_code, 401)
+        # Nor can the old refresh token mint new access tokens
+        response = APIClient().post(reverse("token_refresh"), {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_bulk_claim_change_revokes_tokens(self):
+        self.authenticate()
+        User.objects.filter(pk=self.user.pk).update(user_type="admin")
+        with self.assertRaisesMessage(AuthenticationFailed, "Token has been revoked."):
+            self.authenticate()
+
+    def test_stale_save_keeps_tokens_revoked(self):
+        stale = User.objects.get(pk=self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        stale.first_name = "Ada"
+        stale.save()  # Must not write the old auth_version back
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.auth_version, self.user.first_name), (1, "Ada"))
+        with self.assertRaisesMessage(AuthenticationFailed, "Token has been revoked."):
+            self.authenticate()
@@ -0,0 +1,52 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+AUTH_VERSION_CLAIM = "ver"
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user claims that ClaimsJWTAuthentication trusts
+    instead of loading the user. Access tokens derived from it copy the claims.
+    """
+
+    @classmethod
+    def for_user(cls, user, vendor_id=None):
+        token = super().for_user(user)
+        token["user_type"] = user.user_type
+        token["is_activated"] = user.is_activated
+        token["is_staff"] = user.is_staff
+        token["vendor_id"] = vendor_id
+        token[AUTH_VERSION_CLAIM] = user.auth_version
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login serializer issuing ClaimsRefreshToken pairs."""
+
+    token_class = ClaimsRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        from vendors.models import Vendor
+
+        vendor_id = Vendor.objects.filter(user=user).values_list("vendor_id", flat=True).first()
+        return cls.token_class.for_user(user, vendor_id=vendor_id)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh that refuses revoked refresh tokens (their User.auth_version was bumped)."""
+
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        from .authentication import get_auth_version
+
+        refresh = self.token_class(attrs["refresh"])
+        current_version = get_auth_version(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if current_version is None or refresh.get(AUTH_VERSION_CLAIM, 0) != current_version:
+            raise AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+        return super().validate(attrs)
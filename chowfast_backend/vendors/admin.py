@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from .models import Vendor
+from . import geo
+from .models import OutboxEmail, Vendor
 
 
 @admin.register(Vendor)
@@ -20,15 +22,51 @@ class VendorAdmin(admin.ModelAdmin):
     # Fields to display in the admin detail view
     fieldsets = (
         (None, {'fields': ('vendor_id', 'user', 'business_name', 'address')}),
+        ('Location', {'fields': ('latitude', 'longitude', 'geohash')}),
         ('Status', {'fields': ('online', 'verified')}),
         ('Metrics', {'fields': ('rating', 'total_orders')}),
         ('Dates', {'fields': ('created_at',)}),
     )
     
     # Read-only fields
-    readonly_fields = ('vendor_id', 'created_at', 'total_orders')
+    # total_orders and rating come from the counter rollup (vendors.counters),
+    # online from heartbeats (vendors.presence)
+    readonly_fields = ('vendor_id', 'created_at', 'total_orders', 'rating', 'online', 'geohash')
+
+    # Load the user with the row (user_email) and pick users by search, not a full dropdown
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
     
     # Custom method to display user's email in list view
     def user_email(self, obj):
         return obj.user.email
-    user_email.short_description = 'User Email'
\ No newline at end of file
+    user_email.short_description = 'User Email'
+    user_email.admin_order_field = 'user__email'
+
+    @admin.display(description='Geohash')
+    def geohash(self, obj):
+        return geo.to_string(obj.geocell) if obj.geocell is not None else '-'
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to_email', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('to_email', 'subject')
+    ordering = ('-created_at',)
+    readonly_fields = ('subject', 'to_email', 'status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at', 'created_at')
+    exclude = ('html_body',)  # May contain OTP codes
+    actions = ['retry_now']
+
+    def has_add_permission(self, request):
+        # Emails are queued by the application, not via admin
+        return False
+
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OutboxEmail.STATUS_SENT).update(
+            status=OutboxEmail.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} emails queued for retry.")
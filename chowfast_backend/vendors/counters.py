@@ -0,0 +1,98 @@
+"""
+Sharded vendor counters.
+
+Every order used to mean an UPDATE of its vendor's row, so orders for a busy
+vendor queued up behind each other's row lock. Writes now go to one of
+VENDOR_COUNTER_SHARDS VendorCounterShard rows picked at random, and rollup()
+periodically (rollup_vendor_counters) folds the slots back into
+Vendor.total_orders and Vendor.rating.
+
+Slots hold running totals and are never reset, so a rollup is a plain
+recomputation: it can run at any time, repeatedly, without losing increments
+that land while it runs.
+"""
+
+import random
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Vendor, VendorCounterShard
+
+ROLLUP_BATCH_SIZE = 1000
+
+
+def increment(vendor_id, orders=0, rating_total=0, ratings=0, create=True):
+    """
+    Add to a random counter slot of the vendor (inside the caller's transaction).
+    With create=False (taking a deleted order back out) no slot is ever added:
+    when the deletion comes from the vendor's own, its slots are already gone.
+    """
+    slot = random.randrange(settings.VENDOR_COUNTER_SHARDS)
+    shard = VendorCounterShard.objects.filter(vendor_id=vendor_id, slot=slot)
+    changes = {
+        "orders": F("orders") + orders,
+        "rating_total": F("rating_total") + rating_total,
+        "ratings": F("ratings") + ratings,
+    }
+    if shard.update(**changes):
+        return
+    if not create:
+        # Any existing slot will do; the totals are sums over all of them
+        shards = VendorCounterShard.objects.filter(vendor_id=vendor_id)
+        shards.filter(pk__in=shards.values("pk")[:1]).update(**changes)
+        return
+    try:
+        with transaction.atomic():
+            VendorCounterShard.objects.create(
+                vendor_id=vendor_id, slot=slot, orders=orders, rating_total=rating_total, ratings=ratings
+            )
+    except IntegrityError:
+        # Another writer created this slot first
+        shard.update(**changes)
+
+
+def average_rating(rating_total, ratings):
+    return (Decimal(rating_total) / ratings).quantize(Decimal("0.1"), rounding=ROUND_HALF_UP)
+
+
+def rollup(batch_size=ROLLUP_BATCH_SIZE):
+    """Write the slot totals to vendors whose columns are out of date; returns how many."""
+    totals = (
+        VendorCounterShard.objects.values("vendor_id")
+        .annotate(orders=Sum("orders"), rating_total=Sum("rating_total"), ratings=Sum("ratings"))
+        .order_by("vendor_id")
+    )
+    updated = 0
+    batch = []
+    for row in totals.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            updated += _apply(batch)
+            batch = []
+    if batch:
+        updated += _apply(batch)
+    return updated
+
+
+def _apply(rows):
+    vendors = Vendor.objects.only("total_orders", "rating").in_bulk([row["vendor_id"] for row in rows])
+    now = timezone.now()
+    changed = []
+    for row in rows:
+        vendor = vendors.get(row["vendor_id"])
+        if vendor is None:
+            continue
+        # Vendors nobody has rated yet keep the rating they have
+        rating = average_rating(row["rating_total"], row["ratings"]) if row["ratings"] else vendor.rating
+        if vendor.total_orders == row["orders"] and vendor.rating == rating:
+            continue
+        vendor.total_orders = row["orders"]
+        vendor.rating = rating
+        vendor.updated_at = now
+        changed.append(vendor)
+    Vendor.objects.bulk_update(changed, ["total_orders", "rating", "updated_at"])
+    return len(changed)
@@ -2,23 +2,40 @@ from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 
+from .models import OutboxEmail
+
 
 def send_html_email(subject, to_email, template_name, context):
     """
-    Send ONLY HTML email (no plain text fallback).
+    Queue an HTML-only email in the outbox.
+
+    The row is written in the caller's transaction, so the email only goes out
+    if that transaction commits. Delivery happens in `send_outbox_emails`.
     """
 
     html_content = render_to_string(template_name, context)
 
-    email = EmailMultiAlternatives(
+    return OutboxEmail.objects.create(
         subject=subject,
-        body=html_content,                     # Set HTML as the main body
+        to_email=to_email,
+        html_body=html_content,
+    )
+
+
+def build_outbox_message(outbox_email, connection=None):
+    """
+    Build the HTML-only message for a queued email (no plain text fallback).
+    """
+
+    email = EmailMultiAlternatives(
+        subject=outbox_email.subject,
+        body=outbox_email.html_body,            # Set HTML as the main body
         from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[to_email],
+        to=[outbox_email.to_email],
+        connection=connection,
     )
     email.content_subtype = "html"            # This makes the email HTML-only
-    email.send(fail_silently=False)
-
+    return email
 
 
 def send_signup_otp_email(user, otp):
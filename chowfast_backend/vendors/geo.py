@@ -0,0 +1,123 @@
+"""
+Geohash grid for vendor discovery.
+
+A vendor's position is stored as an integer geohash (Vendor.geocell):
+GEOCELL_BITS bits, interleaving longitude and latitude halvings exactly like
+the base32 geohash string (5 bits per character). Every cell at a coarser
+level is then a contiguous integer range, so "vendors in these cells" is a
+handful of range scans on a plain B-tree index, on any database.
+
+A radius search covers the circle's bounding box with the finest cells that
+keep the cover at MAX_COVER_CELLS or fewer; adjacent cells merge into one
+range. Exact distances are only computed for the vendors in those cells.
+"""
+
+import math
+
+GEOCELL_BITS = 40  # 8 geohash characters, about 38 m x 19 m
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+MIN_LEVEL = 2
+MAX_COVER_CELLS = 16
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(lat, lng, bits=GEOCELL_BITS):
+    """Integer geohash of (lat, lng) with `bits` bits."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    cell = 0
+    for bit in range(bits):
+        # Even bits halve longitude, odd bits latitude
+        value, bounds = (lng, lng_range) if bit % 2 == 0 else (lat, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        cell <<= 1
+        if value >= middle:
+            cell |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+    return cell
+
+
+def to_string(cell, bits=GEOCELL_BITS):
+    """The usual base32 geohash for an integer geohash (bits must be a multiple of 5)."""
+    return "".join(
+        _BASE32[(cell >> shift) & 0b11111] for shift in range(bits - 5, -1, -5)
+    )
+
+
+def cell_size(level):
+    """(height, width) in degrees of a cell with `level` bits."""
+    lng_bits = (level + 1) // 2
+    lat_bits = level // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lng_bits
+
+
+def bounding_box(lat, lng, radius_km):
+    """(lat_min, lat_max, lng_min, lng_max) around the circle; longitudes may pass +-180."""
+    d_lat = radius_km / KM_PER_DEGREE
+    lat_min, lat_max = max(lat - d_lat, -90.0), min(lat + d_lat, 90.0)
+    # A degree of longitude is shortest at the circle's poleward edge
+    cos_lat = math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+    d_lng = radius_km / (KM_PER_DEGREE * cos_lat) if cos_lat > 1e-9 else 180.0
+    if d_lng >= 180.0:
+        return lat_min, lat_max, -180.0, 180.0
+    return lat_min, lat_max, lng - d_lng, lng + d_lng
+
+
+def cover_radius(lat, lng, radius_km):
+    """
+    (level, cells): the finest grid level at which the circle's bounding box
+    needs at most MAX_COVER_CELLS cells, and those cells.
+    """
+    lat_min, lat_max, lng_min, lng_max = bounding_box(lat, lng, radius_km)
+    for level in range(GEOCELL_BITS, MIN_LEVEL - 1, -1):
+        height, width = cell_size(level)
+        first_row = _grid_index(lat_min, -90.0, height)
+        last_row = min(_grid_index(lat_max, -90.0, height), 2 ** (level // 2) - 1)  # lat_max may be 90
+        first_col, last_col = _grid_index(lng_min, -180.0, width), _grid_index(lng_max, -180.0, width)
+        columns = min(last_col - first_col + 1, 2 ** ((level + 1) // 2))
+        if (last_row - first_row + 1) * columns <= MAX_COVER_CELLS or level == MIN_LEVEL:
+            break
+    cells = set()
+    for row in range(first_row, last_row + 1):
+        centre_lat = -90.0 + (row + 0.5) * height
+        for col in range(first_col, first_col + columns):
+            # Longitude wraps around the antimeridian
+            centre_lng = (-180.0 + (col + 0.5) * width + 180.0) % 360.0 - 180.0
+            cells.add(encode(centre_lat, centre_lng, level))
+    return level, cells
+
+
+def _grid_index(value, origin, step):
+    return math.floor((value - origin) / step)
+
+
+def cell_ranges(cells, level, bits=GEOCELL_BITS):
+    """Merge `level`-bit cells into sorted [low, high) ranges of `bits`-bit geocells."""
+    shift = bits - level
+    ranges = []
+    for cell in sorted(cells):
+        low, high = cell << shift, (cell + 1) << shift
+        if ranges and ranges[-1][1] == low:
+            ranges[-1][1] = high
+        else:
+            ranges.append([low, high])
+    return [tuple(bounds) for bounds in ranges]
+
+
+def ranges_for_radius(lat, lng, radius_km):
+    """Geocell ranges that together cover every point within radius_km of (lat, lng)."""
+    level, cells = cover_radius(lat, lng, radius_km)
+    return cell_ranges(cells, level)
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,123 @@
+import random
+import statistics
+import time
+import uuid
+
+from core.ids import allocate_ids
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from users.models import User
+from vendors import geo
+from vendors.models import VENDOR_ID_SEQUENCE, Vendor, VendorQuerySet, format_vendor_id
+
+# Vendors cluster around cities: (lat, lng) of Lagos, Abuja, Ibadan, Port Harcourt, Kano
+CITIES = [(6.5244, 3.3792), (9.0765, 7.3986), (7.3775, 3.9470), (4.8156, 7.0498), (12.0022, 8.5920)]
+CITY_SPREAD_DEGREES = 0.15
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Compare the geohash-indexed nearby vendor lookup with a distance scan over every open vendor"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendors', type=int, default=100_000, help='Vendors to create')
+        parser.add_argument('--queries', type=int, default=200, help='Lookups timed per strategy')
+        parser.add_argument('--radius', type=float, default=5.0, help='Search radius in km')
+        parser.add_argument('--open-ratio', type=float, default=0.7, help='Share of vendors online and verified')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        try:
+            started = time.perf_counter()
+            self.create_vendors(options['vendors'], options['open_ratio'])
+            self.stdout.write(f"Created {options['vendors']} vendors in {time.perf_counter() - started:.1f}s")
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            points = [self.random_point() for _ in range(options['queries'])]
+            radius = options['radius']
+            indexed = self.bench("geocell index", points, lambda lat, lng: self.indexed(lat, lng, radius))
+            scanned = self.bench("full scan", points, lambda lat, lng: self.scan(lat, lng, radius))
+            if indexed != scanned:
+                self.stderr.write("Result mismatch between the two strategies")
+
+            lat, lng = points[0]
+            plan = Vendor.objects.discoverable().in_radius_cells(lat, lng, radius).order_by().explain()
+            self.stdout.write(f"Plan for one indexed lookup:\n{plan}")
+        finally:
+            self.cleanup()
+
+    def random_point(self):
+        lat, lng = self.rng.choice(CITIES)
+        return (
+            self.rng.gauss(lat, CITY_SPREAD_DEGREES),
+            self.rng.gauss(lng, CITY_SPREAD_DEGREES),
+        )
+
+    def create_vendors(self, count, open_ratio):
+        for start in range(0, count, BATCH_SIZE):
+            size = min(BATCH_SIZE, count - start)
+            with transaction.atomic():
+                users = User.objects.bulk_create(
+                    User(email=f"{self.prefix}{start + i}@example.com", user_type="vendor", password="!")
+                    for i in range(size)
+                )
+                vendors = []
+                for user, vendor_id in zip(users, allocate_ids(VENDOR_ID_SEQUENCE, size)):
+                    lat, lng = self.random_point()
+                    is_open = self.rng.random() < open_ratio
+                    vendors.append(
+                        Vendor(
+                            user=user,
+                            vendor_id=format_vendor_id(vendor_id),
+                            business_name=f"Bench vendor {vendor_id}",
+                            latitude=lat,
+                            longitude=lng,
+                            geocell=geo.encode(lat, lng),  # bulk_create skips save()
+                            online=is_open,
+                            verified=is_open,
+                            rating=round(self.rng.uniform(0, 5), 1),
+                        )
+                    )
+                Vendor.objects.bulk_create(vendors)
+
+    def indexed(self, lat, lng, radius):
+        vendors = Vendor.objects.only("latitude", "longitude", "rating").nearby(lat, lng, radius, limit=20)
+        return [vendor.pk for vendor in vendors]
+
+    def scan(self, lat, lng, radius):
+        # What discovery costs without the grid: a distance for every open vendor
+        results = []
+        for vendor in Vendor.objects.discoverable().only("latitude", "longitude", "rating").order_by():
+            distance = geo.distance_km(lat, lng, vendor.latitude, vendor.longitude)
+            if distance <= radius:
+                score = (
+                    VendorQuerySet.DISTANCE_WEIGHT * (1 - distance / radius)
+                    + VendorQuerySet.RATING_WEIGHT * float(vendor.rating) / 5
+                )
+                results.append((-score, distance, vendor.pk))
+        results.sort()
+        return [pk for _, _, pk in results[:20]]
+
+    def bench(self, label, points, lookup):
+        timings = []
+        results = []
+        for lat, lng in points:
+            started = time.perf_counter()
+            results.append(lookup(lat, lng))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"{label:>13}: {len(points)} lookups, mean {statistics.mean(timings):.1f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms"
+        )
+        return results
+
+    def cleanup(self):
+        Vendor.objects.filter(user__email__startswith=self.prefix).delete()
+        User.objects.filter(email__startswith=self.prefix).delete()
+
+
+# python manage.py bench_nearby_vendors --vendors 100000 --queries 200 --radius 5
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from vendors.counters import ROLLUP_BATCH_SIZE, rollup
+
+
+class Command(BaseCommand):
+    help = "Fold the sharded order/rating counters into Vendor.total_orders and Vendor.rating"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ROLLUP_BATCH_SIZE,
+            help='Vendors updated per query',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep rolling up instead of exiting after one pass',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds between passes (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            updated = rollup(options['batch_size'])
+            self.stdout.write(f"Updated {updated} vendors")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+
+# python manage.py rollup_vendor_counters --loop --interval 60
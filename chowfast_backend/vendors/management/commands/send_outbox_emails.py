@@ -0,0 +1,118 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from vendors.email_service import build_outbox_message
+from vendors.models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def send_chunk(emails):
+    """
+    Send a list of outbox emails over a single backend connection.
+    Runs in a worker thread and never touches the database.
+    Returns (email, error) pairs; error is None on success.
+    """
+    results = []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for email in emails:
+            try:
+                build_outbox_message(email, connection=connection).send()
+                results.append((email, None))
+            except Exception as e:
+                results.append((email, str(e) or e.__class__.__name__))
+    except Exception as e:
+        # Could not connect at all: every email in the chunk failed
+        sent = {email.pk for email, _ in results}
+        results.extend((email, str(e)) for email in emails if email.pk not in sent)
+    finally:
+        connection.close()
+    return results
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox with retries and backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Emails claimed per round',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Parallel connections to the email backend',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Give up on an email after this many failed attempts',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the outbox instead of exiting once it is drained',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the outbox is empty (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.drain(options)
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['poll_interval'])
+
+    def drain(self, options):
+        emails = OutboxEmail.objects.claim_due(options['batch_size'], options['max_attempts'])
+        if not emails:
+            return 0
+
+        concurrency = max(1, min(options['concurrency'], len(emails)))
+        chunks = [emails[i::concurrency] for i in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = [result for chunk in pool.map(send_chunk, chunks) for result in chunk]
+
+        self.record(results, options['max_attempts'])
+        return len(emails)
+
+    def record(self, results, max_attempts):
+        now = timezone.now()
+        sent_ids = [email.pk for email, error in results if error is None]
+        if sent_ids:
+            OutboxEmail.objects.filter(pk__in=sent_ids).update(
+                status=OutboxEmail.STATUS_SENT,
+                sent_at=now,
+                html_body="",
+                last_error="",
+            )
+
+        for email, error in results:
+            if error is None:
+                continue
+            if OutboxEmail.objects.record_failure(email, error, max_attempts):
+                logger.error(f"Giving up on email {email.pk} to {email.to_email}: {error}")
+            else:
+                logger.warning(f"Email {email.pk} to {email.to_email} failed (attempt {email.attempts}): {error}")
+
+        failed = len(results) - len(sent_ids)
+        self.stdout.write(f"Sent {len(sent_ids)} emails, {failed} failed")
+
+
+# python manage.py send_outbox_emails --loop --concurrency 4
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from vendors.presence import SYNC_BATCH_SIZE, sync_online
+
+
+class Command(BaseCommand):
+    help = "Copy vendor heartbeat presence from the cache to Vendor.online"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SYNC_BATCH_SIZE,
+            help='Vendors checked per cache call',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep syncing instead of exiting after one pass',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30.0,
+            help='Seconds between passes (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            went_online, went_offline = sync_online(options['batch_size'])
+            self.stdout.write(f"{went_online} vendors went online, {went_offline} went offline")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+
+# python manage.py sync_vendor_presence --loop --interval 30
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:24
+
+from core.ids import create_sequence, drop_sequence, format_id
+from django.db import migrations
+from django.db.models import Max
+
+
+def widen_vendor_ids(apps, schema_editor):
+    """VEND_0042 -> VEND_00000042, then start the sequence after the highest one."""
+    Vendor = apps.get_model("vendors", "Vendor")
+    vendors = Vendor.objects.using(schema_editor.connection.alias)
+
+    batch = []
+    for vendor in vendors.only("pk").order_by("pk").iterator(chunk_size=2000):
+        vendor.vendor_id = format_id("VEND_", vendor.pk)
+        batch.append(vendor)
+        if len(batch) >= 2000:
+            vendors.bulk_update(batch, ["vendor_id"])
+            batch = []
+    if batch:
+        vendors.bulk_update(batch, ["vendor_id"])
+
+    start = (vendors.aggregate(max_pk=Max("pk"))["max_pk"] or 0) + 1
+    create_sequence(apps, schema_editor, "vendor", start)
+
+
+def restore_vendor_ids(apps, schema_editor):
+    Vendor = apps.get_model("vendors", "Vendor")
+    vendors = Vendor.objects.using(schema_editor.connection.alias)
+    batch = list(vendors.only("pk"))
+    for vendor in batch:
+        vendor.vendor_id = f"VEND_{str(vendor.pk).zfill(4)}"
+    vendors.bulk_update(batch, ["vendor_id"], batch_size=2000)
+    drop_sequence(apps, schema_editor, "vendor")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('vendors', '0003_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(widen_vendor_ids, restore_vendor_ids),
+    ]
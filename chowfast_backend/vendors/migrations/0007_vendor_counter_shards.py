@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_counter_shards(apps, schema_editor):
+    """Carry existing order counts into slot 0 so the first rollup keeps them."""
+    Vendor = apps.get_model("vendors", "Vendor")
+    VendorCounterShard = apps.get_model("vendors", "VendorCounterShard")
+    alias = schema_editor.connection.alias
+    vendors = Vendor.objects.using(alias).filter(total_orders__gt=0).values_list("pk", "total_orders")
+    VendorCounterShard.objects.using(alias).bulk_create(
+        (VendorCounterShard(vendor_id=pk, slot=0, orders=total) for pk, total in vendors.iterator()),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0006_vendor_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('orders', models.IntegerField(default=0)),
+                ('rating_total', models.IntegerField(default=0)),
+                ('ratings', models.IntegerField(default=0)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='vendors.vendor')),
+            ],
+            options={
+                'db_table': 'vendor_counter_shards',
+                'constraints': [models.UniqueConstraint(fields=('vendor', 'slot'), name='vendor_counter_shard_slot_uniq')],
+            },
+        ),
+        migrations.RunPython(seed_counter_shards, migrations.RunPython.noop),
+    ]
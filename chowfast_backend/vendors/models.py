@@ -1,6 +1,57 @@
+from core.ids import allocate_ids, format_id
+from core.leases import LeasedJobManager
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from users.models import User
 
+from . import geo
+
+VENDOR_ID_SEQUENCE = "vendor"
+
+
+def format_vendor_id(value):
+    return format_id("VEND_", value)
+
+
+class VendorQuerySet(models.QuerySet):
+    # Blend of closeness (within the search radius) and rating, both 0..1
+    DISTANCE_WEIGHT = 0.7
+    RATING_WEIGHT = 0.3
+
+    def discoverable(self):
+        """Vendors customers can order from right now (the partial index condition)."""
+        return self.filter(online=True, verified=True)
+
+    def in_radius_cells(self, lat, lng, radius_km):
+        """Vendors in the geohash cells around (lat, lng): an index range scan per cell run."""
+        ranges = geo.ranges_for_radius(lat, lng, radius_km)
+        # UNION ALL rather than OR: planners turn an OR of ranges into a full index scan
+        parts = [self.filter(geocell__gte=low, geocell__lt=high).order_by() for low, high in ranges]
+        return parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+
+    def nearby(self, lat, lng, radius_km, limit=None):
+        """
+        Up to `limit` (default all) discoverable vendors within radius_km,
+        best first. Each has `distance_km` and `discovery_score` set.
+        """
+        # Ranked in Python below, so skip the default ORDER BY
+        candidates = self.discoverable().in_radius_cells(lat, lng, radius_km).order_by()
+        results = []
+        for vendor in candidates:
+            distance = geo.distance_km(lat, lng, vendor.latitude, vendor.longitude)
+            if distance > radius_km:
+                continue  # In a neighbouring cell but outside the circle
+            vendor.distance_km = distance
+            vendor.discovery_score = (
+                self.DISTANCE_WEIGHT * (1 - distance / radius_km)
+                + self.RATING_WEIGHT * float(vendor.rating) / 5
+            )
+            results.append(vendor)
+        results.sort(key=lambda vendor: (-vendor.discovery_score, vendor.distance_km))
+        return results[:limit] if limit is not None else results
+
 
 class Vendor(models.Model):
     vendor_id = models.CharField(
@@ -9,25 +60,49 @@ class Vendor(models.Model):
     user = models.OneToOneField(User, related_name="vendor", on_delete=models.CASCADE)
     business_name = models.CharField(max_length=200)
     address = models.TextField(blank=True, null=True)
+    latitude = models.FloatField(
+        blank=True, null=True, validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        blank=True, null=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    # Integer geohash of (latitude, longitude), see vendors.geo; set in save()
+    geocell = models.BigIntegerField(blank=True, null=True, editable=False)
     rating = models.DecimalField(max_digits=2, decimal_places=1, default=0.0)
     total_orders = models.PositiveIntegerField(default=0)
     online = models.BooleanField(default=False)
     verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VendorQuerySet.as_manager()
 
     class Meta:
         db_table = "vendors"
         ordering = ["-created_at"]
+        indexes = [
+            # Discovery only ever looks at open vendors: keep the index to those
+            models.Index(
+                fields=["geocell"],
+                condition=Q(online=True, verified=True),
+                name="vendor_discovery_geocell_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
-        # Save once to get the primary key
-        is_new = self.pk is None
+        # vendor_id is allocated before the INSERT (core.ids), so creating is one write
+        if self._state.adding and not self.vendor_id:
+            self.vendor_id = format_vendor_id(allocate_ids(VENDOR_ID_SEQUENCE)[0])
+        self.geocell = self.compute_geocell()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geocell"}
         super().save(*args, **kwargs)
 
-        # Generate vendor_id if it's a new record
-        if is_new and not self.vendor_id:
-            self.vendor_id = f"VEND_{str(self.pk).zfill(4)}"
-            Vendor.objects.filter(pk=self.pk).update(vendor_id=self.vendor_id)
+    def compute_geocell(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return geo.encode(self.latitude, self.longitude)
 
     def __str__(self):
         return f"{self.vendor_id or 'Pending ID'} - {self.business_name}"
@@ -37,3 +112,78 @@ class Vendor(models.Model):
         if self.user.phone_number:
             return self.user.phone_number
         return None
+
+
+class VendorCounterShard(models.Model):
+    """
+    One of up to VENDOR_COUNTER_SHARDS running-total rows per vendor.
+
+    Order writes bump a random slot (vendors.counters.increment) instead of
+    the vendor row, so concurrent orders for one vendor rarely wait on the
+    same lock. rollup_vendor_counters sums the slots into Vendor.total_orders
+    and Vendor.rating, which stay the columns readers use.
+    """
+
+    vendor = models.ForeignKey(Vendor, related_name="counter_shards", on_delete=models.CASCADE)
+    slot = models.PositiveSmallIntegerField()
+    # Signed: a corrected rating subtracts from whichever slot it lands on
+    orders = models.IntegerField(default=0)
+    rating_total = models.IntegerField(default=0)  # Sum of order ratings (1-5)
+    ratings = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "vendor_counter_shards"
+        constraints = [
+            models.UniqueConstraint(fields=["vendor", "slot"], name="vendor_counter_shard_slot_uniq"),
+        ]
+
+    def __str__(self):
+        return f"Vendor {self.vendor_id} slot {self.slot}"
+
+
+class OutboxEmailManager(LeasedJobManager):
+    claimed_status = "sending"
+
+
+class OutboxEmail(models.Model):
+    """
+    Outgoing email written in the same transaction as the change that triggers
+    it, and delivered later by the `send_outbox_emails` worker.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    to_email = models.EmailField(max_length=255)
+    html_body = models.TextField(blank=True)  # cleared once sent (may contain OTPs)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = OutboxEmailManager()
+
+    class Meta:
+        db_table = "email_outbox"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status__in=["pending", "sending"]),
+                name="email_outbox_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
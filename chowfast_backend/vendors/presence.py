@@ -0,0 +1,73 @@
+"""
+Vendor presence from cache heartbeats.
+
+Vendor apps call heartbeat() every so often; a vendor is online while its
+key is alive (VENDOR_PRESENCE_TTL seconds after the last heartbeat), so
+refreshing presence never writes to the vendors table. sync_online() (run
+by sync_vendor_presence) copies the live state to Vendor.online in batches
+for admin filters, analytics and the discovery index.
+
+Keys are by public vendor_id, which the vendor's access token carries, so a
+heartbeat needs no database read either. Needs a cache shared by all
+workers (Redis in production) to be meaningful across processes.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Vendor
+
+SYNC_BATCH_SIZE = 1000
+
+
+def presence_key(vendor_id):
+    return f"vendors:presence:{vendor_id}"
+
+
+def heartbeat(vendor_id):
+    """Mark the vendor online for another VENDOR_PRESENCE_TTL seconds."""
+    cache.set(presence_key(vendor_id), timezone.now().timestamp(), timeout=settings.VENDOR_PRESENCE_TTL)
+
+
+def go_offline(vendor_id):
+    cache.delete(presence_key(vendor_id))
+
+
+def is_online(vendor_id):
+    return cache.get(presence_key(vendor_id)) is not None
+
+
+def online_among(vendor_ids):
+    """The subset of vendor_ids that is online, in one cache round trip."""
+    keys = {presence_key(vendor_id): vendor_id for vendor_id in vendor_ids}
+    return {keys[key] for key in cache.get_many(keys)}
+
+
+def sync_online(batch_size=SYNC_BATCH_SIZE):
+    """
+    Write heartbeat state to Vendor.online; returns (went_online, went_offline).
+    One cache call and at most two UPDATEs per batch of vendors, and only
+    vendors whose state changed are written.
+    """
+    went_online = went_offline = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            Vendor.objects.filter(pk__gt=last_pk, vendor_id__isnull=False)
+            .order_by("pk")
+            .values_list("pk", "vendor_id", "online")[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        live = online_among(vendor_id for _, vendor_id, _ in batch)
+        now = timezone.now()
+
+        turned_on = [pk for pk, vendor_id, online in batch if vendor_id in live and not online]
+        turned_off = [pk for pk, vendor_id, online in batch if vendor_id not in live and online]
+        if turned_on:
+            went_online += Vendor.objects.filter(pk__in=turned_on).update(online=True, updated_at=now)
+        if turned_off:
+            went_offline += Vendor.objects.filter(pk__in=turned_off).update(online=False, updated_at=now)
+    return went_online, went_offline
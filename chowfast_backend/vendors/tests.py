@@ -1,3 +1,175 @@
-from django.test import TestCase
+import random
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from smtplib import SMTPException
 
-# Create your tests here.
+from core.leases import LEASE_EXPIRED_ERROR
+from customers.models import Customer
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from orders.models import Order
+from users.models import User
+
+from . import geo, presence
+from .counters import rollup
+from .email_service import send_html_email
+from .models import OutboxEmail, Vendor, VendorCounterShard
+
+
+class FailingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise SMTPException("Mailgun is down")
+
+
+class GeoTests(SimpleTestCase):
+    def test_encode_matches_geohash(self):
+        # Reference values from the geohash definition
+        self.assertEqual(geo.to_string(geo.encode(57.64911, 10.40744)), "u4pruydq")
+        self.assertEqual(geo.to_string(geo.encode(-25.382708, -49.265506)), "6gkzwgjz")
+
+    def test_radius_cells_cover_every_point_in_radius(self):
+        rng = random.Random(42)
+        centres = [(6.5244, 3.3792), (0.0, 179.99), (-33.9, -0.001), (71.0, 25.0), (89.99, 0.0)]
+        for lat, lng in centres:
+            for radius_km in (0.5, 2, 5, 25):
+                ranges = geo.ranges_for_radius(lat, lng, radius_km)
+                with self.subTest(lat=lat, lng=lng, radius_km=radius_km):
+                    for _ in range(500):
+                        spread = radius_km / geo.KM_PER_DEGREE * 3
+                        point_lat = max(-90.0, min(90.0, lat + rng.uniform(-spread, spread)))
+                        point_lng = (lng + rng.uniform(-spread, spread) * 3 + 180.0) % 360.0 - 180.0
+                        if geo.distance_km(lat, lng, point_lat, point_lng) > radius_km:
+                            continue
+                        cell = geo.encode(point_lat, point_lng)
+                        self.assertTrue(any(low <= cell < high for low, high in ranges))
+
+
+@override_settings(VENDOR_COUNTER_SHARDS=4)
+class CounterTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email="vendor@example.com", password="!", user_type="vendor")
+        self.vendor = Vendor.objects.create(user=user, business_name="Mama Put", rating=Decimal("4.0"))
+        self.customer = Customer.objects.create(phone_number="+2348012345678")
+
+    def test_orders_and_ratings_roll_up(self):
+        orders = [Order.objects.create(customer=self.customer, vendor=self.vendor, total=1000) for _ in range(20)]
+        for order, stars in zip(orders, (5, 4, 4)):
+            order.rating = stars
+            order.save()
+        orders[0].rating = 3  # Corrected rating replaces the old one
+        orders[0].save()
+
+        self.assertLessEqual(VendorCounterShard.objects.filter(vendor=self.vendor).count(), 4)
+        self.vendor.refresh_from_db()
+        self.assertEqual((self.vendor.total_orders, self.vendor.rating), (0, Decimal("4.0")))
+
+        self.assertEqual(rollup(), 1)
+        self.vendor.refresh_from_db()
+        self.assertEqual((self.vendor.total_orders, self.vendor.rating), (20, Decimal("3.7")))
+        self.assertEqual(rollup(), 0)  # Nothing changed since
+
+        orders[0].delete()  # Rated 3
+        Order.objects.filter(pk__in=[order.pk for order in orders[10:15]]).delete()  # Unrated
+        self.assertEqual(rollup(), 1)
+        self.vendor.refresh_from_db()
+        self.assertEqual((self.vendor.total_orders, self.vendor.rating), (14, Decimal("4.0")))
+
+    def test_deleting_the_vendor_takes_its_counters(self):
+        Order.objects.create(customer=self.customer, vendor=self.vendor, total=1000, rating=5)
+        self.vendor.user.delete()
+        self.assertFalse(VendorCounterShard.objects.exists())
+
+
+class PresenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendors = [
+            Vendor.objects.create(
+                user=User.objects.create_user(email=f"vendor{i}@example.com", password="!", user_type="vendor"),
+                business_name=f"Vendor {i}",
+                online=online,
+            )
+            for i, online in enumerate((False, True, True))
+        ]
+
+    def test_sync_writes_only_changes(self):
+        fresh, stale, steady = self.vendors
+        presence.heartbeat(fresh.vendor_id)
+        presence.heartbeat(steady.vendor_id)
+
+        self.assertEqual(presence.sync_online(batch_size=2), (1, 1))
+        self.assertEqual(
+            list(Vendor.objects.order_by("pk").values_list("online", flat=True)), [True, False, True]
+        )
+        self.assertEqual(presence.sync_online(), (0, 0))
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class OutboxTests(TestCase):
+    def send_outbox(self, *args):
+        call_command("send_outbox_emails", *args, stdout=StringIO())
+
+    def test_queued_email_is_sent_once(self):
+        email = send_html_email("Welcome", "vendor@example.com", "email/signup_otp_email.html", {"otp": "123456"})
+        self.assertEqual(mail.outbox, [])  # Nothing goes out with the request
+
+        self.send_outbox()
+        self.send_outbox()
+        self.assertEqual(
+            [(message.subject, message.to) for message in mail.outbox], [("Welcome", ["vendor@example.com"])]
+        )
+        self.assertIn("123456", mail.outbox[0].body)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.html_body), (OutboxEmail.STATUS_SENT, 1, ""))
+
+    @override_settings(EMAIL_BACKEND="vendors.tests.FailingEmailBackend")
+    def test_failures_back_off_then_give_up(self):
+        email = OutboxEmail.objects.create(subject="Welcome", to_email="vendor@example.com", html_body="<p>Hi</p>")
+
+        before = timezone.now()
+        with self.assertLogs("vendors.management.commands.send_outbox_emails", "WARNING") as logs:
+            self.send_outbox("--max-attempts", "2")
+        self.assertIn("failed (attempt 1): Mailgun is down", logs.output[0])
+        email.refresh_from_db()
+        self.assertEqual(
+            (email.status, email.attempts, email.last_error), (OutboxEmail.STATUS_PENDING, 1, "Mailgun is down")
+        )
+        # 30 seconds for the first retry, give or take the jitter
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=24))
+        self.assertLessEqual(email.next_attempt_at, timezone.now() + timedelta(seconds=36))
+
+        self.send_outbox("--max-attempts", "2")  # Not due yet
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        with self.assertLogs("vendors.management.commands.send_outbox_emails", "ERROR"):
+            self.send_outbox("--max-attempts", "2")
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_FAILED, 2))
+
+    def test_expired_leases_are_reclaimed_within_max_attempts(self):
+        now = timezone.now()
+        crashed, exhausted, leased = OutboxEmail.objects.bulk_create(
+            OutboxEmail(
+                subject=subject,
+                to_email="vendor@example.com",
+                status=OutboxEmail.STATUS_SENDING,
+                attempts=attempts,
+                next_attempt_at=now + timedelta(seconds=lease),
+            )
+            for subject, attempts, lease in (("crashed", 1, -1), ("exhausted", 5, -1), ("leased", 1, 300))
+        )
+
+        self.send_outbox("--max-attempts", "5")
+        self.assertEqual([message.subject for message in mail.outbox], ["crashed"])
+        for email in (crashed, exhausted, leased):
+            email.refresh_from_db()
+        self.assertEqual((crashed.status, crashed.attempts), (OutboxEmail.STATUS_SENT, 2))
+        self.assertEqual((exhausted.status, exhausted.last_error), (OutboxEmail.STATUS_FAILED, LEASE_EXPIRED_ERROR))
+        self.assertEqual((leased.status, leased.attempts), (OutboxEmail.STATUS_SENDING, 1))  # Another worker has it